@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AttributeLibraryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attribute_library'
+
+    def ready(self):
+        # Keep the process-local Field registry in sync with field changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2024-10-03 09:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attribute_library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='field',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
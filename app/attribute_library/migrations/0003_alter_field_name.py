@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2024-10-03 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attribute_library', '0002_field_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='field',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.db import models
 
 class Field(models.Model):
-    name = models.CharField(max_length=255)
+    # Indexed: templates built from external configs look fields up by their dotted path
+    name = models.CharField(max_length=255, db_index=True)
     visible_name = models.CharField(max_length=255)
     data_type = models.CharField(max_length=50)
+    # Set on every save; used as the validator for conditional GETs of fields
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,137 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .models import Field
+
+
+@dataclass(frozen=True)
+class RegisteredField:
+    """
+    Immutable, process-local copy of a Field row.
+
+    Attributes:
+        - id (int): Primary key of the Field.
+        - name (str): Dotted source path. Example: 'candidate.first_name'
+        - visible_name (str): Dotted destination path. Example: 'Candidate Details.First Name'
+        - data_type (str): Declared type of the values. Example: 'String'
+    """
+    id: int
+    name: str
+    visible_name: str
+    data_type: str
+
+
+# Fields read so far, by primary key and by name, each with the time.monotonic() at which it expires:
+# {id: (expires_at, RegisteredField)} and {name: (expires_at, lowest id using the name)}
+_fields_by_id = {}
+_field_ids_by_name = {}
+_registry_lock = threading.Lock()
+
+
+def get_registry_ttl():
+    """
+    Seconds a Field stays in the registry, from the FIELD_REGISTRY_TTL setting.
+
+    Changes made in this process invalidate the registry at once (see attribute_library.signals); this bounds
+    how long other processes may keep serving a Field that was changed or deleted elsewhere. 0 (or less) keeps
+    nothing, so every lookup reads the database.
+    """
+    return getattr(settings, 'FIELD_REGISTRY_TTL', 60)
+
+
+def _load(queryset, by_name=False):
+    # Read Fields and register them, unless the registry keeps nothing. Returns the rows read, as
+    # {id: RegisteredField} and {name: lowest id}.
+    rows = list(queryset.order_by('pk').values_list('pk', 'name', 'visible_name', 'data_type'))
+    fields = {}
+    ids_by_name = {}
+    for row in rows:
+        entry = RegisteredField(*row)
+        fields[entry.id] = entry
+        # Rows come in id order: the first one of each name wins
+        ids_by_name.setdefault(entry.name, entry.id)
+    ttl = get_registry_ttl()
+    if ttl > 0:
+        expires_at = time.monotonic() + ttl
+        with _registry_lock:
+            for entry in fields.values():
+                _fields_by_id[entry.id] = (expires_at, entry)
+            # Only a lookup by name reads every Field using the name, so only it can tell which id is the lowest
+            if by_name:
+                for name, field_id in ids_by_name.items():
+                    _field_ids_by_name[name] = (expires_at, field_id)
+    return fields, ids_by_name
+
+
+def _fresh(index, keys):
+    # The live values of the given keys; expired entries are left out and read again
+    now = time.monotonic()
+    found = {}
+    for key in keys:
+        entry = index.get(key)
+        if entry is not None and entry[0] > now:
+            found[key] = entry[1]
+    return found
+
+
+def get_fields(field_ids):
+    """
+    Look up many Fields by primary key.
+
+    Purpose:
+        Fields change rarely and are read on every template write. Fields already seen by this process are
+        served from memory and only the missing ones are read, with a single query. Saving or deleting a
+        Field drops it from the registry (see attribute_library.signals); changes made by other processes are
+        picked up once the entry expires (see get_registry_ttl).
+
+    Parameters:
+        - field_ids (iterable): Primary keys to look up.
+
+    Returns:
+        - dict: {id: RegisteredField} for the ids that exist. Unknown ids are left out.
+    """
+    field_ids = set(field_ids)
+    found = _fresh(_fields_by_id, field_ids)
+    missing = field_ids.difference(found)
+    if missing:
+        found.update(_load(Field.objects.filter(pk__in=missing))[0])
+    return found
+
+
+def resolve_field_names(names):
+    """
+    Map many Field names (dotted paths) to their ids.
+
+    Parameters:
+        - names (iterable): Field names to resolve. Example: ['candidate.first_name', 'candidate.last_name']
+
+    Returns:
+        - dict: {name: id} for the names that exist. When a name is used by more than one Field the lowest id
+          wins. Unknown names are left out.
+    """
+    names = set(names)
+    found = _fresh(_field_ids_by_name, names)
+    missing = names.difference(found)
+    if missing:
+        found.update(_load(Field.objects.filter(name__in=missing), by_name=True)[1])
+    return found
+
+
+def invalidate_field(field_id, name=None):
+    """
+    Drop a Field from the registry, by id and by its current and previously registered names.
+    """
+    with _registry_lock:
+        entry = _fields_by_id.pop(field_id, (None, None))[1]
+        for stale_name in {name, entry.name if entry else None}:
+            if stale_name is not None:
+                _field_ids_by_name.pop(stale_name, None)
+
+
+def clear_field_registry():
+    with _registry_lock:
+        _fields_by_id.clear()
+        _field_ids_by_name.clear()
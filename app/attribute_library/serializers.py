@@ -1,7 +1,30 @@
+from django.conf import settings
 from rest_framework import serializers
+from config.api import DynamicFieldsMixin
 from .models import Field
 
-class FieldSerializer(serializers.ModelSerializer):
+class FieldSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Field
-        fields = '__all__'
+        # updated_at only drives the Last-Modified/ETag headers and stays out of the body
+        fields = ['id', 'name', 'visible_name', 'data_type']
+
+    def validate_name(self, value):
+        # Opt-in, because existing data may already use a name more than once; the lookup uses the name index
+        if getattr(settings, 'FIELD_NAMES_UNIQUE', False):
+            fields = Field.objects.filter(name=value)
+            if self.instance is not None:
+                fields = fields.exclude(pk=self.instance.pk)
+            if fields.exists():
+                raise serializers.ValidationError(f'A field named "{value}" already exists.')
+        return value
+
+
+class FieldResolveSerializer(serializers.Serializer):
+    names = serializers.ListField(child=serializers.CharField(max_length=255), allow_empty=False)
+
+    def validate_names(self, value):
+        max_names = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+        if len(value) > max_names:
+            raise serializers.ValidationError(f'At most {max_names} names can be resolved at once.')
+        return value
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Field
+from .registry import invalidate_field
+
+
+@receiver(post_save, sender=Field)
+@receiver(post_delete, sender=Field)
+def invalidate_registered_field(sender, instance, **kwargs):
+    # A new field may take over a name that was resolved to nothing or to another field before
+    invalidate_field(instance.pk, instance.name)
@@ -1,3 +1,138 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from .models import Field
+from .registry import clear_field_registry, get_fields, resolve_field_names
+
+
+@override_settings(API_PAGE_SIZE=10)
+class FieldListTestCase(TestCase):
+    def setUp(self):
+        clear_field_registry()
+        Field.objects.bulk_create(
+            Field(name=f'field_{i}', visible_name=f'Field {i}', data_type='String') for i in range(25)
+        )
+
+    def test_pages_cover_every_field_once(self):
+        names = []
+        url = '/api/fields/'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names.extend(field['name'] for field in response.json()['results'])
+            url = response.json()['next']
+        self.assertEqual(names, [f'field_{i}' for i in range(25)])
+
+    def test_limit(self):
+        response = self.client.get('/api/fields/?limit=3')
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_fields_projection(self):
+        response = self.client.get('/api/fields/?fields=id,name&limit=1')
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'name'])
+
+    def test_unknown_projection_field(self):
+        response = self.client.get('/api/fields/?fields=id,colour')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('colour', str(response.json()))
+
+    def test_list_etag(self):
+        etag = self.client.get('/api/fields/')['ETag']
+        self.assertEqual(self.client.get('/api/fields/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Another projection of the same page is a different representation
+        self.assertEqual(self.client.get('/api/fields/?fields=id', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        field = Field.objects.first()
+        field.data_type = 'Integer'
+        field.save()
+        self.assertEqual(self.client.get('/api/fields/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_ignores_if_modified_since_after_delete(self):
+        response = self.client.get('/api/fields/')
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        # Deleting a field makes no stamp on the page newer, so only the ETag can tell the page changed
+        Field.objects.filter(pk=response.json()['results'][3]['id']).delete()
+        last_modified = self.client.get(f"/api/fields/{response.json()['results'][0]['id']}/")['Last-Modified']
+        self.assertEqual(self.client.get('/api/fields/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        self.assertEqual(self.client.get('/api/fields/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_etag(self):
+        url = f'/api/fields/{Field.objects.first().pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class FieldRegistryTestCase(TestCase):
+    def setUp(self):
+        clear_field_registry()
+        self.field = Field.objects.create(name='candidate.first_name', visible_name='First Name', data_type='String')
+
+    def test_resolve_endpoint(self):
+        payload = {'names': ['candidate.first_name', 'candidate.unknown']}
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/fields/resolve/', payload, content_type='application/json')
+        self.assertEqual(response.json(), {
+            'fields': {'candidate.first_name': self.field.pk},
+            'missing': ['candidate.unknown'],
+        })
+
+    def test_registry_serves_known_fields_without_queries(self):
+        resolve_field_names(['candidate.first_name'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_fields([self.field.pk])[self.field.pk].name, 'candidate.first_name')
+            self.assertEqual(resolve_field_names(['candidate.first_name']), {'candidate.first_name': self.field.pk})
+
+    def test_saved_field_is_invalidated(self):
+        resolve_field_names(['candidate.first_name'])
+        self.field.name = 'candidate.given_name'
+        self.field.save()
+        self.assertEqual(resolve_field_names(['candidate.first_name']), {})
+        self.assertEqual(get_fields([self.field.pk])[self.field.pk].name, 'candidate.given_name')
+
+    def test_deleted_field_is_invalidated(self):
+        field_id = self.field.pk
+        get_fields([field_id])
+        self.field.delete()
+        self.assertEqual(get_fields([field_id]), {})
+
+    def test_lowest_id_wins_whatever_was_loaded_before(self):
+        duplicate = Field.objects.create(name='candidate.first_name', visible_name='Given Name', data_type='String')
+        clear_field_registry()
+        get_fields([duplicate.pk])
+        self.assertEqual(resolve_field_names(['candidate.first_name']), {'candidate.first_name': self.field.pk})
+
+    @override_settings(FIELD_REGISTRY_TTL=60)
+    def test_entries_expire(self):
+        get_fields([self.field.pk])
+        # Another process renames the field: no signal reaches this one
+        Field.objects.filter(pk=self.field.pk).update(name='candidate.given_name')
+        self.assertEqual(get_fields([self.field.pk])[self.field.pk].name, 'candidate.first_name')
+        later = time.monotonic() + 61
+        with mock.patch('attribute_library.registry.time.monotonic', return_value=later):
+            self.assertEqual(get_fields([self.field.pk])[self.field.pk].name, 'candidate.given_name')
+
+    @override_settings(FIELD_REGISTRY_TTL=0)
+    def test_zero_ttl_reads_every_time(self):
+        self.assertEqual(get_fields([self.field.pk])[self.field.pk].name, 'candidate.first_name')
+        self.assertEqual(resolve_field_names(['candidate.first_name']), {'candidate.first_name': self.field.pk})
+        with self.assertNumQueries(1):
+            get_fields([self.field.pk])
+        payload = {'names': ['candidate.first_name']}
+        response = self.client.post('/api/fields/resolve/', payload, content_type='application/json')
+        self.assertEqual(response.json(), {'fields': {'candidate.first_name': self.field.pk}, 'missing': []})
+        other = Field.objects.create(name='candidate.last_name', visible_name='Last Name', data_type='String')
+        data = {'name': 'Template', 'mappings': [{'source_field': self.field.pk, 'destination_field': other.pk}]}
+        response = self.client.post('/api/templates/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    @override_settings(FIELD_NAMES_UNIQUE=True)
+    def test_unique_names(self):
+        payload = {'name': 'candidate.first_name', 'visible_name': 'First Name', 'data_type': 'String'}
+        response = self.client.post('/api/fields/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(f'/api/fields/{self.field.pk}/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
@@ -1,10 +1,13 @@
 from django.urls import path
-from .views import FieldListCreateAPIView, FieldRetrieveUpdateAPIView
+from .views import FieldListCreateAPIView, FieldResolveAPIView, FieldRetrieveUpdateAPIView
 
 urlpatterns = [
     # API to create a field and list all fields
     path('', FieldListCreateAPIView.as_view(), name='field-list-create'),  
     
+    # API to resolve many field names to ids at once
+    path('resolve/', FieldResolveAPIView.as_view(), name='field-resolve'),
+
     # API to retrieve, update a specific field
     path('<int:pk>/', FieldRetrieveUpdateAPIView.as_view(), name='field-detail'),  
 ]
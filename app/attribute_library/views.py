@@ -1,48 +1,85 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from config.api import KeysetPagination, get_projection, make_etag, not_modified, set_validators
 from .models import Field
-from .serializers import FieldSerializer
+from .registry import resolve_field_names
+from .serializers import FieldResolveSerializer, FieldSerializer
 
 class FieldListCreateAPIView(APIView):
     """
     APIView for listing all fields and creating a new field.
 
     Methods:
-        - GET: Retrieve a list of all fields in the database.
+        - GET: Retrieve a page of the fields in the database.
         - POST: Create a new field in the database.
 
     Returns:
-        - 200 OK: On successful retrieval of the list of fields.
+        - 200 OK: On successful retrieval of a page of fields.
         - 201 Created: On successful creation of a new field.
         - 400 Bad Request: If there is an error or invalid data.
     """
     
     def get(self, request):
         """
-        Retrieve all fields from the database.
+        Retrieve the fields from the database, one page at a time.
 
         Purpose:
-            This method fetches all Field objects from the database and returns them as a list.
+            This method returns the Field objects ordered by id, paginated with a cursor so that every page
+            costs the same however large the table is (see config.api.KeysetPagination).
+
+        Query Parameters:
+            - limit (int, optional): Number of fields per page (default 100, at most 1000).
+            - cursor (str, optional): Position of the page, taken from the 'next' or 'previous' link.
+            - fields (str, optional): Comma separated fields to return, e.g. '?fields=id,name'.
+              Only these columns are read from the database.
+
+        Conditional Requests:
+            The response carries an ETag computed from the ids and update stamps of the fields on the page.
+            A request with a matching If-None-Match gets an empty 304 Not Modified, without serializing the page.
+            Pages have no Last-Modified and If-Modified-Since is ignored: deleting a field, or an older field
+            moving onto the page, changes the page without making any of its stamps newer.
 
         Returns:
-            - 200 OK: A JSON response with the list of all fields.
+            - 200 OK: A JSON response with one page of fields and the links to the neighbouring pages.
+            - 304 Not Modified: The page has not changed since the client's copy.
             - 400 Bad Request: A JSON response with an error message if something goes wrong.
 
         Example Response:
-            [
-                {
-                    "id": 1,
-                    "name": "Candidate",
-                    "visible_name": "Candidate Name",
-                    "data_type": "String"
-                }
-            ]
+            {
+                "next": "http://localhost:8000/api/fields/?cursor=cD0x",
+                "previous": null,
+                "results": [
+                    {
+                        "id": 1,
+                        "name": "Candidate",
+                        "visible_name": "Candidate Name",
+                        "data_type": "String"
+                    }
+                ]
+            }
         """
         try:
+            projection = get_projection(request, FieldSerializer().fields)
             fields = Field.objects.all()
-            serializer = FieldSerializer(fields, many=True)
-            return Response(serializer.data)
+            if projection is not None:
+                fields = fields.only('updated_at', *projection)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(fields, request, view=self)
+
+            etag = make_etag(
+                request.get_full_path(), paginator.has_next, paginator.has_previous,
+                [(field.pk, field.updated_at) for field in page],
+            )
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            serializer = FieldSerializer(page, many=True, fields=projection)
+            return set_validators(paginator.get_paginated_response(serializer.data), etag)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"data": str(e), "message": "Something Went Wrong"},
@@ -93,6 +130,60 @@ class FieldListCreateAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+class FieldResolveAPIView(APIView):
+    """
+    APIView for resolving many field names to their ids at once.
+
+    Methods:
+        - POST: Map a list of field names (dotted paths) to field ids.
+    """
+
+    def post(self, request):
+        """
+        Resolve many field names to ids.
+
+        Purpose:
+            Templates built from external configs refer to fields by their dotted path. This resolves all the
+            names of such a config in one request: names already known to this process come from the Field
+            registry and the others are read with a single query on the indexed name column.
+
+        Request Body:
+            - names (list of str): The field names to resolve, at most API_MAX_PAGE_SIZE of them.
+
+        Returns:
+            - 200 OK: The ids of the names found, and the names that do not exist. When a name is used by more
+              than one field the lowest id is returned.
+            - 400 Bad Request: A JSON response with an error message if the input data is invalid.
+
+        Example Request Body:
+            {
+                "names": ["candidate.first_name", "candidate.last_name", "candidate.unknown"]
+            }
+
+        Example Response:
+            {
+                "fields": {"candidate.first_name": 1, "candidate.last_name": 2},
+                "missing": ["candidate.unknown"]
+            }
+        """
+        serializer = FieldResolveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        names = serializer.validated_data['names']
+        try:
+            resolved = resolve_field_names(names)
+        except Exception as e:
+            return Response(
+                {"data": str(e), "message": "Something Went Wrong"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            "fields": {name: resolved[name] for name in dict.fromkeys(names) if name in resolved},
+            "missing": [name for name in dict.fromkeys(names) if name not in resolved],
+        })
+
+
 class FieldRetrieveUpdateAPIView(APIView):
     """
     APIView for retrieving and updating a specific field.
@@ -117,8 +208,14 @@ class FieldRetrieveUpdateAPIView(APIView):
         Parameters:
             - pk (int): The primary key of the field to retrieve.
 
+        Conditional Requests:
+            The response carries an ETag and a Last-Modified header derived from the field's update stamp.
+            A request with a matching If-None-Match (or an If-Modified-Since that is not older) gets an
+            empty 304 Not Modified.
+
         Returns:
             - 200 OK: A JSON response with the details of the specified field.
+            - 304 Not Modified: The field has not changed since the client's copy.
             - 404 Not Found: A JSON response if the field with the specified pk does not exist.
 
         Example Response:
@@ -133,8 +230,14 @@ class FieldRetrieveUpdateAPIView(APIView):
             field = Field.objects.get(pk=pk)
         except Field.DoesNotExist:
             return Response({"data": None, "message": "Field not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = make_etag('field', field.pk, field.updated_at)
+        response = not_modified(request, etag, field.updated_at)
+        if response is not None:
+            return response
+
         serializer = FieldSerializer(field)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, field.updated_at)
 
     def put(self, request, pk):
         """
@@ -0,0 +1,119 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination over the primary key, shared by the list endpoints.
+
+    Purpose:
+        Every page is read with 'WHERE id > <last id of the previous page> ORDER BY id LIMIT n', so the cost of
+        a page does not grow with the size of the table or with how deep the client has paged, unlike
+        offset pagination. The position is carried by an opaque 'cursor' query parameter in the 'next' and
+        'previous' links.
+
+    Query Parameters:
+        - cursor: The cursor from a previous 'next' or 'previous' link.
+        - limit: Page size, API_PAGE_SIZE by default and at most API_MAX_PAGE_SIZE.
+
+    Response:
+        {"next": "<url or null>", "previous": "<url or null>", "results": [...]}
+    """
+    ordering = 'pk'
+    page_size_query_param = 'limit'
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, 'API_PAGE_SIZE', 100)
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+        return super().get_page_size(request)
+
+
+def get_projection(request, allowed):
+    """
+    Read the optional '?fields=' projection of a list request.
+
+    Parameters:
+        - request (rest_framework Request): The incoming request.
+        - allowed (iterable): The field names the endpoint can return.
+
+    Returns:
+        - list: The requested field names, in the order given, or None when all fields are wanted.
+
+    Raises:
+        - ValidationError: If a requested field does not exist.
+    """
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValidationError({'fields': [f'Unknown field "{name}".' for name in unknown]})
+    return fields
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin taking an optional 'fields' argument that restricts the fields in the output.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from the parts that identify one version of a response.
+
+    Parameters:
+        - parts: Values whose repr() changes whenever the response body would, e.g. (template id, version).
+
+    Returns:
+        - str: A quoted ETag, e.g. '"5d41402abc4b2a76b9719d911017c592"'.
+    """
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Answer a conditional GET without building the response body.
+
+    Purpose:
+        Clients polling for changes send back the ETag (If-None-Match) or Last-Modified (If-Modified-Since)
+        of the response they already have. When they still match, a 304 Not Modified is all they need, and
+        the serializer never runs.
+
+    Parameters:
+        - request: The incoming request.
+        - etag (str): The current ETag of the resource, from make_etag.
+        - last_modified (datetime, optional): When the resource last changed.
+
+    Returns:
+        - HttpResponseNotModified carrying the validators when the client's copy is current (or a 412 when an
+          If-Match precondition fails), otherwise None.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Add the ETag and Last-Modified headers to a response and return it.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
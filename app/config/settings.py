@@ -135,6 +135,73 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# List endpoints
+# Default and largest number of rows per page of the cursor-paginated field and template lists
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+
+# Attribute library
+# Reject creating or renaming a field to a name another field already uses
+FIELD_NAMES_UNIQUE = os.environ.get('FIELD_NAMES_UNIQUE', 'false').lower() == 'true'
+# Seconds a process keeps serving Fields from its registry; bounds how long it can miss changes made by other processes
+# (0 disables the registry)
+FIELD_REGISTRY_TTL = int(os.environ.get('FIELD_REGISTRY_TTL', 60))
+
+
+# Transformer
+# Engine used to apply compiled templates: 'interpreter', 'codegen' (generated Python per template)
+# or 'columnar' (batches pivoted into per-path columns, for large batches of flat records)
+TRANSFORMER_ENGINE = os.environ.get('TRANSFORMER_ENGINE', 'interpreter')
+# Maximum number of records accepted by a single batch transform request
+TRANSFORMER_BATCH_MAX_SIZE = int(os.environ.get('TRANSFORMER_BATCH_MAX_SIZE', 1000))
+# Number of bytes of NDJSON output buffered before a chunk is flushed to the client
+TRANSFORMER_STREAM_CHUNK_SIZE = int(os.environ.get('TRANSFORMER_STREAM_CHUNK_SIZE', 64 * 1024))
+# Worker processes for the offline transforms of transform_worker and transform_file (1 disables them, 0 uses one
+# per CPU core). HTTP endpoints always transform in the serving process
+TRANSFORMER_PARALLEL_WORKERS = int(os.environ.get('TRANSFORMER_PARALLEL_WORKERS', 1))
+# Largest number of records handed to a worker process at a time (job chunks are split evenly over the workers)
+TRANSFORMER_PARALLEL_CHUNK_SIZE = int(os.environ.get('TRANSFORMER_PARALLEL_CHUNK_SIZE', 500))
+# Compile templates when the process starts (set it for web workers; with gunicorn --preload the workers
+# share the warmed plans), optionally only the most recently updated ones
+TRANSFORMER_WARM_START = os.environ.get('TRANSFORMER_WARM_START', 'false').lower() == 'true'
+TRANSFORMER_WARM_START_LIMIT = int(os.environ.get('TRANSFORMER_WARM_START_LIMIT', 0)) or None
+# Convert every transformed value to the data_type of its destination field ('Integer', 'Boolean', 'Date', ...);
+# records with values that cannot be converted fail
+TRANSFORMER_COERCE_TYPES = os.environ.get('TRANSFORMER_COERCE_TYPES', 'false').lower() == 'true'
+# Background transform jobs: maximum records per job, records a worker transforms between checkpoints, and seconds
+# without a checkpoint after which another worker takes a running job over
+TRANSFORMER_JOB_MAX_SIZE = int(os.environ.get('TRANSFORMER_JOB_MAX_SIZE', 100000))
+TRANSFORMER_JOB_CHUNK_SIZE = int(os.environ.get('TRANSFORMER_JOB_CHUNK_SIZE', 500))
+TRANSFORMER_JOB_LEASE_SECONDS = int(os.environ.get('TRANSFORMER_JOB_LEASE_SECONDS', 300))
+# Cache the results of single-record transforms by template version and input hash, in process (at most
+# TRANSFORMER_RESULT_CACHE_SIZE results for TRANSFORMER_RESULT_CACHE_TTL seconds) and, when set, in the named
+# Django cache backend shared by all processes
+TRANSFORMER_RESULT_CACHE = os.environ.get('TRANSFORMER_RESULT_CACHE', 'false').lower() == 'true'
+TRANSFORMER_RESULT_CACHE_SIZE = int(os.environ.get('TRANSFORMER_RESULT_CACHE_SIZE', 10000))
+TRANSFORMER_RESULT_CACHE_TTL = int(os.environ.get('TRANSFORMER_RESULT_CACHE_TTL', 300))
+TRANSFORMER_RESULT_CACHE_BACKEND = os.environ.get('TRANSFORMER_RESULT_CACHE_BACKEND', '')
+
+
+# Logging
+# Transform traces requested with ?trace=log are written by the 'transformer.trace' logger
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'transformer': {
+            'handlers': ['console'],
+            'level': os.environ.get('TRANSFORMER_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
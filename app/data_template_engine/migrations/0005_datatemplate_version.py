@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2024-10-01 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_template_engine', '0004_fieldmapping_parent_mapping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datatemplate',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -3,8 +3,16 @@ from attribute_library.models import Field
 
 class DataTemplate(models.Model):
     name = models.CharField(max_length=255)
+    # Bumped whenever the template or anything its compiled plan depends on changes
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Moves together with the version; used as Last-Modified for conditional GETs
+    updated_at = models.DateTimeField(auto_now=True)
 
 class FieldMapping(models.Model):
     template = models.ForeignKey(DataTemplate, on_delete=models.CASCADE, related_name='mappings')
     source_field = models.ForeignKey(Field, on_delete=models.CASCADE, related_name='source_mappings')
     destination_field = models.ForeignKey(Field, on_delete=models.CASCADE, related_name='destination_mappings')
+    # A mapping with child mappings iterates the list found at its source path and applies
+    # the children, with paths relative to each element, to build the list at its destination
+    parent_mapping = models.ForeignKey('self', blank=True, null=True, on_delete=models.CASCADE, related_name='mappings',
+                                       help_text='Self-reference for nested mappings')
@@ -1,19 +1,295 @@
+import logging
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from config.api import DynamicFieldsMixin
 from .models import DataTemplate, FieldMapping
-from attribute_library.models import Field
+from attribute_library.registry import get_fields, invalidate_field
 from rest_framework.exceptions import ValidationError 
 
+logger = logging.getLogger(__name__)
+
 class FieldMappingSerializer(serializers.ModelSerializer):
     """
     This serializer handles the serialization and deserialization of FieldMapping objects.
     FieldMapping represents the connection between a source field and a destination field.
+
+    A mapping may carry nested 'mappings'. The parent's source field then points to a list in the input
+    (e.g. 'candidate.employments') and its children, with paths relative to each list element, build
+    every element of the list at the parent's destination field. The key is omitted for mappings
+    without children.
     """
+    # Updates match the mapping with this id; without it, the first unmatched one with the same source field.
+    # Ignored when creating a template.
+    id = serializers.IntegerField(required=False)
+    # Plain ids: their existence is checked for all mappings at once by validate_field_ids,
+    # instead of one lookup per id as a PrimaryKeyRelatedField would do
+    source_field = serializers.IntegerField()
+    destination_field = serializers.IntegerField()
+    # Partial updates only: remove the matched stored mapping (and its nested mappings)
+    delete = serializers.BooleanField(required=False, write_only=True)
+
     class Meta:
         model = FieldMapping
-        fields = ['source_field', 'destination_field']
+        fields = ['id', 'source_field', 'destination_field', 'delete']
+
+    def validate(self, attrs):
+        # Partial updates match mappings by id or by source field, so one of them is needed even when
+        # everything else is optional
+        if 'id' not in attrs and 'source_field' not in attrs:
+            raise ValidationError({'source_field': ['This field is required.']})
+        return attrs
+
+    def get_fields(self):
+        # Declared here rather than on the class because the serializer refers to itself
+        fields = super().get_fields()
+        fields['mappings'] = FieldMappingSerializer(many=True, required=False)
+        return fields
+
+    def to_representation(self, instance):
+        """
+        Represent a mapping and its children.
+
+        The parent serializer can pass {parent_mapping_id: [child mappings]} as context['children_by_parent']
+        so the whole mapping tree is rendered from a single query instead of one query per mapping.
+        """
+        children_by_parent = self.context.get('children_by_parent')
+        if children_by_parent is None:
+            children = list(instance.mappings.order_by('pk'))
+        else:
+            children = children_by_parent.get(instance.pk, [])
+        data = {
+            'id': instance.pk,
+            'source_field': instance.source_field_id,
+            'destination_field': instance.destination_field_id,
+        }
+        if children:
+            data['mappings'] = [self.to_representation(child) for child in children]
+        return data
+
+
+def _iter_mappings_data(mappings_data):
+    # Every mapping of a validated mapping tree, nested ones included
+    for mapping_data in mappings_data:
+        yield mapping_data
+        yield from _iter_mappings_data(mapping_data.get('mappings', []))
+
+
+def _referenced_field_ids(templates_data):
+    field_ids = set()
+    for template_data in templates_data:
+        for mapping_data in _iter_mappings_data(template_data.get('mappings', [])):
+            field_ids.add(mapping_data.get('source_field'))
+            field_ids.add(mapping_data.get('destination_field'))
+    field_ids.discard(None)
+    return field_ids
+
+
+def validate_field_ids(templates_data):
+    """
+    Check that every Field referenced by the mappings of one or more templates exists.
+    Known fields come from the process-local Field registry; the others are read with a single query.
+
+    Arguments:
+    - templates_data: Validated template data, each with a 'mappings' list (nested mappings included).
+
+    Raises:
+    - ValidationError: Listing every referenced Field id that does not exist.
+    """
+    field_ids = _referenced_field_ids(templates_data)
+    if not field_ids:
+        return
+    missing = field_ids.difference(get_fields(field_ids))
+    if missing:
+        raise ValidationError({
+            'mappings': [f'Invalid pk "{field_id}" - object does not exist.' for field_id in sorted(missing)]
+        })
+
+
+def recheck_field_ids(templates_data):
+    """
+    Check the referenced Field ids again, against the database, after writing mappings failed.
+
+    The registry of this process may still hold a Field that another process deleted (for at most
+    FIELD_REGISTRY_TTL seconds), or the Field may have been deleted between validation and the write. The
+    referenced ids are dropped from the registry and read again, so such a Field is reported as an invalid id
+    like any other instead of as a foreign key failure.
+
+    Raises:
+    - ValidationError: Listing every referenced Field id that does not exist. Nothing is raised when they all
+      exist, and the caller re-raises its original error.
+    """
+    for field_id in _referenced_field_ids(templates_data):
+        invalidate_field(field_id)
+    validate_field_ids(templates_data)
+
+
+def create_mappings(templates_mappings):
+    """
+    Bulk-create the mapping trees of one or more templates.
+
+    Arguments:
+    - templates_mappings: (template, mappings_data) pairs. The templates must already be saved.
+
+    Steps:
+    1. All top-level mappings of all templates are inserted with one bulk_create.
+    2. Their children are then inserted with one bulk_create per nesting level, now that the parents have ids.
+
+    The number of queries therefore depends on the nesting depth only, not on the number of mappings.
+    """
+    level = [(template, None, mappings_data) for template, mappings_data in templates_mappings]
+    while level:
+        mappings = []
+        next_level = []
+        for template, parent_mapping, mappings_data in level:
+            for mapping_data in mappings_data:
+                mapping = FieldMapping(
+                    template=template,
+                    parent_mapping=parent_mapping,
+                    source_field_id=mapping_data['source_field'],
+                    destination_field_id=mapping_data['destination_field'],
+                )
+                mappings.append(mapping)
+                if mapping_data.get('mappings'):
+                    next_level.append((template, mapping, mapping_data['mappings']))
+        FieldMapping.objects.bulk_create(mappings, batch_size=1000)
+        level = next_level
+
+
+def sync_mappings(template, mappings_data, partial=False):
+    """
+    Bring the stored mappings of a template in line with the validated mapping data.
+
+    Arguments:
+    - template: The DataTemplate whose mappings are updated.
+    - mappings_data: The desired mappings, nested mappings included.
+    - partial: False to replace the whole mapping set, True to only add, change or delete the mappings sent.
+
+    Steps:
+    1. The stored mappings are loaded with one query and grouped by parent mapping.
+    2. Level by level, each desired mapping is matched to a stored mapping with the same parent: the one with
+       its id when an id is sent, otherwise the first one, in storage order, with the same source field that
+       no other desired mapping matched. A source field may feed several destinations, so clients that
+       change or delete one of them send its id.
+       - a match whose source or destination field changed is updated,
+       - a mapping without a match is created,
+       - a match flagged with "delete" (partial only) is deleted,
+       - stored mappings that were not matched are deleted (full updates only).
+    3. New mappings are inserted with one bulk_create per level, changed ones with one bulk_update and
+       removed ones with one delete, which also removes their nested mappings.
+
+    Raises:
+    - ValidationError: An id that is not a mapping under the same parent, or a partial update that deletes a
+      mapping that does not exist or adds one without a source or destination field.
+    """
+    children_by_parent = {}
+    for mapping in FieldMapping.objects.filter(template=template).order_by('pk'):
+        children_by_parent.setdefault(mapping.parent_mapping_id, []).append(mapping)
 
+    to_update = []
+    to_delete = []
+    level = [(None, mappings_data)]
+    while level:
+        to_create = []
+        next_level = []
+        for parent_mapping, level_data in level:
+            unmatched = {
+                mapping.pk: mapping
+                for mapping in children_by_parent.get(parent_mapping.pk if parent_mapping else None, [])
+            }
+            # Mappings sent with an id claim their rows first, so the source field fallback cannot take them
+            matches = []
+            for mapping_data in level_data:
+                mapping = None
+                if 'id' in mapping_data:
+                    mapping = unmatched.pop(mapping_data['id'], None)
+                    if mapping is None:
+                        raise ValidationError({'mappings': [f"No mapping with id {mapping_data['id']}."]})
+                matches.append(mapping)
+            stored = {}
+            for mapping in unmatched.values():
+                stored.setdefault(mapping.source_field_id, []).append(mapping)
 
-class DataTemplateSerializer(serializers.ModelSerializer):
+            for mapping_data, mapping in zip(level_data, matches):
+                if 'id' not in mapping_data:
+                    candidates = stored.get(mapping_data['source_field'])
+                    mapping = candidates.pop(0) if candidates else None
+
+                if mapping_data.get('delete'):
+                    if mapping is None:
+                        raise ValidationError({
+                            'mappings': [f"No mapping with source field {mapping_data['source_field']} to delete."]
+                        })
+                    to_delete.append(mapping.pk)
+                    continue
+
+                if mapping is None:
+                    if 'destination_field' not in mapping_data:
+                        raise ValidationError({
+                            'mappings': [f"New mapping for source field {mapping_data['source_field']} "
+                                         f"needs a destination field."]
+                        })
+                    mapping = FieldMapping(
+                        template=template,
+                        parent_mapping=parent_mapping,
+                        source_field_id=mapping_data['source_field'],
+                        destination_field_id=mapping_data['destination_field'],
+                    )
+                    to_create.append(mapping)
+                else:
+                    source_field_id = mapping_data.get('source_field', mapping.source_field_id)
+                    destination_field_id = mapping_data.get('destination_field', mapping.destination_field_id)
+                    if (source_field_id, destination_field_id) != (mapping.source_field_id,
+                                                                   mapping.destination_field_id):
+                        mapping.source_field_id = source_field_id
+                        mapping.destination_field_id = destination_field_id
+                        to_update.append(mapping)
+
+                # Without nested mappings in a full update, the mapping's stored children are removed
+                if 'mappings' in mapping_data or not partial:
+                    next_level.append((mapping, mapping_data.get('mappings', [])))
+
+            if not partial:
+                # Whatever is left was not matched by any desired mapping
+                to_delete.extend(mapping.pk for mappings in stored.values() for mapping in mappings)
+
+        FieldMapping.objects.bulk_create(to_create, batch_size=1000)
+        level = next_level
+
+    if to_update:
+        FieldMapping.objects.bulk_update(to_update, ['source_field', 'destination_field'], batch_size=1000)
+    if to_delete:
+        FieldMapping.objects.filter(pk__in=to_delete).delete()
+    logger.debug("Synced mappings of template %s: %s updated, %s deleted", template.pk, len(to_update), len(to_delete))
+
+
+class DataTemplateListSerializer(serializers.ListSerializer):
+    """
+    Handles many DataTemplates at once, for the bulk import endpoint.
+    Field ids are validated with one query and templates and mappings are bulk-created in one transaction.
+    """
+
+    def validate(self, attrs):
+        validate_field_ids(attrs)
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                templates = DataTemplate.objects.bulk_create(
+                    [DataTemplate(name=template_data['name']) for template_data in validated_data]
+                )
+                create_mappings(
+                    (template, template_data['mappings'])
+                    for template, template_data in zip(templates, validated_data)
+                )
+        except IntegrityError:
+            recheck_field_ids(validated_data)
+            raise
+        return templates
+
+
+class DataTemplateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     This serializer handles the serialization and deserialization of DataTemplate objects.
     A DataTemplate contains a name and multiple field mappings, which tell us how to map fields
@@ -24,6 +300,41 @@ class DataTemplateSerializer(serializers.ModelSerializer):
     class Meta:
         model = DataTemplate
         fields = ['id', 'name', 'mappings']
+        list_serializer_class = DataTemplateListSerializer
+
+    def validate(self, attrs):
+        # As part of a bulk import, the list serializer checks the field ids of all templates together
+        if not isinstance(self.parent, serializers.ListSerializer):
+            validate_field_ids([attrs])
+        if not self.partial and any(
+                mapping_data.get('delete') for mapping_data in _iter_mappings_data(attrs.get('mappings', []))):
+            raise ValidationError({'mappings': ['"delete" is only supported in partial updates.']})
+        return attrs
+
+    def to_representation(self, instance):
+        """
+        Represent the template with its top-level mappings, children nested under their parents.
+        All mappings are read with one query (or none when they were prefetched).
+        Only the fields kept by a 'fields' projection are returned; without 'mappings' none are read.
+        """
+        data = {}
+        if 'id' in self.fields:
+            data['id'] = instance.id
+        if 'name' in self.fields:
+            data['name'] = instance.name
+        if 'mappings' not in self.fields:
+            return data
+
+        roots = []
+        children_by_parent = {}
+        for mapping in sorted(instance.mappings.all(), key=lambda mapping: mapping.pk):
+            if mapping.parent_mapping_id is None:
+                roots.append(mapping)
+            else:
+                children_by_parent.setdefault(mapping.parent_mapping_id, []).append(mapping)
+        mapping_serializer = FieldMappingSerializer(context={**self.context, 'children_by_parent': children_by_parent})
+        data['mappings'] = [mapping_serializer.to_representation(mapping) for mapping in roots]
+        return data
 
     def create(self, validated_data):
         """
@@ -35,16 +346,25 @@ class DataTemplateSerializer(serializers.ModelSerializer):
         Steps:
         1. We extract the 'mappings' from the validated data, which includes how fields should be mapped.
         2. A new DataTemplate is created using the remaining validated data.
-        3. We loop through each mapping (source field -> destination field) and create FieldMapping objects for each.
+        3. The mappings (source field -> destination field) are bulk-created, one query per nesting level.
         4. Finally, we return the created template with its mappings.
 
+        Everything runs in one transaction, so a failure never leaves a partial template behind.
+
         Returns:
         - The created DataTemplate object.
+
+        Raises:
+        - ValidationError: A referenced Field was deleted since it was validated (see recheck_field_ids).
         """
         mappings_data = validated_data.pop('mappings')
-        template = DataTemplate.objects.create(**validated_data)
-        for mapping_data in mappings_data:
-            FieldMapping.objects.create(template=template, **mapping_data)
+        try:
+            with transaction.atomic():
+                template = DataTemplate.objects.create(**validated_data)
+                create_mappings([(template, mappings_data)])
+        except IntegrityError:
+            recheck_field_ids([{'mappings': mappings_data}])
+            raise
         return template
 
     def update(self, instance, validated_data):
@@ -57,62 +377,31 @@ class DataTemplateSerializer(serializers.ModelSerializer):
 
         Steps:
         1. We extract the 'mappings' if they are provided in the validated data.
-        2. The DataTemplate's 'name' is updated (if provided).
-        3. If 'mappings' are provided:
-           a. We go through each mapping and update the source and destination fields.
-           b. For each mapping, we first check if the fields (source and destination) exist in the database.
-           c. We then update the existing field mappings of the template or raise an error if no existing mapping is found.
-        4. If any field does not exist or other issues arise, we raise a validation error.
+        2. If 'mappings' are provided, they are diffed against the stored mappings (see sync_mappings) and
+           only the differences are written, with bulk_create, bulk_update and a single delete.
+        3. The DataTemplate's 'name' is updated (if provided) and the template is saved, which bumps its
+           version so cached compiled plans of the template are rebuilt.
+
+        Everything runs in one transaction. For a partial update (PATCH) only the mappings sent are touched.
 
         Returns:
         - The updated DataTemplate object.
+
+        Raises:
+        - ValidationError: A mapping change is invalid (see sync_mappings), or a referenced Field was deleted
+          since it was validated (see recheck_field_ids).
         """
         mappings_data = validated_data.pop('mappings', None)
 
-        # Update the DataTemplate instance fields
-        instance.name = validated_data.get('name', instance.name)
-        instance.save()
-
-        if mappings_data:
-            for mapping_data in mappings_data:
-                new_source_field_id = mapping_data.get('source_field').id
-                new_destination_field_id = mapping_data.get('destination_field').id
-
-                print(f"Updating to Source Field ID: {new_source_field_id}, Destination Field ID: {new_destination_field_id}", flush=True)
-
-                try:
-                    # Check if the new source and destination fields exist
-                    new_source_field = Field.objects.get(id=new_source_field_id)
-                    new_destination_field = Field.objects.get(id=new_destination_field_id)
-
-                    # Fetch the current mapping based on the template and the current source field from the DB
-                    existing_mapping = FieldMapping.objects.filter(template=instance).first()
-
-                    if existing_mapping:
-                        # Log the current fields before updating
-                        print(f"Current Source Field: {existing_mapping.source_field.id}, Current Destination Field: {existing_mapping.destination_field.id}", flush=True)
-
-                        # Update the existing mapping with new fields
-                        existing_mapping.source_field = new_source_field
-                        existing_mapping.destination_field = new_destination_field
-                        existing_mapping.save()
-
-                        print(f"Updated mapping: Source Field updated to {new_source_field_id}, Destination Field updated to {new_destination_field_id}", flush=True)
-                    else:
-                        raise ValidationError({
-                            'detail': f"No existing mapping found for template ID {instance.id}."
-                        })
-
-                except Field.DoesNotExist:
-                    # Raise an error if the new source or destination field doesn't exist
-                    raise ValidationError({
-                        'detail': f"Field with ID {new_source_field_id} or {new_destination_field_id} does not exist."
-                    })
-
-                except Exception as e:
-                    # Handle any unexpected exceptions
-                    raise ValidationError({
-                        'detail': f"An unexpected error occurred: {str(e)}"
-                    })
+        try:
+            with transaction.atomic():
+                if mappings_data is not None:
+                    sync_mappings(instance, mappings_data, partial=self.partial)
+                instance.name = validated_data.get('name', instance.name)
+                instance.save()
+        except IntegrityError:
+            recheck_field_ids([{'mappings': mappings_data or []}])
+            raise
 
         return instance
+
@@ -1,3 +1,317 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from attribute_library.models import Field
+from attribute_library.registry import clear_field_registry, get_fields
+from .models import DataTemplate, FieldMapping
+from .serializers import DataTemplateSerializer
+
+
+class FieldsTestCase(TestCase):
+    """
+    Base test case providing twenty fields and a helper to build mapping data from them.
+    """
+    def setUp(self):
+        clear_field_registry()
+        self.fields = Field.objects.bulk_create(
+            Field(name=f'field_{i}', visible_name=f'Field {i}', data_type='String') for i in range(20)
+        )
+
+    def mappings_data(self, count):
+        return [
+            {'source_field': self.fields[i % 10].pk, 'destination_field': self.fields[10 + i % 10].pk}
+            for i in range(count)
+        ]
+
+    def without_ids(self, mappings):
+        # Mapping output as sent when the template was written, without the ids given to the stored rows
+        return [
+            {key: self.without_ids(value) if key == 'mappings' else value
+             for key, value in mapping.items() if key != 'id'}
+            for mapping in mappings
+        ]
+
+
+class TemplateCreateTestCase(FieldsTestCase):
+    def test_create_queries_do_not_grow_with_mappings(self):
+        data = {'name': 'Large Template', 'mappings': self.mappings_data(200)}
+        data['mappings'][0]['mappings'] = self.mappings_data(5)
+        serializer = DataTemplateSerializer(data=data)
+        # Field id check, savepoint, template insert, one mapping insert per nesting level, release
+        with self.assertNumQueries(6):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            template = serializer.save()
+        self.assertEqual(template.mappings.count(), 205)
+        self.assertEqual(template.mappings.filter(parent_mapping__isnull=True).count(), 200)
+
+    def test_unknown_field_is_rejected_before_anything_is_created(self):
+        data = {'name': 'Broken Template', 'mappings': self.mappings_data(3)}
+        data['mappings'][1]['mappings'] = [{'source_field': 999999, 'destination_field': self.fields[0].pk}]
+        serializer = DataTemplateSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('Invalid pk "999999"', str(serializer.errors))
+        self.assertFalse(DataTemplate.objects.exists())
+
+    def test_known_fields_are_validated_from_the_registry(self):
+        data = {'name': 'Template', 'mappings': self.mappings_data(3)}
+        DataTemplateSerializer(data=data).is_valid(raise_exception=True)
+        with self.assertNumQueries(0):
+            DataTemplateSerializer(data=data).is_valid(raise_exception=True)
+
+    def test_bulk_import(self):
+        payload = [
+            {'name': 'Template A', 'mappings': self.mappings_data(3)},
+            {'name': 'Template B', 'mappings': self.mappings_data(2)},
+        ]
+        response = self.client.post('/api/templates/bulk/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([template['name'] for template in response.json()], ['Template A', 'Template B'])
+        self.assertEqual(FieldMapping.objects.count(), 5)
+        self.assertEqual(self.without_ids(response.json()[1]['mappings']), self.mappings_data(2))
+
+    def test_bulk_import_is_all_or_nothing(self):
+        payload = [
+            {'name': 'Template A', 'mappings': self.mappings_data(3)},
+            {'name': 'Template B', 'mappings': [{'source_field': 999999, 'destination_field': self.fields[0].pk}]},
+        ]
+        response = self.client.post('/api/templates/bulk/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DataTemplate.objects.exists())
+        self.assertFalse(FieldMapping.objects.exists())
+
+
+class TemplateUpdateTestCase(FieldsTestCase):
+    def setUp(self):
+        super().setUp()
+        serializer = DataTemplateSerializer(data={'name': 'Template', 'mappings': [
+            {'source_field': self.fields[0].pk, 'destination_field': self.fields[10].pk},
+            {'source_field': self.fields[1].pk, 'destination_field': self.fields[11].pk, 'mappings': [
+                {'source_field': self.fields[2].pk, 'destination_field': self.fields[12].pk},
+            ]},
+            {'source_field': self.fields[3].pk, 'destination_field': self.fields[13].pk},
+        ]})
+        serializer.is_valid(raise_exception=True)
+        self.template = serializer.save()
+        self.url = f'/api/templates/{self.template.pk}/'
+
+    def mapping(self, source, destination, **extra):
+        return dict(source_field=self.fields[source].pk, destination_field=self.fields[destination].pk, **extra)
+
+    def test_put_diffs_the_mapping_set(self):
+        kept = FieldMapping.objects.get(template=self.template, source_field=self.fields[0])
+        version = DataTemplate.objects.get(pk=self.template.pk).version
+        payload = {'name': 'Template', 'mappings': [
+            self.mapping(0, 10),
+            self.mapping(1, 14),
+            self.mapping(5, 15),
+        ]}
+        response = self.client.put(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.without_ids(response.json()['mappings']), payload['mappings'])
+        # The unchanged mapping keeps its row, the removed and nested ones are gone
+        self.assertTrue(FieldMapping.objects.filter(pk=kept.pk).exists())
+        self.assertEqual(FieldMapping.objects.filter(template=self.template).count(), 3)
+        self.assertGreater(DataTemplate.objects.get(pk=self.template.pk).version, version)
+
+    def test_patch_only_touches_the_mappings_sent(self):
+        payload = {'mappings': [
+            {'source_field': self.fields[1].pk, 'mappings': [self.mapping(2, 16), self.mapping(4, 17)]},
+            {'source_field': self.fields[3].pk, 'delete': True},
+            self.mapping(6, 18),
+        ]}
+        response = self.client.patch(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['name'], 'Template')
+        self.assertEqual(self.without_ids(response.json()['mappings']), [
+            self.mapping(0, 10),
+            self.mapping(1, 11, mappings=[self.mapping(2, 16), self.mapping(4, 17)]),
+            self.mapping(6, 18),
+        ])
+
+    def test_patch_rolls_back_on_error(self):
+        payload = {'mappings': [self.mapping(0, 19), {'source_field': self.fields[9].pk, 'delete': True}]}
+        response = self.client.patch(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(FieldMapping.objects.filter(source_field=self.fields[0], destination_field=self.fields[10]).exists())
+
+    def add_duplicate(self):
+        # The first source field also feeds a second destination
+        FieldMapping.objects.create(
+            template=self.template, source_field=self.fields[0], destination_field=self.fields[14]
+        )
+        return FieldMapping.objects.filter(template=self.template, source_field=self.fields[0]).order_by('pk')
+
+    def test_duplicate_source_fields_are_matched_by_id(self):
+        first, second = self.add_duplicate()
+        mappings = self.client.get(self.url).json()['mappings']
+        self.assertEqual([mapping['id'] for mapping in mappings if mapping['source_field'] == self.fields[0].pk],
+                         [first.pk, second.pk])
+
+        payload = {'mappings': [{'id': second.pk, 'destination_field': self.fields[15].pk}]}
+        response = self.client.patch(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.destination_field, second.destination_field), (self.fields[10], self.fields[15]))
+
+        response = self.client.patch(self.url, {'mappings': [{'id': second.pk, 'delete': True}]},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(FieldMapping.objects.filter(pk=second.pk).exists())
+        self.assertTrue(FieldMapping.objects.filter(pk=first.pk).exists())
+
+    def test_put_matches_reordered_duplicates_by_id(self):
+        first, second = self.add_duplicate()
+        payload = {'name': 'Template', 'mappings': [
+            self.mapping(0, 14, id=second.pk),
+            self.mapping(0, 15, id=first.pk),
+        ]}
+        response = self.client.put(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        # Only the first mapping changed; the second kept its row and destination
+        self.assertEqual((first.destination_field, second.destination_field), (self.fields[15], self.fields[14]))
+        self.assertEqual(FieldMapping.objects.filter(template=self.template).count(), 2)
+
+    def test_unknown_mapping_id(self):
+        other = FieldMapping.objects.create(
+            template=DataTemplate.objects.create(name='Other'),
+            source_field=self.fields[0], destination_field=self.fields[10],
+        )
+        payload = {'mappings': [{'id': other.pk, 'destination_field': self.fields[15].pk}]}
+        response = self.client.patch(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        other.refresh_from_db()
+        self.assertEqual(other.destination_field, self.fields[10])
+
+    def test_delete_flag_requires_partial_update(self):
+        payload = {'name': 'Template', 'mappings': [self.mapping(0, 10, delete=True)]}
+        response = self.client.put(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_put_queries_do_not_grow_with_mappings(self):
+        def put_queries(count):
+            clear_field_registry()
+            FieldMapping.objects.bulk_create(
+                FieldMapping(template=self.template, source_field_id=mapping['source_field'],
+                             destination_field_id=mapping['destination_field'])
+                for mapping in self.mappings_data(count)
+            )
+            payload = {'name': 'Template', 'mappings': [self.mapping(7, 17)]}
+            with CaptureQueriesContext(connection) as queries:
+                self.client.put(self.url, payload, content_type='application/json')
+            return len(queries)
+
+        self.assertEqual(put_queries(20), put_queries(200))
+
+
+@override_settings(API_PAGE_SIZE=5)
+class TemplateListTestCase(FieldsTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(12):
+            serializer = DataTemplateSerializer(data={'name': f'Template {i}', 'mappings': self.mappings_data(3)})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    def test_pages_prefetch_mappings(self):
+        names = []
+        url = '/api/templates/'
+        while url:
+            # One query for the page of templates, one for all their mappings
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            names.extend(template['name'] for template in response.json()['results'])
+            url = response.json()['next']
+        self.assertEqual(names, [f'Template {i}' for i in range(12)])
+        self.assertEqual(self.without_ids(response.json()['results'][0]['mappings']), self.mappings_data(3))
+
+    def test_projection_without_mappings_reads_no_mappings(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/templates/?fields=name')
+        self.assertEqual(response.json()['results'][0], {'name': 'Template 0'})
+
+
+class TemplateConditionalGetTestCase(FieldsTestCase):
+    def setUp(self):
+        super().setUp()
+        serializer = DataTemplateSerializer(data={'name': 'Template', 'mappings': self.mappings_data(3)})
+        serializer.is_valid(raise_exception=True)
+        self.template = serializer.save()
+        self.url = f'/api/templates/{self.template.pk}/'
+
+    def test_unchanged_template_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        # Only the template row is read, the mappings are not serialized
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_field_change_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        field = self.fields[10]
+        field.visible_name = 'Renamed'
+        field.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag(self):
+        etag = self.client.get('/api/templates/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/templates/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.patch(self.url, {'name': 'Renamed'}, content_type='application/json')
+        self.assertEqual(self.client.get('/api/templates/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_ignores_if_modified_since_after_delete(self):
+        other = DataTemplate.objects.create(name='Other')
+        response = self.client.get('/api/templates/')
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        last_modified = self.client.get(self.url)['Last-Modified']
+        other.delete()
+        self.assertEqual(self.client.get('/api/templates/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        self.assertEqual(self.client.get('/api/templates/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class StaleFieldRegistryTestCase(TransactionTestCase):
+    """
+    Foreign keys are only checked when the transaction commits, so these tests commit for real.
+    """
+    def setUp(self):
+        clear_field_registry()
+        self.source, self.destination = Field.objects.bulk_create(
+            Field(name=f'field_{i}', visible_name=f'Field {i}', data_type='String') for i in range(2)
+        )
+        get_fields([self.source.pk, self.destination.pk])
+        # Another process deletes the destination field: this process's registry still holds it
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Field._meta.db_table} WHERE id = %s', [self.destination.pk])
+
+    def test_create_reports_deleted_field(self):
+        data = {'name': 'Template',
+                'mappings': [{'source_field': self.source.pk, 'destination_field': self.destination.pk}]}
+        response = self.client.post('/api/templates/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'mappings': [f'Invalid pk "{self.destination.pk}" - object does not exist.']
+        })
+        self.assertFalse(DataTemplate.objects.exists())
+
+    def test_bulk_create_reports_deleted_field(self):
+        data = [{'name': 'Template',
+                 'mappings': [{'source_field': self.source.pk, 'destination_field': self.destination.pk}]}]
+        response = self.client.post('/api/templates/bulk/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'Invalid pk "{self.destination.pk}"', str(response.json()))
+        self.assertFalse(DataTemplate.objects.exists())
@@ -4,13 +4,15 @@ from rest_framework.views import APIView
 from .models import DataTemplate, FieldMapping, Field
 from .serializers import DataTemplateSerializer, FieldMappingSerializer
 from rest_framework.exceptions import ValidationError 
+from django.db.models import prefetch_related_objects
+from config.api import KeysetPagination, get_projection, make_etag, not_modified, set_validators
 
 class DataTemplateListCreateAPIView(APIView):
     """
     API View to handle the retrieval and creation of Data Templates in the Data Template Engine.
 
     *** GET Method ***
-    Retrieve a list of all Data Templates stored in the database.
+    Retrieve a page of the Data Templates stored in the database.
 
     *** POST Method ***
     Create a new Data Template along with its field mappings.
@@ -20,42 +22,67 @@ class DataTemplateListCreateAPIView(APIView):
         HTTP Method: GET
 
         Purpose:
-            Retrieve all Data Templates from the database.
-            Fetches a list of all templates in the DataTemplate table of the database.
+            Retrieve the Data Templates from the database, one page at a time.
+            Templates are ordered by id and paginated with a cursor, so every page costs the same however many
+            templates exist (see config.api.KeysetPagination). The mappings of all templates on the page are
+            read with a single prefetch query.
+
+        Query Parameters:
+            - limit (int, optional): Number of templates per page (default 100, at most 1000).
+            - cursor (str, optional): Position of the page, taken from the 'next' or 'previous' link.
+            - fields (str, optional): Comma separated fields to return out of id, name and mappings,
+              e.g. '?fields=id,name' lists the templates without reading any mapping.
+
+        Conditional Requests:
+            The response carries an ETag computed from the ids and versions of the templates on the page.
+            A request with a matching If-None-Match gets an empty 304 Not Modified, before any mapping is read.
+            Pages have no Last-Modified and If-Modified-Since is ignored: deleting a template, or an older
+            template moving onto the page, changes the page without making any of its stamps newer.
 
         Returns:
-            - 200 OK: A JSON response containing the list of data templates and their associated mappings.
+            - 200 OK: A JSON response containing one page of data templates and their associated mappings.
+            - 304 Not Modified: The page has not changed since the client's copy.
             - 400 Bad Request: A JSON response with an error message if something goes wrong.
 
         Return Data on Success:
-                [
-                    {
-                        "id": 1,
-                        "name": "Template 1",
-                        "mappings": [
-                            {
-                                "id": 1,
-                                "source_field": {
+                {
+                    "next": "http://localhost:8000/api/templates/?cursor=cD0x",
+                    "previous": null,
+                    "results": [
+                        {
+                            "id": 1,
+                            "name": "Template 1",
+                            "mappings": [
+                                {
                                     "id": 1,
-                                    "name": "Field 1",
-                                    "visible_name": "Field One",
-                                    "data_type": "String"
-                                },
-                                "destination_field": {
-                                    "id": 2,
-                                    "name": "Field 2",
-                                    "visible_name": "Field Two",
-                                    "data_type": "String"
+                                    "source_field": 1,
+                                    "destination_field": 2
                                 }
-                            }
-                        ]
-                    }
-                ]
+                            ]
+                        }
+                    ]
+                }
         """
         try:
-            templates = DataTemplate.objects.all()
-            serializer = DataTemplateSerializer(templates, many=True)
-            return Response(serializer.data)
+            projection = get_projection(request, DataTemplateSerializer().fields)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(DataTemplate.objects.all(), request, view=self)
+
+            # The version of a template moves with any change to it, its mappings or their fields
+            etag = make_etag(
+                request.get_full_path(), paginator.has_next, paginator.has_previous,
+                [(template.pk, template.version) for template in page],
+            )
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            if projection is None or 'mappings' in projection:
+                prefetch_related_objects(page, 'mappings')
+            serializer = DataTemplateSerializer(page, many=True, fields=projection)
+            return set_validators(paginator.get_paginated_response(serializer.data), etag)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response ({"data": str(e),
                              "message": "Something Went Wrong",
@@ -79,6 +106,13 @@ class DataTemplateListCreateAPIView(APIView):
                     {
                         "source_field": 1,  # The ID of the source field
                         "destination_field": 2  # The ID of the destination field
+                    },
+                    {
+                        "source_field": 3,  # A list in the input, e.g. 'candidate.employments'
+                        "destination_field": 4,
+                        "mappings": [  # Optional nested mappings, applied to every element of the list
+                            {"source_field": 5, "destination_field": 6}
+                        ]
                     }
                 ]
             }
@@ -105,6 +139,7 @@ class DataTemplateListCreateAPIView(APIView):
             "name": "Candidate Template 2",
             "mappings": [
                 {
+                    "id": 3,
                     "source_field": 1,
                     "destination_field": 1
                 }
@@ -129,7 +164,10 @@ class DataTemplateListCreateAPIView(APIView):
             
             # If validation fails, return the errors with a 400 status
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        except ValidationError as e:
+            # A referenced field was deleted by another process after validation
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # Handle any unexpected exceptions that might occur
             return Response(
@@ -141,6 +179,63 @@ class DataTemplateListCreateAPIView(APIView):
             )
 
 
+class DataTemplateBulkCreateAPIView(APIView):
+    """
+    API View to import many Data Templates in one request.
+
+    *** POST Method ***
+    Create a list of Data Templates along with their field mappings, all or nothing.
+    """
+    def post(self, request):
+        """
+        HTTP Method: POST
+
+        Purpose:
+            Import many Data Templates at once.
+            The field ids of all templates are validated with a single query, and the templates and their
+            mappings are bulk-created in one transaction: either every template is created or none is.
+
+        Input:
+            A JSON array of templates, each in the format accepted by POST /api/templates/:
+            [
+                {
+                    "name": "Template 1",
+                    "mappings": [
+                        {"source_field": 1, "destination_field": 2}
+                    ]
+                },
+                {
+                    "name": "Template 2",
+                    "mappings": [
+                        {"source_field": 3, "destination_field": 4}
+                    ]
+                }
+            ]
+
+        Returns:
+            - 201 Created: A JSON array with the created data templates and their mappings, in input order.
+            - 400 Bad Request: The validation errors, or an error message if something goes wrong.
+              Nothing is created in either case.
+        """
+        try:
+            serializer = DataTemplateSerializer(data=request.data, many=True)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {
+                    "data": str(e),
+                    "message": "Something Went Wrong",
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
 class DataTemplateRetrieveUpdateAPIView(APIView):
     """
     API View to retrieve or update a Data Template instance.
@@ -150,8 +245,11 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
         - Returns 404 if not found.
     
     PUT Method:
-        - Updates the Data Template and its associated mappings.
-        - Raises an error if a mapping does not exist instead of creating new mappings.
+        - Replaces the Data Template and its associated mappings.
+        - Only the differences with the stored mappings are written.
+
+    PATCH Method:
+        - Partially updates the Data Template: only the mappings sent are added, changed or deleted.
     """
     def get(self, request, pk):
         """
@@ -160,8 +258,15 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
         Purpose:
             To retrieve the DataTemplate instance by its primary key.
             
+        Conditional Requests:
+            The response carries an ETag derived from the template version, which is bumped by any change to
+            the template, its mappings or their fields, and a Last-Modified header. A request with a matching
+            If-None-Match (or an If-Modified-Since that is not older) gets an empty 304 Not Modified without
+            reading the mappings.
+
         Returns:
             - 200 OK: JSON response containing the template data if it exists.
+            - 304 Not Modified: The template has not changed since the client's copy.
             - 400 Bad Request: If the provided data is invalid or any mapping does not exist.
 
         Example Response:
@@ -170,6 +275,7 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
                 "name": "Candidate Template",
                 "mappings": [
                     {
+                        "id": 1,
                         "source_field": 1,
                         "destination_field": 1
                     }
@@ -180,8 +286,14 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
             template = DataTemplate.objects.get(pk=pk)
         except DataTemplate.DoesNotExist:
             return Response({"data":None,"message": "Template not found"}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = make_etag('template', template.pk, template.version)
+        response = not_modified(request, etag, template.updated_at)
+        if response is not None:
+            return response
+
         serializer = DataTemplateSerializer(template)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, template.updated_at)
 
     
     def put(self, request, pk):
@@ -192,7 +304,11 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
             To update the DataTemplate and its mappings.
             
         Behavior:
-            - If any mapping does not exist, returns an error without creating new mappings.
+            - The mappings sent are the complete new mapping set of the template. They are diffed against the
+              stored mappings by id, or by source field for mappings sent without one: changed mappings are
+              updated, new ones created and mappings that are no longer sent are deleted, nested mappings
+              included. Send the ids returned by GET when a source field feeds more than one destination.
+            - The template version is bumped, so cached compiled plans are rebuilt.
             
         Returns:
             - 200 OK: If the DataTemplate and mappings are successfully updated.
@@ -203,6 +319,7 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
                 "name": "Candidate Template 37",
                 "mappings": [
                     {
+                        "id": 1,
                         "source_field": 2,
                         "destination_field": 2
                     }
@@ -224,4 +341,51 @@ class DataTemplateRetrieveUpdateAPIView(APIView):
                 return Response(serializer.data, status=status.HTTP_200_OK)
             except ValidationError as e:  # Catch ValidationError from the serializer
                 return Response({"errors": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def patch(self, request, pk):
+        """
+        Http Method: PATCH
+
+        Purpose:
+            To partially update the DataTemplate and its mappings, without resending the full mapping set.
+
+        Behavior:
+            - 'name' and 'mappings' are both optional.
+            - Each mapping sent is matched to the stored mapping with its "id" (under the same parent mapping
+              for nested ones). Without an id it is matched to the first stored mapping with the same source
+              field, so a source field feeding several destinations needs ids to reach all of them:
+                - a matched mapping gets the destination field sent, if any, and its nested mappings are
+                  updated the same way,
+                - a mapping without a match is created and needs a destination field,
+                - "delete": true removes the matched mapping and its nested mappings.
+            - Mappings that are not sent are left untouched.
+
+        Returns:
+            - 200 OK: The updated DataTemplate with all its mappings.
+            - 400 Bad Request: If the provided data is invalid, an id is not a mapping of the template or a
+              mapping to delete does not exist.
+
+        Request Body:
+            {
+                "mappings": [
+                    {"source_field": 2, "destination_field": 5},
+                    {"id": 7, "destination_field": 6},
+                    {"id": 8, "delete": true}
+                ]
+            }
+        """
+        try:
+            template = DataTemplate.objects.get(pk=pk)
+        except DataTemplate.DoesNotExist:
+            return Response({"data": None, "message": "Template not found"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = DataTemplateSerializer(template, data=request.data, partial=True)
+
+        if serializer.is_valid():
+            try:
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_200_OK)
+            except ValidationError as e:
+                return Response({"errors": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
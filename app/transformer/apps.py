@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TransformerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transformer'
+
+    def ready(self):
+        # Keep cached compiled templates in sync with template, mapping and field changes
+        from . import signals  # noqa: F401
+
+        # Opt-in: compile templates before the first request instead of during it
+        from .warmup import warm_on_startup
+        warm_on_startup()
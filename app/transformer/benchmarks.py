@@ -0,0 +1,336 @@
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from .parallel import iter_transform_parallel
+from .plan import CompiledMapping, CompiledTemplate
+from .transformer import Transformer
+
+
+def build_plan(num_mappings, depth=2, sections=10):
+    """
+    Build a synthetic compiled template without touching the database.
+
+    Parameters:
+        - num_mappings (int): Number of mappings in the template.
+        - depth (int): Number of parts in every source and destination path.
+        - sections (int): Number of distinct top-level keys the paths are spread over.
+
+    Returns:
+        - CompiledTemplate: Mapping i reads 'section_<i % sections>.level_1....field_<i>' and writes
+          'Section <i % sections>.Level 1....Field <i>'.
+    """
+    mappings = []
+    for i in range(num_mappings):
+        section = i % sections
+        middle = tuple(f'level_{level}' for level in range(1, depth - 1))
+        source_path = (f'section_{section}',) + middle + (f'field_{i}',)
+        destination_path = (f'Section {section}',) + tuple(
+            part.replace('_', ' ').title() for part in middle
+        ) + (f'Field {i}',)
+        mappings.append(CompiledMapping(source_path=source_path[-depth:], destination_path=destination_path[-depth:]))
+    return CompiledTemplate(template_id=0, version=0, mappings=tuple(mappings))
+
+
+def build_records(plan, count, density=1.0, seed=0):
+    """
+    Build synthetic input records for a plan.
+
+    Parameters:
+        - plan (CompiledTemplate): The plan whose source paths should be populated.
+        - count (int): Number of records.
+        - density (float): Fraction of source paths that carry a value in each record.
+        - seed (int): Seed for the random generator, so runs are reproducible.
+
+    Returns:
+        - list: The input records.
+    """
+    rng = random.Random(seed)
+    records = []
+    for n in range(count):
+        record = {}
+        for mapping in plan.mappings:
+            if rng.random() >= density:
+                continue
+            node = record
+            for part in mapping.source_path[:-1]:
+                node = node.setdefault(part, {})
+            node[mapping.source_path[-1]] = f'value {n}'
+        records.append(record)
+    return records
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def bench_transform(plan, records, transformer=None):
+    """
+    Measure throughput, per-record latency and peak memory of applying a plan to records.
+
+    Purpose:
+        Records are transformed one by one with Transformer.apply_plan. The timed pass and the memory
+        pass are separate because tracemalloc slows down every allocation it tracks.
+
+    Parameters:
+        - plan (CompiledTemplate): The plan to apply.
+        - records (list): The input records.
+        - transformer (Transformer, optional): The transformer to measure. Defaults to a new Transformer.
+
+    Returns:
+        - dict: 'ops_per_sec', latency percentiles in microseconds ('p50_us', 'p90_us', 'p99_us', 'max_us',
+          'mean_us') and 'peak_memory_kb' for one pass over the records.
+    """
+    transformer = transformer or Transformer()
+    apply_plan = transformer.apply_plan
+    perf_counter_ns = time.perf_counter_ns
+
+    # Warm up caches and the allocator before measuring
+    for record in records[:10]:
+        apply_plan(plan, record)
+
+    latencies = []
+    start = perf_counter_ns()
+    for record in records:
+        record_start = perf_counter_ns()
+        apply_plan(plan, record)
+        latencies.append(perf_counter_ns() - record_start)
+    total_ns = perf_counter_ns() - start
+
+    tracemalloc.start()
+    try:
+        for record in records:
+            apply_plan(plan, record)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'ops_per_sec': len(records) / (total_ns / 1e9),
+        'mean_us': statistics.fmean(latencies) / 1000,
+        'p50_us': _percentile(latencies, 0.50) / 1000,
+        'p90_us': _percentile(latencies, 0.90) / 1000,
+        'p99_us': _percentile(latencies, 0.99) / 1000,
+        'max_us': latencies[-1] / 1000,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def bench_helpers(depth, iterations=100000):
+    """
+    Measure the Transformer path helpers on their own for one path depth.
+
+    Returns:
+        - dict: 'get_ops_per_sec' for _get_value_by_path and 'set_ops_per_sec' for _set_value_by_path.
+    """
+    transformer = Transformer()
+    path = tuple(f'level_{level}' for level in range(depth))
+    data = 'value'
+    for part in reversed(path):
+        data = {part: data}
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        transformer._get_value_by_path(data, path)
+    get_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        transformer._set_value_by_path({}, path, 'value')
+    set_seconds = time.perf_counter() - start
+
+    return {'get_ops_per_sec': iterations / get_seconds, 'set_ops_per_sec': iterations / set_seconds}
+
+
+def run_engine_suite(mapping_counts=(10, 100, 1000), depths=range(1, 11), densities=(1.0, 0.2), records=1000,
+                     engine='interpreter', progress=None):
+    """
+    Run the transformer engine benchmark matrix.
+
+    Parameters:
+        - mapping_counts (iterable): Template sizes to measure.
+        - depths (iterable): Path depths to measure.
+        - densities (iterable): Fractions of source paths present in each record (1.0 = dense input).
+        - records (int): Number of records per case.
+        - engine (str): Transformer engine to measure, see transformer.transformer.ENGINES.
+        - progress (callable, optional): Called with every finished case, e.g. to print it.
+
+    Returns:
+        - dict: A JSON-serialisable report with the environment, the suite parameters, one entry per
+          case under 'cases' and one entry per depth under 'helpers'.
+    """
+    transformer = Transformer(engine=engine)
+    cases = []
+    for num_mappings in mapping_counts:
+        for depth in depths:
+            plan = build_plan(num_mappings, depth=depth)
+            for density in densities:
+                case = {'mappings': num_mappings, 'depth': depth, 'density': density, 'records': records}
+                case.update(bench_transform(plan, build_records(plan, records, density=density), transformer))
+                cases.append(case)
+                if progress:
+                    progress(case)
+
+    helpers = [dict(depth=depth, **bench_helpers(depth)) for depth in depths]
+    return {
+        'suite': 'engine',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': {
+            'engine': engine,
+            'mapping_counts': list(mapping_counts),
+            'depths': list(depths),
+            'densities': list(densities),
+            'records': records,
+        },
+        'cases': cases,
+        'helpers': helpers,
+    }
+
+
+def case_key(case):
+    return (case['mappings'], case['depth'], case['density'])
+
+
+def compare_reports(baseline, current, max_regression=0.1):
+    """
+    Compare two engine suite reports case by case.
+
+    Parameters:
+        - baseline (dict): A previously saved report.
+        - current (dict): The report of this run.
+        - max_regression (float): Largest tolerated relative drop in ops/sec, e.g. 0.1 for 10%.
+
+    Returns:
+        - list of dicts: The cases whose throughput dropped by more than max_regression, with the
+          baseline and current ops/sec and the relative 'change'.
+    """
+    baseline_cases = {case_key(case): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in current['cases']:
+        previous = baseline_cases.get(case_key(case))
+        if previous is None:
+            continue
+        change = case['ops_per_sec'] / previous['ops_per_sec'] - 1
+        if change < -max_regression:
+            regressions.append({
+                'mappings': case['mappings'],
+                'depth': case['depth'],
+                'density': case['density'],
+                'baseline_ops_per_sec': previous['ops_per_sec'],
+                'ops_per_sec': case['ops_per_sec'],
+                'change': change,
+            })
+    return regressions
+
+
+def write_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def bench_parallel_scaling(plan, records, max_workers, chunk_size):
+    """
+    Compare the sequential path against the process pool for 1..max_workers workers.
+
+    Returns:
+        - list of dicts: One row per run with 'mode', 'workers', 'seconds', 'records_per_sec' and
+          'speedup' relative to the sequential run.
+    """
+    rows = []
+    start = time.perf_counter()
+    for _ in Transformer().apply_plan_many(plan, records):
+        pass
+    baseline = time.perf_counter() - start
+    rows.append({'mode': 'sequential', 'workers': 1, 'seconds': baseline})
+
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        for _ in iter_transform_parallel(plan, records, workers, chunk_size):
+            pass
+        rows.append({'mode': 'parallel', 'workers': workers, 'seconds': time.perf_counter() - start})
+
+    for row in rows:
+        row['records_per_sec'] = len(records) / row['seconds']
+        row['speedup'] = baseline / row['seconds']
+    return rows
+
+
+def bench_endpoints(template_id, record, iterations=1000, paths=None, client=None):
+    """
+    Measure the per-request cost of the transform endpoints through the full Django stack.
+
+    Purpose:
+        Posts the same record repeatedly with the Django test client (URL routing, middleware, the view and
+        response encoding, but no network) to each endpoint, and compares them with applying the compiled
+        plan directly. What is left after subtracting the direct transform is the per-request overhead.
+
+    Parameters:
+        - template_id (int): The DataTemplate to transform with.
+        - record (dict): The input record sent in every request.
+        - iterations (int): Number of requests per endpoint.
+        - paths (dict, optional): {name: url} of the endpoints to compare. Defaults to the DRF endpoint
+          ('drf') and the lean raw-bytes endpoint ('raw').
+        - client (django.test.Client, optional): The client to send the requests with.
+
+    Returns:
+        - list of dicts: One row per endpoint, plus a 'transform only' row, with 'requests_per_sec',
+          'mean_us', 'p50_us', 'p99_us' and 'overhead_us' (mean minus the mean of the transform only row).
+    """
+    from django.test import Client
+
+    from data_template_engine.models import DataTemplate
+    from .plan import get_compiled_template
+
+    paths = paths or {
+        'drf': f'/api/transform/{template_id}/',
+        'raw': f'/api/transform/{template_id}/raw/',
+    }
+    body = json.dumps(record)
+    client = client or Client(HTTP_HOST='localhost')
+    plan = get_compiled_template(DataTemplate.objects.get(pk=template_id))
+    transformer = Transformer()
+    perf_counter_ns = time.perf_counter_ns
+
+    def measure(call):
+        for _ in range(min(iterations, 20)):
+            call()
+        latencies = []
+        for _ in range(iterations):
+            start = perf_counter_ns()
+            call()
+            latencies.append(perf_counter_ns() - start)
+        latencies.sort()
+        mean = statistics.fmean(latencies)
+        return {
+            'requests_per_sec': 1e9 / mean,
+            'mean_us': mean / 1000,
+            'p50_us': _percentile(latencies, 0.50) / 1000,
+            'p99_us': _percentile(latencies, 0.99) / 1000,
+        }
+
+    rows = [dict(endpoint='transform only', **measure(lambda: transformer.apply_plan(plan, record)))]
+    for name, path in paths.items():
+        response = client.post(path, body, content_type='application/json')
+        if response.status_code != 200:
+            raise ValueError(f"{path} answered {response.status_code}: {response.content[:200]!r}")
+        rows.append(dict(endpoint=name, **measure(
+            lambda: client.post(path, body, content_type='application/json')
+        )))
+
+    for row in rows:
+        row['overhead_us'] = row['mean_us'] - rows[0]['mean_us']
+    return rows
@@ -0,0 +1,111 @@
+from .coercion import INVALID
+from .transformer import get_value_by_path
+
+
+def generate_transform_source(plan, coerce=False):
+    """
+    Generate the Python source of a function specialised for one compiled template.
+
+    Purpose:
+        The interpreter engine walks every path generically: a loop with isinstance/hasattr checks per level
+        for sources and a recursive call with a sliced path per level for destinations. The generated function
+        has none of that. Every distinct source prefix becomes one straight-line dict.get into a local variable.
+        Every intermediate destination dict gets its own local variable, created at most once per record.
+
+        The generated code follows the interpreter's semantics exactly: missing values (None) are skipped,
+        intermediate dicts are only created when a value is written below them, keys are inserted in mapping
+        order, anything that is not a plain dict falls back to transformer.get_value_by_path, and nested
+        mappings are applied to every element of a list (or to a single value) like Transformer._apply_children.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template to specialise.
+        - coerce (bool): Convert every value with the converter bound to its mapping (plan.converters). The function
+                         then takes a second argument, the list the (mapping, value) failures are appended to;
+                         values that cannot be converted are skipped like missing ones.
+
+    Returns:
+        - str: Source code defining a function named 'transform' that takes the input data and returns the output.
+        - dict: The child plans of nested mappings, by the global name the source calls their functions under.
+    """
+    lines = ['def transform(data, failures):' if coerce else 'def transform(data):']
+    # Nested plans collect their failures in the same list
+    extra_arguments = ', failures' if coerce else ''
+
+    # One local variable per node of the plan's source trie, so every distinct path prefix is read once
+    sources = ['data'] + [f's{node}' for node in range(1, len(plan.source_nodes))]
+    for node, (source_parent, source_key, _) in enumerate(plan.source_nodes[1:], start=1):
+        parent_name = sources[source_parent]
+        lines.append(
+            f'    {sources[node]} = {parent_name}.get({source_key!r}) if {parent_name}.__class__ is dict '
+            f'else (None if {parent_name} is None else get_value_by_path({parent_name}, ({source_key!r},)))'
+        )
+
+    # One local variable per intermediate destination dict of the plan's destination trie; node 0 is the output
+    nodes = plan.destination_nodes
+    names = ['out'] + [f'n{node}' for node in range(1, len(nodes))]
+    lines.append('    out = {}')
+    if len(nodes) > 1:
+        lines.append('    ' + ' = '.join(names[1:]) + ' = None')
+
+    children = {}
+    for index, (mapping, leaf, (parent, key, stale_nodes)) in enumerate(
+            zip(plan.mappings, plan.source_leaves, plan.destination_slots)):
+        lines.append(f'    value = {sources[leaf]}')
+        if coerce and plan.converters[index] is not None:
+            # The converter is bound by the plan; _convert_<i> and _mapping_<i> are globals of the generated code
+            lines.append('    if value is not None:')
+            lines.append(f'        value = _convert_{index}(value)')
+            lines.append('        if value is _INVALID:')
+            lines.append(f'            failures.append((_mapping_{index}, {sources[leaf]}))')
+            lines.append('            value = None')
+        lines.append('    if value is not None:')
+        if mapping.children is not None:
+            # Nested mappings run through the generated function of their own plan
+            name = f'_children_{index}'
+            children[name] = mapping.children
+            lines.append(
+                f'        value = [{name}(element{extra_arguments}) for element in value] '
+                f'if isinstance(value, (list, tuple)) else {name}(value{extra_arguments})'
+            )
+        # Make sure every dict from the root down to the parent exists, creating each at most once per record
+        chain = []
+        node = parent
+        while node:
+            chain.append(node)
+            node = nodes[node][0]
+        for node in reversed(chain):
+            node_parent, node_key = nodes[node]
+            lines.append(
+                f'        if {names[node]} is None: {names[node]} = {names[node_parent]}.setdefault({node_key!r}, {{}})'
+            )
+        lines.append(f'        {names[parent]}[{key!r}] = value')
+
+        # Writing a leaf replaces whatever was stored there, so forget any dict cached at or below it
+        if stale_nodes:
+            lines.append('        ' + ' = '.join(names[node] for node in stale_nodes) + ' = None')
+
+    lines.append('    return out')
+    return '\n'.join(lines) + '\n', children
+
+
+def generate_transform_function(plan, coerce=False):
+    """
+    Compile the generated source of a plan into a callable.
+
+    Returns:
+        - function: transform(input_data) -> output_data, equivalent to Transformer().apply_plan(plan, input_data).
+                    With coerce, transform(input_data, failures), see generate_transform_source.
+    """
+    source, children = generate_transform_source(plan, coerce)
+    namespace = {'get_value_by_path': get_value_by_path}
+    if coerce:
+        namespace['_INVALID'] = INVALID
+        for index, (mapping, converter) in enumerate(zip(plan.mappings, plan.converters)):
+            namespace[f'_convert_{index}'] = converter
+            namespace[f'_mapping_{index}'] = mapping
+        namespace.update((name, child.coercing_transform_function) for name, child in children.items())
+    else:
+        namespace.update((name, child.transform_function) for name, child in children.items())
+    code = compile(source, f'<transform template={plan.template_id} v{plan.version}>', 'exec')
+    exec(code, namespace)
+    return namespace['transform']
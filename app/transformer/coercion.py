@@ -0,0 +1,171 @@
+import datetime
+import re
+from decimal import Decimal
+
+# Returned by a converter for a value that cannot be coerced. Converters never raise, so a batch full of
+# bad values costs no more than a batch of good ones.
+INVALID = object()
+
+_INTEGER = re.compile(r'\s*[+-]?\d+\s*')
+_FLOAT = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*')
+_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_DATETIME = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?'
+)
+_TRUE = frozenset(('true', 'yes', 'y', '1'))
+_FALSE = frozenset(('false', 'no', 'n', '0'))
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_number(value):
+    return value.__class__ in (int, float, Decimal)
+
+
+def _valid_date(year, month, day):
+    if not 1 <= month <= 12 or day < 1:
+        return False
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return day <= 29
+    return day <= _DAYS_IN_MONTH[month - 1]
+
+
+def to_string(value):
+    if value.__class__ is str:
+        return value
+    if value.__class__ is bool:
+        return 'true' if value else 'false'
+    if _is_number(value):
+        return str(value)
+    return INVALID
+
+
+def to_integer(value):
+    cls = value.__class__
+    if cls is int:
+        return value
+    if cls is float:
+        return int(value) if value.is_integer() else INVALID
+    if cls is Decimal:
+        return int(value) if value.is_finite() and value == value.to_integral_value() else INVALID
+    if cls is str and _INTEGER.fullmatch(value):
+        return int(value)
+    return INVALID
+
+
+def to_float(value):
+    cls = value.__class__
+    if cls is float:
+        return value
+    if cls is int or cls is Decimal:
+        return float(value)
+    if cls is str and _FLOAT.fullmatch(value):
+        return float(value)
+    return INVALID
+
+
+def to_boolean(value):
+    cls = value.__class__
+    if cls is bool:
+        return value
+    if cls is int and value in (0, 1):
+        return bool(value)
+    if cls is str:
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+    return INVALID
+
+
+def to_date(value):
+    cls = value.__class__
+    if cls is datetime.date:
+        return value.isoformat()
+    if cls is datetime.datetime:
+        return value.date().isoformat()
+    if cls is str:
+        match = _DATE.fullmatch(value)
+        if match and _valid_date(*map(int, match.groups())):
+            return value
+    return INVALID
+
+
+def to_datetime(value):
+    cls = value.__class__
+    if cls is datetime.datetime:
+        return value.isoformat()
+    if cls is str:
+        match = _DATETIME.fullmatch(value)
+        if match:
+            year, month, day, hour, minute, second = (int(part or 0) for part in match.groups())
+            if _valid_date(year, month, day) and hour < 24 and minute < 60 and second < 60:
+                return value
+    return INVALID
+
+
+# Converter per Field.data_type, matched case-insensitively. Types not listed here are passed through as they are.
+CONVERTERS = {
+    'string': to_string,
+    'str': to_string,
+    'text': to_string,
+    'integer': to_integer,
+    'int': to_integer,
+    'float': to_float,
+    'decimal': to_float,
+    'double': to_float,
+    'number': to_float,
+    'boolean': to_boolean,
+    'bool': to_boolean,
+    'date': to_date,
+    'datetime': to_datetime,
+}
+
+
+def get_converter(data_type):
+    """
+    Find the converter for a Field.data_type.
+
+    Purpose:
+        Called once per mapping when a template is compiled, so applying the plan never looks a type up by name.
+        A converter takes a value that is not None and returns it in the canonical JSON form of the type
+        (e.g. '42' -> 42 for 'Integer', 'True' -> True for 'Boolean', dates as ISO 8601 strings),
+        or INVALID when the value cannot be coerced.
+
+    Parameters:
+        - data_type (str): The declared type. Example: 'Integer'
+
+    Returns:
+        - function: The converter, or None when values of the type are passed through unchanged.
+    """
+    if not data_type:
+        return None
+    return CONVERTERS.get(data_type.strip().lower())
+
+
+def format_failures(failures):
+    """
+    Describe the coercion failures of one record.
+
+    Parameters:
+        - failures (list): (CompiledMapping, value) tuples, as collected by the engines.
+
+    Returns:
+        - str: Example: "Invalid value for 'Candidate Details.Age': expected Integer, got 'abc'"
+    """
+    return '; '.join(
+        f"Invalid value for '{'.'.join(mapping.destination_path)}': expected {mapping.data_type}, got {value!r}"
+        for mapping, value in failures
+    )
+
+
+class CoercionError(ValueError):
+    """
+    Raised when a single record has values that do not match the data_type of their destination fields.
+
+    Attributes:
+        - failures (list): (CompiledMapping, value) tuples, one per value that could not be coerced.
+    """
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(format_failures(failures))
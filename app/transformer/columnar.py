@@ -0,0 +1,203 @@
+from .coercion import INVALID
+from .transformer import get_value_by_path
+
+# Records pivoted into columns at a time by Transformer.apply_plan_many on the columnar engine
+COLUMNAR_BATCH_SIZE = 1000
+
+
+def extract_columns(plan, records):
+    """
+    Pivot a batch of records into one column of values per node of the plan's source trie.
+
+    Purpose:
+        Instead of walking every record through the trie, every trie node is read for the whole batch with
+        one list comprehension over its parent's column. A node whose parent column holds nothing at all is
+        skipped together with its subtree.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template.
+        - records (list): The input records.
+
+    Returns:
+        - list: For every node of plan.source_nodes, the list of its values per record (None where the path
+          does not exist). Node 0 is the records themselves.
+    """
+    nodes = plan.source_nodes
+    empty = [None] * len(records)
+    columns = [empty] * len(nodes)
+    columns[0] = records
+    node = 1
+    end = len(nodes)
+    while node < end:
+        parent, key, subtree_end = nodes[node]
+        parent_column = columns[parent]
+        if parent_column is empty:
+            node = subtree_end
+            continue
+        column = [
+            data.get(key) if data.__class__ is dict
+            else (None if data is None else get_value_by_path(data, (key,)))
+            for data in parent_column
+        ]
+        columns[node] = column if any(value is not None for value in column) else empty
+        node += 1
+    return columns
+
+
+def mapping_columns(plan, records, failures=None):
+    """
+    The value of every mapping for every record, nested mappings already applied.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template.
+        - records (list): The input records.
+        - failures (list, optional): Coercion is off unless a list with one (empty) list per record is passed.
+                                     When it is, every column is converted by the converter of its mapping and
+                                     the values that cannot be are left out and appended to their record's list
+                                     as (mapping, value) tuples.
+
+    Returns:
+        - list: One column (a list with one value per record) per mapping of the plan, in mapping order.
+    """
+    columns = extract_columns(plan, records)
+    result = []
+    for mapping, leaf, converter in zip(plan.mappings, plan.source_leaves, plan.converters):
+        column = columns[leaf]
+        if mapping.children is not None:
+            column = _apply_children_column(mapping.children, column, failures)
+        elif failures is not None and converter is not None:
+            column = _convert_column(mapping, converter, column, failures)
+        result.append(column)
+    return result
+
+
+def _convert_column(mapping, converter, column, failures):
+    converted = [None if value is None else converter(value) for value in column]
+    if INVALID in converted:
+        for index, value in enumerate(converted):
+            if value is INVALID:
+                failures[index].append((mapping, column[index]))
+                converted[index] = None
+    return converted
+
+
+def _apply_children_column(plan, column, failures=None):
+    # Transform the elements of all lists in the column as one batch, then split the results up again
+    elements = []
+    spans = []
+    for value in column:
+        if value is None:
+            spans.append(None)
+        elif isinstance(value, (list, tuple)):
+            spans.append((len(elements), len(elements) + len(value)))
+            elements.extend(value)
+        else:
+            spans.append(len(elements))
+            elements.append(value)
+    if failures is None:
+        outputs = transform_rows(plan, elements)
+    else:
+        # Failures of the elements are handed back to the record they came from
+        element_failures = [[] for _ in elements]
+        outputs = transform_rows(plan, elements, element_failures)
+        for span, record_failures in zip(spans, failures):
+            if span is not None:
+                start, end = (span, span + 1) if span.__class__ is int else span
+                for found in element_failures[start:end]:
+                    record_failures.extend(found)
+    return [
+        None if span is None else outputs[span] if span.__class__ is int else outputs[span[0]:span[1]]
+        for span in spans
+    ]
+
+
+def transform_rows(plan, records, failures=None):
+    """
+    Apply a compiled template to a batch of records, column by column.
+
+    Purpose:
+        Every mapping is applied as a move of a whole column into the output rows. The output is exactly what
+        Transformer.apply_plan returns for every record: missing values are skipped, intermediate dicts are
+        only created when something is written below them and keys are inserted in mapping order.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template to apply.
+        - records (list): The input records.
+        - failures (list, optional): One list per record to collect coercion failures in, see mapping_columns.
+
+    Returns:
+        - list: The output dict of every record, in input order.
+    """
+    count = len(records)
+    rows = [{} for _ in range(count)]
+    nodes = plan.destination_nodes
+    # The intermediate output dicts of every record, per destination trie node, created on first use
+    containers = [rows] + [[None] * count for _ in range(len(nodes) - 1)]
+
+    for column, (parent, key, stale_nodes) in zip(mapping_columns(plan, records, failures), plan.destination_slots):
+        if parent == 0 and not stale_nodes:
+            for row, value in zip(rows, column):
+                if value is not None:
+                    row[key] = value
+            continue
+        parents = containers[parent]
+        grandparent, parent_key = nodes[parent]
+        # The rows (node 0) always exist, so they have no parent to look at
+        grandparents = containers[grandparent] if parent else None
+        for index, value in enumerate(column):
+            if value is None:
+                continue
+            container = parents[index]
+            if container is None:
+                # Usually only the parent dict itself is missing; anything deeper takes the generic route
+                outer = grandparents[index]
+                if outer is None:
+                    container = _get_container(nodes, containers, parent, index)
+                else:
+                    if parent_key not in outer:
+                        outer[parent_key] = {}
+                    container = parents[index] = outer[parent_key]
+            container[key] = value
+            for node in stale_nodes:
+                containers[node][index] = None
+    return rows
+
+
+def _get_container(nodes, containers, node, index):
+    # Same as Transformer._get_container, for one record of the batch
+    missing = []
+    while containers[node][index] is None:
+        missing.append(node)
+        node = nodes[node][0]
+    container = containers[node][index]
+    for node in reversed(missing):
+        key = nodes[node][1]
+        if key not in container:
+            container[key] = {}
+        container = containers[node][index] = container[key]
+    return container
+
+
+def transform_table(plan, records, failures=None):
+    """
+    Apply a compiled template to a batch of records and return the result as a table.
+
+    Purpose:
+        For consumers that want flat, columnar output (CSV exports, data frames, bulk loaders) there is no
+        need to build a nested dict per record at all: every mapping is one column of the table.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template to apply.
+        - records (list): The input records.
+        - failures (list, optional): One list per record to collect coercion failures in, see mapping_columns.
+
+    Returns:
+        - dict: {"columns": [destination path of every mapping], "rows": [[value of every mapping] per record]},
+          with None where a record has no value for a mapping.
+          Example: {"columns": ["Candidate Details.First Name"], "rows": [["John"], ["Jane"]]}
+    """
+    columns = mapping_columns(plan, records, failures)
+    return {
+        "columns": ['.'.join(mapping.destination_path) for mapping in plan.mappings],
+        "rows": [list(row) for row in zip(*columns)] if columns else [[] for _ in records],
+    }
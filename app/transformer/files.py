@@ -0,0 +1,200 @@
+import mmap
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import json_codec
+from .streaming import encode_result
+from .transformer import Transformer
+
+# Bytes of input per chunk: the unit handed to a worker process and after which progress is reported
+FILE_CHUNK_BYTES = 4 * 1024 * 1024
+# Size of the output file's write buffer
+FILE_WRITE_BUFFER = 1024 * 1024
+
+_NON_WHITESPACE = re.compile(rb'\S')
+_WHITESPACE = b' \t\r\n'
+
+# Input file mapped once per worker process, and the plan applied to it, set by the pool initializer
+_worker_plan = None
+_worker_map = None
+
+
+def _init_worker(plan, path):
+    global _worker_plan, _worker_map
+    _worker_plan = plan
+    with open(path, 'rb') as f:
+        _worker_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _transform_worker_range(start, end, array):
+    return transform_range(_worker_plan, _worker_map, start, end, array)
+
+
+def find_records(data):
+    """
+    Find the part of a mapped input file that holds the records.
+
+    Purpose:
+        NDJSON files hold records everywhere. A JSON array dump ('[' first, ']' last) holds them between its
+        brackets, one record per line, e.g. '[\\n{...},\\n{...}\\n]' as written by most export tools. Excluding the
+        brackets lets both formats be split on line boundaries the same way.
+
+    Parameters:
+        - data (mmap): The mapped input file.
+
+    Returns:
+        - (start, end, array): The byte range of the records and whether the file is a JSON array.
+    """
+    first = _NON_WHITESPACE.search(data)
+    if first is None:
+        return 0, 0, False
+    if data[first.start()] != ord('['):
+        return 0, len(data), False
+    last = len(data) - 1
+    while data[last] in _WHITESPACE:
+        last -= 1
+    return first.start() + 1, last if data[last] == ord(']') else len(data), True
+
+
+def split_ranges(data, start, end, chunk_bytes=FILE_CHUNK_BYTES):
+    """
+    Split a byte range of a mapped file into chunks of about chunk_bytes that end on line boundaries.
+
+    Returns:
+        - list: (start, end) byte ranges covering start .. end, in order, each holding whole lines.
+    """
+    ranges = []
+    while start < end:
+        boundary = data.find(b'\n', min(start + chunk_bytes, end) - 1, end)
+        boundary = end if boundary == -1 else boundary + 1
+        ranges.append((start, boundary))
+        start = boundary
+    return ranges
+
+
+def iter_range_records(data, start, end, array=False):
+    """
+    Decode the records of one byte range of a mapped file, a line at a time.
+
+    Purpose:
+        Only the bytes of the current line are ever copied out of the mapping. Blank lines (and in JSON arrays
+        the commas between records) are skipped.
+
+    Yields:
+        - The decoded record, or a ValueError giving the byte offset of a line that is not valid JSON, so one
+          bad line does not abort the file.
+    """
+    position = start
+    while position < end:
+        newline = data.find(b'\n', position, end)
+        if newline == -1:
+            newline = end
+        line = data[position:newline].strip()
+        if array and line.endswith(b','):
+            line = line[:-1].rstrip()
+        if line:
+            try:
+                yield json_codec.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Byte {position}: invalid JSON ({e})")
+        position = newline + 1
+
+
+def transform_range(plan, data, start, end, array=False):
+    """
+    Transform the records of one byte range of a mapped file.
+
+    Purpose:
+        The unit of work of transform_file, run in the main process or in a worker. The records go through
+        Transformer.apply_plan_many, so the configured engine and coercion apply exactly as in the API, and the
+        results are encoded right where they were produced.
+
+    Returns:
+        - bytes: One {"data": ..., "error": ...} NDJSON line per record, the same shape the stream endpoint uses.
+        - int: The number of records.
+        - int: How many of them failed.
+    """
+    lines = []
+    errors = 0
+    for output_data, error in Transformer().apply_plan_many(plan, iter_range_records(data, start, end, array)):
+        if error is not None:
+            errors += 1
+        lines.append(encode_result(output_data, error))
+    return b'\n'.join(lines) + b'\n' if lines else b'', len(lines), errors
+
+
+def transform_file(plan, input_path, output_path, workers=1, chunk_bytes=FILE_CHUNK_BYTES, progress=None):
+    """
+    Transform an NDJSON or JSON array file into an NDJSON file.
+
+    Purpose:
+        Multi-gigabyte dumps are transformed offline without going through HTTP and without reading them into
+        memory: the input is memory-mapped and cut into chunks on line boundaries, and every chunk is transformed
+        and written out before the next one is needed. With more than one worker the chunks are transformed in
+        worker processes that map the file themselves, so only byte offsets and encoded output cross process
+        boundaries. At most two chunks per worker are in flight and output is always written in input order.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template to apply.
+        - input_path (str): The NDJSON or JSON array file to read.
+        - output_path (str): The NDJSON file to write, one {"data": ..., "error": ...} line per input record.
+        - workers (int): Number of worker processes. 1 transforms in this process.
+        - chunk_bytes (int): Approximate number of input bytes per chunk.
+        - progress (callable, optional): Called with the report so far after every chunk.
+
+    Returns:
+        - dict: {"records": ..., "errors": ..., "bytes_read": ..., "bytes_total": ..., "bytes_written": ...,
+                 "seconds": ..., "records_per_second": ..., "mb_per_second": ...}
+    """
+    started = time.perf_counter()
+    report = {
+        "records": 0, "errors": 0, "bytes_read": 0, "bytes_total": 0, "bytes_written": 0,
+        "seconds": 0.0, "records_per_second": 0.0, "mb_per_second": 0.0,
+    }
+
+    with open(input_path, 'rb') as source, open(output_path, 'wb', buffering=FILE_WRITE_BUFFER) as output:
+
+        def write(result, bytes_read):
+            chunk, records, errors = result
+            output.write(chunk)
+            seconds = time.perf_counter() - started
+            report.update(
+                records=report["records"] + records,
+                errors=report["errors"] + errors,
+                bytes_read=bytes_read,
+                bytes_written=report["bytes_written"] + len(chunk),
+                seconds=seconds,
+                records_per_second=(report["records"] + records) / seconds,
+                mb_per_second=bytes_read / seconds / (1024 * 1024),
+            )
+            if progress is not None:
+                progress(dict(report))
+
+        size = report["bytes_total"] = source.seek(0, 2)
+        if not size:
+            # Empty files cannot be mapped, and there is nothing to transform
+            return report
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start, end, array = find_records(data)
+            # The last chunk also covers whatever follows the records, e.g. the closing bracket of an array
+            ranges = split_ranges(data, start, end, chunk_bytes)
+            ends = [range_end for _, range_end in ranges[:-1]] + [size]
+            if workers <= 1 or len(ranges) <= 1:
+                for (range_start, range_end), bytes_read in zip(ranges, ends):
+                    write(transform_range(plan, data, range_start, range_end, array), bytes_read)
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(plan, input_path)) as executor:
+                    pending = deque()
+                    for (range_start, range_end), bytes_read in zip(ranges, ends):
+                        future = executor.submit(_transform_worker_range, range_start, range_end, array)
+                        pending.append((future, bytes_read))
+                        if len(pending) >= workers * 2:
+                            future, done = pending.popleft()
+                            write(future.result(), done)
+                    while pending:
+                        future, done = pending.popleft()
+                        write(future.result(), done)
+    return report
@@ -0,0 +1,216 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import TransformJob, TransformJobRecord, TransformJobResult
+from .parallel import get_parallel_workers, start_pool, transform_parallel
+from .plan import get_compiled_template, get_projected_plan, parse_selection
+
+logger = logging.getLogger(__name__)
+
+
+class JobLost(Exception):
+    """
+    Raised when a worker's lease on a job expired and another worker claimed it in the meantime.
+    """
+
+
+def get_job_chunk_size():
+    """
+    Number of records a worker transforms and checkpoints at a time, from the TRANSFORMER_JOB_CHUNK_SIZE setting.
+    """
+    return getattr(settings, 'TRANSFORMER_JOB_CHUNK_SIZE', 500)
+
+
+def get_job_lease():
+    """
+    How long a running job may go without a checkpoint before another worker may take it over,
+    from the TRANSFORMER_JOB_LEASE_SECONDS setting.
+    """
+    return timedelta(seconds=getattr(settings, 'TRANSFORMER_JOB_LEASE_SECONDS', 300))
+
+
+def default_worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def create_job(template, records, selection=None):
+    """
+    Store the input of a background transform and queue it.
+
+    Parameters:
+        - template (DataTemplate): The template to apply.
+        - records (list): The input records.
+        - selection (tuple, optional): Destination paths to limit the output to, as returned by parse_selection.
+
+    Returns:
+        - TransformJob: The pending job.
+    """
+    select = ','.join('.'.join(path) for path in selection or ())
+    with transaction.atomic():
+        job = TransformJob.objects.create(template=template, record_count=len(records), select=select)
+        TransformJobRecord.objects.bulk_create(
+            (TransformJobRecord(job=job, index=index, input=record) for index, record in enumerate(records)),
+            batch_size=1000,
+        )
+    return job
+
+
+def claim_job(worker):
+    """
+    Claim the oldest job that is waiting, or whose worker stopped checkpointing.
+
+    Purpose:
+        The candidate row is locked with SELECT ... FOR UPDATE SKIP LOCKED, so workers polling at the same time
+        each get a different job instead of queueing behind one another's locks, and a job is never handed to
+        two workers. (Databases without row locks, like SQLite, serialise the whole transaction instead.)
+
+    Parameters:
+        - worker (str): Name of the claiming worker.
+
+    Returns:
+        - TransformJob: The claimed job, now running under this worker, or None when there is nothing to do.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            TransformJob.objects
+            .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .filter(Q(status=TransformJob.PENDING) |
+                    Q(status=TransformJob.RUNNING, heartbeat_at__lt=now - get_job_lease()))
+            .order_by('pk')
+            .first()
+        )
+        if job is None:
+            return None
+        if job.status == TransformJob.RUNNING:
+            logger.warning("Job %s: lease of worker %s expired, resuming at record %s",
+                           job.pk, job.worker, job.processed_count)
+        job.status = TransformJob.RUNNING
+        job.worker = worker
+        job.heartbeat_at = now
+        job.started_at = job.started_at or now
+        job.save(update_fields=['status', 'worker', 'heartbeat_at', 'started_at'])
+    return job
+
+
+def _update_job(job, worker, **changes):
+    # Only the worker holding the job may change it; anything else means the lease was lost
+    updated = TransformJob.objects.filter(pk=job.pk, worker=worker, status=TransformJob.RUNNING).update(**changes)
+    if not updated:
+        raise JobLost(f"Job {job.pk} is no longer held by worker {worker}")
+
+
+def process_job(job, worker, chunk_size=None):
+    """
+    Transform the remaining records of a claimed job, one checkpointed chunk at a time.
+
+    Purpose:
+        Every chunk is read starting at the job's checkpoint, transformed (spread over worker processes when
+        TRANSFORMER_PARALLEL_WORKERS allows it, see transformer.parallel) and stored in one transaction with
+        the new checkpoint. The worker processes are started once per job and only restarted when the
+        template changes, since they hold its plan. A worker that crashes loses at most the chunk it
+        was working on; one that lost its lease has its chunk rolled back rather than stored twice.
+
+    Parameters:
+        - job (TransformJob): A job claimed by this worker (see claim_job).
+        - worker (str): Name of the worker, as given to claim_job.
+        - chunk_size (int, optional): Records per chunk. Defaults to get_job_chunk_size().
+
+    Returns:
+        - TransformJob: The job, reloaded after it finished or failed.
+
+    Raises:
+        - JobLost: If another worker took the job over.
+    """
+    chunk_size = chunk_size or get_job_chunk_size()
+    workers = get_parallel_workers()
+    pool = pool_plan = None
+    try:
+        while True:
+            job.refresh_from_db(fields=['template', 'select', 'processed_count'])
+            rows = list(
+                TransformJobRecord.objects.filter(job=job, index__gte=job.processed_count)
+                .order_by('index').values_list('index', 'input')[:chunk_size]
+            )
+            if not rows:
+                break
+            # The template may change while a long job runs; its plan is only recompiled when it does
+            plan = get_compiled_template(job.template)
+            selection = parse_selection(job.select)
+            if selection is not None:
+                plan = get_projected_plan(plan, selection)
+            if workers > 1 and (pool_plan is None or pool_plan.version != plan.version):
+                if pool is not None:
+                    pool.shutdown()
+                pool, pool_plan = start_pool(plan, workers), plan
+            results = [
+                TransformJobResult(job=job, index=index, data=output_data, error=error)
+                for (index, _), (output_data, error) in zip(
+                    rows, transform_parallel(plan, [record for _, record in rows], workers, executor=pool))
+            ]
+            with transaction.atomic():
+                _update_job(
+                    job, worker,
+                    processed_count=rows[-1][0] + 1,
+                    error_count=F('error_count') + sum(1 for result in results if result.error is not None),
+                    heartbeat_at=timezone.now(),
+                )
+                TransformJobResult.objects.bulk_create(results)
+        with transaction.atomic():
+            _update_job(job, worker, status=TransformJob.DONE, finished_at=timezone.now())
+            # The input is not needed any more once every result is stored
+            TransformJobRecord.objects.filter(job=job).delete()
+    except JobLost:
+        raise
+    except Exception as e:
+        logger.exception("Job %s failed", job.pk)
+        _update_job(job, worker, status=TransformJob.FAILED, error=str(e), finished_at=timezone.now())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    job.refresh_from_db()
+    return job
+
+
+def run_worker(worker=None, chunk_size=None, poll_interval=1.0, once=False, max_jobs=None):
+    """
+    Claim and process jobs until stopped.
+
+    Purpose:
+        Any number of workers, on any number of machines, can run against the same database: claim_job hands
+        every job to exactly one of them and process_job checkpoints after every chunk.
+
+    Parameters:
+        - worker (str, optional): Name of this worker. Defaults to '<hostname>:<pid>'.
+        - chunk_size (int, optional): Records per chunk, see process_job.
+        - poll_interval (float): Seconds to wait before looking again when no job is waiting.
+        - once (bool): Return as soon as no job is waiting instead of polling.
+        - max_jobs (int, optional): Return after processing this many jobs.
+
+    Returns:
+        - int: The number of jobs processed.
+    """
+    worker = worker or default_worker_name()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_job(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        try:
+            job = process_job(job, worker, chunk_size)
+            logger.info("Job %s %s: %s records, %s errors", job.pk, job.status, job.record_count, job.error_count)
+        except JobLost as e:
+            logger.warning("%s", e)
+        processed += 1
+    return processed
@@ -0,0 +1,52 @@
+import json
+
+# orjson parses and serialises several times faster than the standard library, but it is optional: without it,
+# or for the few documents it does not support (integers wider than 64 bits, for example), json is used instead
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(data):
+    """
+    Decode a JSON document from bytes or str.
+
+    Raises:
+        - ValueError: If the document is not valid JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(obj):
+    """
+    Encode an object as compact UTF-8 JSON bytes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def canonical_dumps(obj):
+    """
+    Encode an object as JSON bytes that are the same for equal documents, whatever the order of their keys.
+
+    Raises:
+        - TypeError: If the object is not JSON serialisable.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode()
@@ -0,0 +1,141 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attribute_library.models import Field
+from data_template_engine.models import DataTemplate, FieldMapping
+from transformer.benchmarks import (
+    bench_endpoints, bench_parallel_scaling, build_plan, build_records, compare_reports, load_report,
+    run_engine_suite, write_report,
+)
+from transformer.transformer import ENGINES
+
+
+def int_list(value):
+    return [int(part) for part in value.split(',')]
+
+
+def float_list(value):
+    return [float(part) for part in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the transformer engine on synthetic templates and records."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', nargs='?', choices=['engine', 'parallel', 'endpoints'], default='engine',
+                            help="Benchmark suite to run (default: engine).")
+        parser.add_argument('--records', type=int, default=None,
+                            help="Number of input records per case, or requests per endpoint "
+                                 "(default: 1000 for engine and endpoints, 20000 for parallel).")
+
+        engine = parser.add_argument_group('engine suite')
+        engine.add_argument('--engine', choices=ENGINES, default='interpreter',
+                            help="Transformer engine to measure (default: interpreter).")
+        engine.add_argument('--mapping-counts', type=int_list, default=[10, 100, 1000],
+                            help="Comma separated template sizes (default: 10,100,1000).")
+        engine.add_argument('--depths', type=int_list, default=list(range(1, 11)),
+                            help="Comma separated path depths (default: 1 to 10).")
+        engine.add_argument('--densities', type=float_list, default=[1.0, 0.2],
+                            help="Comma separated fractions of source paths present per record (default: 1.0,0.2).")
+        engine.add_argument('--output', help="Write the results as JSON to this file.")
+        engine.add_argument('--compare', help="Compare against a previously written JSON report.")
+        engine.add_argument('--max-regression', type=float, default=0.1,
+                            help="Fail when ops/sec of a case drops by more than this fraction (default: 0.1).")
+
+        parallel = parser.add_argument_group('parallel and endpoints suites')
+        parallel.add_argument('--mappings', type=int, default=None,
+                              help="Number of mappings in the synthetic template (default: 100, 10 for endpoints).")
+        parallel.add_argument('--depth', type=int, default=3, help="Number of parts in every field path.")
+        parallel.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                              help="Largest worker count to measure.")
+        parallel.add_argument('--chunk-size', type=int, default=500, help="Records per worker chunk.")
+
+    def handle(self, *args, **options):
+        if options['suite'] == 'parallel':
+            self.run_parallel(options)
+        elif options['suite'] == 'endpoints':
+            self.run_endpoints(options)
+        else:
+            self.run_engine(options)
+
+    def run_engine(self, options):
+        baseline = load_report(options['compare']) if options['compare'] else None
+
+        self.stdout.write(
+            f"{'mappings':>9}{'depth':>6}{'density':>8}{'ops/s':>11}{'p50 us':>9}{'p99 us':>9}{'peak KiB':>10}"
+        )
+
+        def progress(case):
+            self.stdout.write(
+                f"{case['mappings']:>9}{case['depth']:>6}{case['density']:>8.2f}{case['ops_per_sec']:>11.0f}"
+                f"{case['p50_us']:>9.1f}{case['p99_us']:>9.1f}{case['peak_memory_kb']:>10.1f}"
+            )
+
+        report = run_engine_suite(
+            mapping_counts=options['mapping_counts'],
+            depths=options['depths'],
+            densities=options['densities'],
+            records=options['records'] or 1000,
+            engine=options['engine'],
+            progress=progress,
+        )
+        if options['output']:
+            write_report(report, options['output'])
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare_reports(baseline, report, options['max_regression'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"Regression: {regression['mappings']} mappings, depth {regression['depth']}, "
+                    f"density {regression['density']}: {regression['baseline_ops_per_sec']:.0f} -> "
+                    f"{regression['ops_per_sec']:.0f} ops/s ({regression['change']:+.1%})"
+                ))
+            if regressions:
+                raise CommandError(f"{len(regressions)} case(s) regressed by more than {options['max_regression']:.0%}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def run_parallel(self, options):
+        records_count = options['records'] or 20000
+        mappings = options['mappings'] or 100
+        plan = build_plan(mappings, depth=options['depth'])
+        records = build_records(plan, records_count)
+        self.stdout.write(f"{records_count} records, {mappings} mappings, depth {options['depth']}")
+
+        rows = bench_parallel_scaling(plan, records, options['max_workers'], options['chunk_size'])
+        self.stdout.write(f"{'mode':<12}{'workers':>8}{'seconds':>10}{'records/s':>12}{'speedup':>9}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['mode']:<12}{row['workers']:>8}{row['seconds']:>10.3f}"
+                f"{row['records_per_sec']:>12.0f}{row['speedup']:>8.2f}x"
+            )
+
+    def run_endpoints(self, options):
+        requests = options['records'] or 1000
+        mappings = options['mappings'] or 10
+        plan = build_plan(mappings, depth=options['depth'])
+        record = build_records(plan, 1)[0]
+        self.stdout.write(f"{requests} requests per endpoint, {mappings} mappings, depth {options['depth']}")
+
+        # The synthetic template only exists for the duration of the run
+        with transaction.atomic():
+            template = DataTemplate.objects.create(name='benchmark_transformer endpoints')
+            for mapping in plan.mappings:
+                FieldMapping.objects.create(
+                    template=template,
+                    source_field=Field.objects.create(
+                        name='.'.join(mapping.source_path), visible_name='', data_type='String'),
+                    destination_field=Field.objects.create(
+                        name='', visible_name='.'.join(mapping.destination_path), data_type='String'),
+                )
+            rows = bench_endpoints(template.pk, record, requests)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'endpoint':<16}{'req/s':>10}{'mean us':>10}{'p50 us':>9}{'p99 us':>9}{'overhead us':>13}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<16}{row['requests_per_sec']:>10.0f}{row['mean_us']:>10.1f}"
+                f"{row['p50_us']:>9.1f}{row['p99_us']:>9.1f}{row['overhead_us']:>13.1f}"
+            )
@@ -0,0 +1,70 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from data_template_engine.models import DataTemplate
+from transformer.files import FILE_CHUNK_BYTES, transform_file
+from transformer.parallel import get_parallel_workers
+from transformer.plan import get_compiled_template
+
+
+class Command(BaseCommand):
+    help = (
+        "Transform an NDJSON or JSON array file with a template, writing one {\"data\": ..., \"error\": ...} "
+        "line per record to an NDJSON file. The input is memory-mapped and never read into memory as a whole."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('template_id', type=int, help="The DataTemplate to apply.")
+        parser.add_argument('input', help="NDJSON file, or JSON array with one record per line.")
+        parser.add_argument('output', help="NDJSON file to write.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Worker processes, 0 for one per CPU core "
+                                 "(default: the TRANSFORMER_PARALLEL_WORKERS setting).")
+        parser.add_argument('--chunk-mb', type=float, default=FILE_CHUNK_BYTES / (1024 * 1024),
+                            help="Megabytes of input per chunk (default: %(default)s).")
+        parser.add_argument('--progress-interval', type=float, default=1.0,
+                            help="Seconds between progress lines, 0 to report none (default: %(default)s).")
+
+    def handle(self, *args, **options):
+        try:
+            template = DataTemplate.objects.get(pk=options['template_id'])
+        except DataTemplate.DoesNotExist:
+            raise CommandError(f"Template {options['template_id']} does not exist")
+        plan = get_compiled_template(template)
+
+        workers = options['workers']
+        if workers is None:
+            workers = get_parallel_workers()
+        elif workers <= 0:
+            workers = os.cpu_count() or 1
+
+        interval = options['progress_interval']
+        last_reported = time.perf_counter()
+
+        def progress(report):
+            nonlocal last_reported
+            now = time.perf_counter()
+            if interval and now - last_reported >= interval:
+                last_reported = now
+                self.stderr.write(self.format_report(report))
+
+        try:
+            report = transform_file(
+                plan, options['input'], options['output'], workers=workers,
+                chunk_bytes=max(1, int(options['chunk_mb'] * 1024 * 1024)), progress=progress,
+            )
+        except OSError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.format_report(report))
+
+    def format_report(self, report):
+        total = report['bytes_total']
+        percent = 100 * report['bytes_read'] / total if total else 100.0
+        return (
+            f"{report['records']} records ({report['errors']} errors), "
+            f"{report['bytes_read'] / (1024 * 1024):.1f}/{total / (1024 * 1024):.1f} MiB ({percent:.0f}%) "
+            f"in {report['seconds']:.1f}s: {report['records_per_second']:.0f} records/s, "
+            f"{report['mb_per_second']:.1f} MiB/s"
+        )
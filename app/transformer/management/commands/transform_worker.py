@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from transformer.jobs import default_worker_name, run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued background transform jobs. Run as many workers as needed, on any number of machines: "
+        "every job is claimed by exactly one of them and checkpointed after every chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-id', default=None,
+                            help="Name of this worker, stored on the jobs it holds (default: <hostname>:<pid>).")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Records per checkpoint (default: the TRANSFORMER_JOB_CHUNK_SIZE setting).")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait before looking again when no job is waiting (default: %(default)s).")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit as soon as no job is waiting instead of polling.")
+        parser.add_argument('--max-jobs', type=int, default=None, help="Exit after processing this many jobs.")
+
+    def handle(self, *args, **options):
+        worker = options['worker_id'] or default_worker_name()
+        processed = run_worker(
+            worker=worker, chunk_size=options['chunk_size'], poll_interval=options['poll_interval'],
+            once=options['once'], max_jobs=options['max_jobs'],
+        )
+        self.stdout.write(f"Worker {worker} processed {processed} jobs")
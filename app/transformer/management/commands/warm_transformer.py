@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from transformer.transformer import ENGINES
+from transformer.warmup import warm_compiled_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile templates in bulk and report the time and memory it takes. "
+        "Servers warm their own cache at startup with TRANSFORMER_WARM_START; this command measures what that costs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Only compile the most recently updated templates, this many of them.")
+        parser.add_argument('--engine', choices=ENGINES, default=None,
+                            help="Engine to prepare the plans for (default: the TRANSFORMER_ENGINE setting).")
+
+    def handle(self, *args, **options):
+        report = warm_compiled_templates(limit=options['limit'], engine=options['engine'])
+        self.stdout.write(
+            f"Compiled {report['templates']} templates ({report['mappings']} mappings) in {report['seconds']:.3f}s"
+        )
+        self.stdout.write(
+            f"Plans hold {report['memory_kb']:.1f} KiB, peak {report['peak_memory_kb']:.1f} KiB while compiling"
+        )
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2024-10-04 10:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('data_template_engine', '0006_datatemplate_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransformJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('processed_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', max_length=255)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='data_template_engine.datatemplate')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransformJobResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('data', models.JSONField(null=True)),
+                ('error', models.TextField(null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='transformer.transformjob')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransformJobRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('input', models.JSONField(null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='records', to='transformer.transformjob')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='transformjobresult',
+            constraint=models.UniqueConstraint(fields=('job', 'index'), name='unique_transform_job_result'),
+        ),
+        migrations.AddConstraint(
+            model_name='transformjobrecord',
+            constraint=models.UniqueConstraint(fields=('job', 'index'), name='unique_transform_job_record'),
+        ),
+    ]
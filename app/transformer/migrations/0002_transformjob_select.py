@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2024-10-05 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transformjob',
+            name='select',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
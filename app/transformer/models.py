@@ -1,3 +1,60 @@
 from django.db import models
+from data_template_engine.models import DataTemplate
 
-# Create your models here.
+
+class TransformJob(models.Model):
+    """
+    A transform of many records that runs in the background, on a transform_worker process.
+
+    A job is claimed by one worker at a time and processed in chunks. Every chunk's results are written
+    together with the job's checkpoint (processed_count), so a job whose worker died is resumed by another
+    worker from its last chunk, once its lease (heartbeat_at) has expired.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    template = models.ForeignKey(DataTemplate, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING, db_index=True)
+    record_count = models.PositiveIntegerField(default=0)
+    # Checkpoint: the records before this index have their results stored
+    processed_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # Destination paths the output is limited to, as in '?select=' (see transformer.plan.parse_selection)
+    select = models.TextField(blank=True, default='')
+    # Why the job as a whole failed, as opposed to the errors of single records
+    error = models.TextField(blank=True, default='')
+    # The worker holding the job and when it last checkpointed
+    worker = models.CharField(max_length=255, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+class TransformJobRecord(models.Model):
+    """
+    One input record of a job, deleted once the job is done.
+    """
+    job = models.ForeignKey(TransformJob, on_delete=models.CASCADE, related_name='records')
+    index = models.PositiveIntegerField()
+    input = models.JSONField(null=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['job', 'index'], name='unique_transform_job_record')]
+
+
+class TransformJobResult(models.Model):
+    """
+    The result of one input record of a job, in the {"data": ..., "error": ...} shape of the batch API.
+    """
+    job = models.ForeignKey(TransformJob, on_delete=models.CASCADE, related_name='results')
+    index = models.PositiveIntegerField()
+    data = models.JSONField(null=True)
+    error = models.TextField(null=True)
+
+    class Meta:
+        # A chunk can only be stored once, whichever worker processed it
+        constraints = [models.UniqueConstraint(fields=['job', 'index'], name='unique_transform_job_result')]
@@ -0,0 +1,136 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+
+from .transformer import Transformer
+
+# Compiled template shipped to each worker process once, by the pool initializer
+_worker_plan = None
+
+
+def _init_worker(plan):
+    global _worker_plan
+    _worker_plan = plan
+
+
+def _transform_chunk(records):
+    return list(Transformer().apply_plan_many(_worker_plan, records))
+
+
+def _chunked(records, chunk_size):
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_parallel_workers():
+    """
+    Number of worker processes used by parallel transforms, from the TRANSFORMER_PARALLEL_WORKERS setting.
+    0 means one worker per CPU core, 1 disables parallel execution.
+    """
+    workers = getattr(settings, 'TRANSFORMER_PARALLEL_WORKERS', 1)
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def get_parallel_chunk_size():
+    """
+    Number of records sent to a worker at a time, from the TRANSFORMER_PARALLEL_CHUNK_SIZE setting.
+    """
+    return getattr(settings, 'TRANSFORMER_PARALLEL_CHUNK_SIZE', 500)
+
+
+def start_pool(plan, workers=None):
+    """
+    Start worker processes holding a compiled template, for reuse across many calls to transform_parallel.
+
+    Purpose:
+        The plan is pickled and shipped to every worker once, when the pool starts. A caller transforming many
+        batches with the same plan (e.g. the checkpointed chunks of a job) starts one pool and passes it to
+        every call instead of paying the process start-up each time. The workers only hold this plan: start a
+        new pool when the plan changes.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template the workers apply.
+        - workers (int): Number of worker processes. Defaults to get_parallel_workers().
+
+    Returns:
+        - ProcessPoolExecutor: The pool. The caller shuts it down.
+    """
+    return ProcessPoolExecutor(max_workers=workers or get_parallel_workers(),
+                               initializer=_init_worker, initargs=(plan,))
+
+
+def _iter_pool_results(executor, records, workers, chunk_size):
+    pending = deque()
+    for chunk in _chunked(records, chunk_size):
+        pending.append(executor.submit(_transform_chunk, chunk))
+        if len(pending) >= workers * 2:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def iter_transform_parallel(plan, records, workers=None, chunk_size=None):
+    """
+    Apply a compiled template to many records using a pool of worker processes.
+
+    Purpose:
+        CPU-bound transforms in a single process are capped by the GIL. This splits the input into chunks,
+        transforms the chunks in worker processes and yields the results back in input order. The compiled
+        template is pickled and shipped to every worker once, when the pool starts, not with every chunk.
+        At most two chunks per worker are in flight, so records can come from a generator of any length.
+
+    Where it is used:
+        Only in offline, single-threaded processes: the transform_worker command (see transformer.jobs) and
+        benchmarks; transform_file runs its own pool the same way. The pool forks its workers, which is not
+        safe in web server processes that serve other requests on threads (runserver, gunicorn gthread,
+        uvicorn): locks held by those threads would be copied into the children in a locked state. A pool per
+        request would also pay the process start-up every time. The HTTP endpoints therefore transform in the
+        serving process. The forked workers only receive records: they never use the database connection
+        they inherit, and multiprocessing ends them with os._exit, so it is not closed underneath the parent.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template to apply.
+        - records (iterable): The input records.
+        - workers (int): Number of worker processes. Defaults to get_parallel_workers().
+        - chunk_size (int): Number of records per chunk. Defaults to get_parallel_chunk_size().
+
+    Yields:
+        - (output_data, error) tuples in input order, exactly as Transformer.apply_plan_many does.
+    """
+    workers = workers or get_parallel_workers()
+    chunk_size = chunk_size or get_parallel_chunk_size()
+    with start_pool(plan, workers) as executor:
+        yield from _iter_pool_results(executor, records, workers, chunk_size)
+
+
+def transform_parallel(plan, records, workers=None, chunk_size=None, executor=None):
+    """
+    Apply a compiled template to a list of records in parallel and return all results.
+
+    Without an executor, falls back to the sequential path when parallel execution is disabled (one worker)
+    or the input fits in a single chunk, where starting a pool would cost more than it saves. With an
+    executor from start_pool, which must hold this plan, the pool is already running: the records are
+    spread over all its workers, in chunks of at most chunk_size.
+
+    Parameters:
+        - executor (ProcessPoolExecutor, optional): A running pool from start_pool(plan, workers).
+
+    Returns:
+        - list: (output_data, error) tuples in input order.
+    """
+    workers = workers or get_parallel_workers()
+    chunk_size = chunk_size or get_parallel_chunk_size()
+    if executor is not None and workers > 1:
+        chunk_size = min(chunk_size, -(-len(records) // workers))
+        if len(records) > chunk_size:
+            return list(_iter_pool_results(executor, records, workers, chunk_size))
+    if workers <= 1 or len(records) <= chunk_size:
+        return list(Transformer().apply_plan_many(plan, records))
+    return list(iter_transform_parallel(plan, records, workers, chunk_size))
@@ -0,0 +1,459 @@
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from .coercion import get_converter
+
+
+@dataclass(frozen=True)
+class CompiledMapping:
+    """
+    A single source -> destination rule of a template with its paths already split.
+
+    Attributes:
+        - source_path (tuple): Path to read from the input data. Example: ('candidate', 'first_name')
+        - destination_path (tuple): Path to write in the output data. Example: ('Candidate Details', 'First Name')
+        - children (CompiledTemplate, optional): Plan of the nested mappings. When set, the value found at
+                                                 source_path is a list (or a single object) and every element
+                                                 is transformed with this plan, with paths relative to the element.
+                                                 Example: ('candidate', 'employments') -> ('Employments',) with
+                                                 children ('company',) -> ('Company',)
+        - data_type (str, optional): Field.data_type of the destination field. Example: 'Integer'
+    """
+    source_path: tuple
+    destination_path: tuple
+    children: 'CompiledTemplate' = None
+    data_type: str = None
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    Immutable, ready-to-run form of a DataTemplate.
+
+    Purpose:
+        Holds everything the Transformer needs to apply a template so that the hot path
+        never touches the database or re-parses field paths.
+
+    Attributes:
+        - template_id (int): Primary key of the DataTemplate the plan was built from.
+        - version (int): DataTemplate.version at compile time. A plan is only reused while it matches.
+        - mappings (tuple): CompiledMapping objects in the order they are applied.
+        - projection (tuple, optional): For plans pruned by project_plan, the destination paths they were
+                                        pruned to. Example: (('Candidate Details', 'First Name'), ('Address',))
+
+    Derived at compile time (see build_source_trie and build_destination_trie):
+        - source_nodes (tuple): The distinct source path prefixes, as a trie in depth-first order.
+        - source_leaves (tuple): For every mapping, the source trie node holding its value.
+        - destination_nodes (tuple): The intermediate output dicts shared by the destination paths, as a trie.
+        - destination_slots (tuple): For every mapping, where in that trie its value is written.
+        - converters (tuple): For every mapping, the converter bound to its data_type (see transformer.coercion),
+                              or None when its values are passed through. Only used when coercion is enabled.
+    """
+    template_id: int
+    version: int
+    mappings: tuple
+    projection: tuple = None
+    source_nodes: tuple = field(init=False, repr=False, compare=False)
+    source_leaves: tuple = field(init=False, repr=False, compare=False)
+    destination_nodes: tuple = field(init=False, repr=False, compare=False)
+    destination_slots: tuple = field(init=False, repr=False, compare=False)
+    converters: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        source_nodes, source_leaves = build_source_trie(self.mappings)
+        object.__setattr__(self, 'source_nodes', source_nodes)
+        object.__setattr__(self, 'source_leaves', source_leaves)
+        destination_nodes, destination_slots = build_destination_trie(self.mappings)
+        object.__setattr__(self, 'destination_nodes', destination_nodes)
+        object.__setattr__(self, 'destination_slots', destination_slots)
+        # Nested mappings produce objects, whatever the type of their destination field
+        object.__setattr__(self, 'converters', tuple(
+            None if mapping.children is not None else get_converter(mapping.data_type) for mapping in self.mappings
+        ))
+
+    @cached_property
+    def transform_function(self):
+        """
+        Python function generated for this plan by the 'codegen' engine, built on first use and cached with the plan.
+        """
+        from .codegen import generate_transform_function
+        return generate_transform_function(self)
+
+    @cached_property
+    def coercing_transform_function(self):
+        """
+        Same as transform_function, but converting every value with the plan's converters. It takes the list
+        coercion failures are collected in as its second argument.
+        """
+        from .codegen import generate_transform_function
+        return generate_transform_function(self, coerce=True)
+
+    def __getstate__(self):
+        # Generated functions cannot be pickled; worker processes regenerate them on first use
+        state = self.__dict__.copy()
+        state.pop('transform_function', None)
+        state.pop('coercing_transform_function', None)
+        return state
+
+
+def build_source_trie(mappings):
+    """
+    Group the source paths of a template into a prefix trie, numbered in depth-first order.
+
+    Purpose:
+        Twenty mappings under 'candidate.address.*' would otherwise walk candidate -> address twenty times.
+        With the trie every distinct prefix is looked up once per record, and because a node's descendants
+        directly follow it, a missing value lets the engines skip its whole subtree in one jump.
+
+    Parameters:
+        - mappings (tuple): CompiledMapping objects of the template.
+
+    Returns:
+        - nodes (tuple): (parent_index, key, subtree_end) per node. Node 0 is the input record itself,
+                         (None, None, len(nodes)); the descendants of node i are the nodes i+1 .. subtree_end-1.
+                         Example: ('candidate', 'first_name') creates node 1 = (0, 'candidate', 3)
+                         and node 2 = (1, 'first_name', 3).
+        - leaves (tuple): Index of the node holding the value of each mapping.
+    """
+    # Build the trie as nested dicts first, {key: {child_key: ...}}, keeping first-seen order
+    root = {}
+    for mapping in mappings:
+        children = root
+        for part in mapping.source_path:
+            children = children.setdefault(part, {})
+
+    nodes = [None]
+    index = {}
+
+    def number(children, parent, prefix):
+        for key, grandchildren in children.items():
+            node = len(nodes)
+            nodes.append(None)
+            path = prefix + (key,)
+            index[path] = node
+            number(grandchildren, node, path)
+            nodes[node] = (parent, key, len(nodes))
+
+    number(root, 0, ())
+    nodes[0] = (None, None, len(nodes))
+    leaves = tuple(index[mapping.source_path] for mapping in mappings)
+    return tuple(nodes), leaves
+
+
+def build_destination_trie(mappings):
+    """
+    Group the destination paths of a template into a prefix trie of intermediate output dicts.
+
+    Purpose:
+        Templates usually write dozens of fields under the same sections, e.g. 'Candidate Details.*'.
+        Numbering every distinct intermediate dict once lets the engines create each of them at most once
+        per record and assign leaves straight into their parent, instead of walking from the output root
+        for every mapping.
+
+    Parameters:
+        - mappings (tuple): CompiledMapping objects of the template.
+
+    Returns:
+        - nodes (tuple): (parent_index, key) per trie node. Node 0 is the output dict itself, (None, None).
+                         Example: ('Candidate Details', 'First Name') creates node 1 = (0, 'Candidate Details').
+        - slots (tuple): (parent_index, leaf_key, stale_nodes) per mapping. stale_nodes lists the nodes at or
+                         below the written path: writing the leaf replaces whatever dict was stored there, so
+                         those nodes must be looked up again by later mappings.
+    """
+    index = {(): 0}
+    nodes = [(None, None)]
+    children = [[]]
+    leaves = []
+    for mapping in mappings:
+        path = mapping.destination_path
+        parent = 0
+        for depth in range(1, len(path)):
+            prefix = path[:depth]
+            node = index.get(prefix)
+            if node is None:
+                node = index[prefix] = len(nodes)
+                nodes.append((parent, path[depth - 1]))
+                children.append([])
+                children[parent].append(node)
+            parent = node
+        leaves.append((parent, path[-1], path))
+
+    def subtree(node):
+        found = [node]
+        for child in children[node]:
+            found.extend(subtree(child))
+        return tuple(found)
+
+    slots = tuple(
+        (parent, key, subtree(index[path]) if path in index else ())
+        for parent, key, path in leaves
+    )
+    return tuple(nodes), slots
+
+
+# Per-process cache of compiled plans: {template_id: CompiledTemplate}
+_compiled_templates = {}
+_compile_lock = threading.Lock()
+# Per-process cache of projected plans: {(template_id, projection): CompiledTemplate}, oldest first
+_projected_plans = {}
+# Projections come from query strings, so only this many are kept
+PROJECTED_PLANS_MAX_SIZE = 1000
+
+
+def _mapping_rows(template):
+    # One joined query for all mappings of the template, nested ones included, whatever their number
+    return template.mappings.order_by('pk').values_list(
+        'pk',
+        'parent_mapping_id',
+        'source_field__name',  # Example: 'candidate.first_name'
+        'destination_field__visible_name',  # Example: 'Candidate Details.First Name'
+        'destination_field__data_type',  # Example: 'String'
+    )
+
+
+def _build_compiled_template(template, rows):
+    children_rows = {}
+    for row in rows:
+        children_rows.setdefault(row[1], []).append(row)
+
+    def build(parent_id):
+        # Only mappings reachable from the top level are compiled, so a broken parent chain cannot loop forever
+        mappings = []
+        for pk, _, source_name, destination_name, data_type in children_rows.get(parent_id, ()):
+            children = build(pk) if pk in children_rows else None
+            mappings.append(CompiledMapping(
+                source_path=tuple(source_name.split('.')),
+                destination_path=tuple(destination_name.split('.')),
+                children=children,
+                data_type=data_type,
+            ))
+        return CompiledTemplate(template_id=template.pk, version=template.version, mappings=tuple(mappings))
+
+    return build(None)
+
+
+def _cached_plan(template):
+    plan = _compiled_templates.get(template.pk)
+    if plan is not None and plan.version == template.version:
+        return plan
+    return None
+
+
+def _store_plan(plan):
+    with _compile_lock:
+        current = _compiled_templates.get(plan.template_id)
+        # Never replace a plan compiled for a newer version of the template
+        if current is None or current.version <= plan.version:
+            _compiled_templates[plan.template_id] = plan
+
+
+def compile_template(template):
+    """
+    Build a CompiledTemplate from a DataTemplate instance.
+
+    Purpose:
+        Loads every mapping of the template together with its source and destination field names
+        in a single joined query, no matter how many mappings the template has.
+
+    Parameters:
+        - template (DataTemplate): The template whose mappings should be compiled.
+
+    Returns:
+        - CompiledTemplate: The compiled plan for the current version of the template.
+    """
+    return _build_compiled_template(template, _mapping_rows(template))
+
+
+def compile_templates(templates, batch_size=500):
+    """
+    Build the CompiledTemplates of many DataTemplates at once.
+
+    Purpose:
+        Same as compile_template for every template, but the mappings of up to batch_size templates
+        are loaded together in one joined query instead of one query per template.
+
+    Parameters:
+        - templates (iterable of DataTemplate): The templates to compile.
+        - batch_size (int): Number of templates whose mappings are read per query.
+
+    Returns:
+        - list: The compiled plans, in the order of the templates.
+    """
+    from data_template_engine.models import FieldMapping
+
+    templates = list(templates)
+    plans = []
+    for start in range(0, len(templates), batch_size):
+        batch = templates[start:start + batch_size]
+        rows_by_template = {template.pk: [] for template in batch}
+        rows = FieldMapping.objects.filter(template__in=batch).order_by('pk').values_list(
+            'template_id', 'pk', 'parent_mapping_id', 'source_field__name', 'destination_field__visible_name',
+            'destination_field__data_type',
+        )
+        for template_id, *row in rows:
+            rows_by_template[template_id].append(row)
+        plans.extend(_build_compiled_template(template, rows_by_template[template.pk]) for template in batch)
+    return plans
+
+
+def store_compiled_templates(plans):
+    """
+    Put already compiled plans in this process's cache, e.g. after compile_templates.
+    """
+    for plan in plans:
+        _store_plan(plan)
+
+
+async def acompile_template(template):
+    """
+    Async version of compile_template, loading the mappings through Django's async ORM.
+    """
+    rows = [row async for row in _mapping_rows(template)]
+    return _build_compiled_template(template, rows)
+
+
+def get_compiled_template(template):
+    """
+    Return the compiled plan for a template, compiling it only on a cache miss.
+
+    Purpose:
+        Plans are cached per process and keyed by template id and version, so a warm template
+        is applied without any database queries. A template whose version moved on (because it
+        or one of its mappings or fields changed) is transparently recompiled.
+
+    Parameters:
+        - template (DataTemplate): The template to look up.
+
+    Returns:
+        - CompiledTemplate: The cached or freshly compiled plan.
+    """
+    plan = _cached_plan(template)
+    if plan is None:
+        plan = compile_template(template)
+        _store_plan(plan)
+    return plan
+
+
+async def aget_compiled_template(template):
+    """
+    Async version of get_compiled_template. A warm template is returned without awaiting anything.
+    """
+    plan = _cached_plan(template)
+    if plan is None:
+        plan = await acompile_template(template)
+        _store_plan(plan)
+    return plan
+
+
+def parse_selection(value):
+    """
+    Parse a projection such as 'Candidate Details.First Name,Address' (the '?select=' query parameter).
+
+    Returns:
+        - tuple: The distinct destination paths, split and sorted so equal projections share a cache entry,
+                 e.g. (('Address',), ('Candidate Details', 'First Name')), or None when nothing is selected.
+    """
+    if not value:
+        return None
+    paths = {tuple(path.strip().split('.')) for path in value.split(',') if path.strip()}
+    return tuple(sorted(paths)) or None
+
+
+def _project_mappings(mappings, selection):
+    # The mappings that feed the selected paths, with the selected paths that something feeds
+    kept = []
+    matched = set()
+    for mapping in mappings:
+        destination = mapping.destination_path
+        whole = [path for path in selection if destination[:len(path)] == path]
+        below = [
+            path for path in selection if len(path) > len(destination) and path[:len(destination)] == destination
+        ]
+        if whole or (below and mapping.children is None):
+            # The mapping writes at or below a selected path, or writes a value a selected path points into
+            kept.append(mapping)
+            matched.update(whole, below)
+        elif below:
+            # Only part of every element of the nested list is selected
+            child_selection = tuple(path[len(destination):] for path in below)
+            child_mappings, child_matched = _project_mappings(mapping.children.mappings, child_selection)
+            if child_mappings:
+                children = mapping.children
+                kept.append(CompiledMapping(
+                    source_path=mapping.source_path,
+                    destination_path=destination,
+                    children=CompiledTemplate(template_id=children.template_id, version=children.version,
+                                              mappings=child_mappings, projection=child_selection),
+                    data_type=mapping.data_type,
+                ))
+                matched.update(destination + path for path in child_matched)
+    return tuple(kept), matched
+
+
+def project_plan(plan, selection):
+    """
+    Prune a compiled plan to the mappings that feed the selected destination paths.
+
+    Purpose:
+        Callers that only need one section of a large template's output should not pay for the rest.
+        A mapping is kept when it writes at or below a selected path, or writes a value that a selected path
+        points into (that value is kept whole). Nested mappings are pruned the same way, relative to every
+        element. Since mappings writing to unrelated paths cannot affect the selected ones, the output holds
+        exactly what the full plan writes at and above the selected paths.
+
+    Parameters:
+        - plan (CompiledTemplate): The plan to prune.
+        - selection (tuple): Destination paths, as returned by parse_selection.
+
+    Returns:
+        - CompiledTemplate: A plan of the same template and version with only the needed mappings.
+
+    Raises:
+        - ValueError: If no mapping writes at, above or below one of the selected paths.
+    """
+    mappings, matched = _project_mappings(plan.mappings, selection)
+    unknown = [path for path in selection if path not in matched]
+    if unknown:
+        raise ValueError(', '.join(f'Unknown destination path "{".".join(path)}"' for path in unknown))
+    return CompiledTemplate(template_id=plan.template_id, version=plan.version, mappings=mappings,
+                            projection=selection)
+
+
+def get_projected_plan(plan, selection):
+    """
+    Return project_plan(plan, selection), pruning only on a cache miss.
+
+    Purpose:
+        Projected plans are cached per (template, projection) and validated against the template version like
+        the full plans, so a repeated projection costs a dict lookup and its generated code is reused.
+    """
+    key = (plan.template_id, selection)
+    projected = _projected_plans.get(key)
+    if projected is not None and projected.version == plan.version:
+        return projected
+    projected = project_plan(plan, selection)
+    with _compile_lock:
+        _projected_plans.pop(key, None)
+        _projected_plans[key] = projected
+        while len(_projected_plans) > PROJECTED_PLANS_MAX_SIZE:
+            del _projected_plans[next(iter(_projected_plans))]
+    return projected
+
+
+def invalidate_compiled_template(template_id):
+    """
+    Drop the cached plan of a single template, and its projections, if there are any.
+    """
+    _compiled_templates.pop(template_id, None)
+    with _compile_lock:
+        for key in [key for key in _projected_plans if key[0] == template_id]:
+            del _projected_plans[key]
+
+
+def clear_compiled_templates():
+    """
+    Drop every cached plan in this process.
+    """
+    _compiled_templates.clear()
+    _projected_plans.clear()
@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Per-process results, least recently used first: {key: (expires_at, output_data)}
+_results = OrderedDict()
+_results_lock = threading.Lock()
+_stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def result_cache_enabled():
+    """
+    Whether transform results are cached, from the TRANSFORMER_RESULT_CACHE setting.
+    """
+    return getattr(settings, 'TRANSFORMER_RESULT_CACHE', False)
+
+
+def result_cache_key(plan, input_data, coerce=False):
+    """
+    Build the cache key of one transform.
+
+    Purpose:
+        The key is content-addressed: it holds the template id and the version of the compiled plan, so any
+        change to the template, its mappings or their fields moves its results to new keys and the old ones are
+        never read again, and a hash of the canonical JSON of the input (keys sorted), so a resent payload
+        finds its result even when its keys come in another order.
+
+    Parameters:
+        - plan (CompiledTemplate): The compiled template, possibly projected (see plan.project_plan).
+        - input_data: The input record.
+        - coerce (bool): Whether values are coerced, which changes the output.
+
+    Returns:
+        - str: The key, or None when the input is not JSON serialisable and cannot be cached.
+    """
+    try:
+        canonical = json_codec.canonical_dumps(input_data)
+    except TypeError:
+        return None
+    hasher = hashlib.blake2b(canonical, digest_size=16)
+    if plan.projection is not None:
+        # Projected plans of a template share its id and version but write less
+        hasher.update(repr(plan.projection).encode())
+    return f'transformer:result:{plan.template_id}:{plan.version}:{int(coerce)}:{hasher.hexdigest()}'
+
+
+def _shared_cache():
+    # Optional second tier, shared by every process using the same Django cache backend
+    alias = getattr(settings, 'TRANSFORMER_RESULT_CACHE_BACKEND', '')
+    return caches[alias] if alias else None
+
+
+def _count(stat):
+    with _results_lock:
+        _stats[stat] += 1
+
+
+def _get_local(key):
+    now = time.monotonic()
+    with _results_lock:
+        entry = _results.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _results.move_to_end(key)
+                _stats['hits'] += 1
+                return entry[1]
+            del _results[key]
+    return None
+
+
+def _count_shared(key, output_data):
+    if output_data is None:
+        _count('misses')
+        return None
+    _store_local(key, output_data)
+    with _results_lock:
+        _stats['hits'] += 1
+        _stats['shared_hits'] += 1
+    return output_data
+
+
+def get_cached_result(key):
+    """
+    Look a result up, in this process first and then in the shared Django cache, if one is configured.
+
+    Returns:
+        - The cached output data, or None on a miss. Cached results are shared and must not be modified.
+    """
+    output_data = _get_local(key)
+    if output_data is not None:
+        return output_data
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            output_data = shared.get(key)
+        except Exception:
+            logger.warning("Shared result cache lookup failed", exc_info=True)
+    return _count_shared(key, output_data)
+
+
+async def aget_cached_result(key):
+    """
+    get_cached_result for async views: the shared Django cache is read with cache.aget, so database backed
+    caches are not called from the event loop and network ones do not block it.
+    """
+    output_data = _get_local(key)
+    if output_data is not None:
+        return output_data
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            output_data = await shared.aget(key)
+        except Exception:
+            logger.warning("Shared result cache lookup failed", exc_info=True)
+    return _count_shared(key, output_data)
+
+
+def _store_local(key, output_data):
+    ttl = getattr(settings, 'TRANSFORMER_RESULT_CACHE_TTL', 300)
+    max_size = getattr(settings, 'TRANSFORMER_RESULT_CACHE_SIZE', 10000)
+    with _results_lock:
+        _results[key] = (time.monotonic() + ttl, output_data)
+        _results.move_to_end(key)
+        while len(_results) > max_size:
+            _results.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def store_result(key, output_data):
+    """
+    Cache a result in this process (size and TTL bounded, least recently used evicted first) and in the
+    shared Django cache, if one is configured.
+    """
+    _store_local(key, output_data)
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            shared.set(key, output_data, getattr(settings, 'TRANSFORMER_RESULT_CACHE_TTL', 300))
+        except Exception:
+            logger.warning("Shared result cache update failed", exc_info=True)
+
+
+async def astore_result(key, output_data):
+    """
+    store_result for async views, writing the shared Django cache with cache.aset.
+    """
+    _store_local(key, output_data)
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            await shared.aset(key, output_data, getattr(settings, 'TRANSFORMER_RESULT_CACHE_TTL', 300))
+        except Exception:
+            logger.warning("Shared result cache update failed", exc_info=True)
+
+
+def cached_apply_plan(transformer, plan, input_data):
+    """
+    Transformer.apply_plan, answered from the result cache when the same input was transformed before.
+
+    Purpose:
+        Upstream systems resend identical payloads (retries, duplicate webhooks). With TRANSFORMER_RESULT_CACHE
+        enabled they cost a hash of the input instead of another run of the template. Only successful results
+        are cached; without the setting this is exactly transformer.apply_plan.
+
+    Parameters:
+        - transformer (Transformer): The transformer to run on a miss.
+        - plan (CompiledTemplate): The compiled template to apply.
+        - input_data: The input record.
+
+    Returns:
+        - output_data (dict): The transformed data. Cached results are shared and must not be modified.
+    """
+    if not result_cache_enabled():
+        return transformer.apply_plan(plan, input_data)
+    key = result_cache_key(plan, input_data, transformer.coerce)
+    if key is None:
+        return transformer.apply_plan(plan, input_data)
+    output_data = get_cached_result(key)
+    if output_data is None:
+        output_data = transformer.apply_plan(plan, input_data)
+        store_result(key, output_data)
+    return output_data
+
+
+async def acached_apply_plan(transformer, plan, input_data):
+    """
+    cached_apply_plan for async views.
+
+    Purpose:
+        The same lookups as cached_apply_plan, with the shared tier read and written through the async cache
+        API (cache.aget/aset). The synchronous calls would fail on database backed caches
+        (SynchronousOnlyOperation) and block the event loop on Redis or memcached.
+
+    Returns:
+        - output_data (dict): The transformed data. Cached results are shared and must not be modified.
+    """
+    if not result_cache_enabled():
+        return transformer.apply_plan(plan, input_data)
+    key = result_cache_key(plan, input_data, transformer.coerce)
+    if key is None:
+        return transformer.apply_plan(plan, input_data)
+    output_data = await aget_cached_result(key)
+    if output_data is None:
+        output_data = transformer.apply_plan(plan, input_data)
+        await astore_result(key, output_data)
+    return output_data
+
+
+def get_result_cache_stats():
+    """
+    Counters of this process's result cache since it started (or was last cleared).
+
+    Returns:
+        - dict: {"enabled": true, "hits": 120, "shared_hits": 20, "misses": 30, "hit_rate": 0.8,
+                 "evictions": 0, "size": 30, "max_size": 10000, "ttl": 300}
+          shared_hits are the hits served by the shared Django cache tier, included in hits.
+    """
+    with _results_lock:
+        stats = dict(_stats, size=len(_results))
+    lookups = stats['hits'] + stats['misses']
+    stats.update(
+        enabled=result_cache_enabled(),
+        hit_rate=stats['hits'] / lookups if lookups else 0.0,
+        max_size=getattr(settings, 'TRANSFORMER_RESULT_CACHE_SIZE', 10000),
+        ttl=getattr(settings, 'TRANSFORMER_RESULT_CACHE_TTL', 300),
+    )
+    return stats
+
+
+def clear_result_cache():
+    """
+    Drop every cached result of this process and reset its counters. The shared tier is left alone.
+    """
+    with _results_lock:
+        _results.clear()
+        for stat in _stats:
+            _stats[stat] = 0
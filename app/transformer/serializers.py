@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import TransformJob, TransformJobResult
+
+
+class TransformJobSerializer(serializers.ModelSerializer):
+    """
+    Status of a background transform job, as polled by clients.
+    """
+    class Meta:
+        model = TransformJob
+        fields = ['id', 'template', 'select', 'status', 'record_count', 'processed_count', 'error_count', 'error',
+                  'created_at', 'started_at', 'finished_at']
+
+
+class TransformJobResultSerializer(serializers.ModelSerializer):
+    """
+    The result of one input record of a job. index is the position of the record in the submitted array.
+    """
+    class Meta:
+        model = TransformJobResult
+        fields = ['index', 'data', 'error']
@@ -0,0 +1,68 @@
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from attribute_library.models import Field
+from data_template_engine.models import DataTemplate, FieldMapping
+from .plan import invalidate_compiled_template
+
+
+def bump_template_versions(template_ids):
+    """
+    Increment the version (and last-modified stamp) of the given templates and drop their cached plans.
+
+    Parameters:
+        - template_ids (iterable): Primary keys of the templates that changed.
+    """
+    template_ids = set(template_ids)
+    if not template_ids:
+        return
+    DataTemplate.objects.filter(pk__in=template_ids).update(version=F('version') + 1, updated_at=timezone.now())
+    for template_id in template_ids:
+        invalidate_compiled_template(template_id)
+
+
+@receiver(pre_save, sender=DataTemplate)
+def bump_version_on_template_save(sender, instance, **kwargs):
+    # Start from the stored version so a stale in-memory instance can never move it backwards
+    if instance.pk is None:
+        return
+    current = DataTemplate.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
+    if current is not None:
+        instance.version = current + 1
+
+
+@receiver(post_save, sender=DataTemplate)
+@receiver(post_delete, sender=DataTemplate)
+def invalidate_on_template_change(sender, instance, **kwargs):
+    invalidate_compiled_template(instance.pk)
+
+
+@receiver(post_save, sender=FieldMapping)
+def invalidate_on_mapping_change(sender, instance, **kwargs):
+    bump_template_versions([instance.template_id])
+
+
+@receiver(post_delete, sender=FieldMapping)
+def invalidate_on_mapping_delete(sender, instance, origin=None, **kwargs):
+    # A queryset or cascading delete sends this once per row; bump every template only once per delete
+    bumped = getattr(origin, '_bumped_template_ids', None)
+    if bumped is None:
+        bumped = set()
+        if origin is not None:
+            origin._bumped_template_ids = bumped
+    if instance.template_id not in bumped:
+        bumped.add(instance.template_id)
+        bump_template_versions([instance.template_id])
+
+
+@receiver(post_save, sender=Field)
+def invalidate_on_field_change(sender, instance, created, **kwargs):
+    # A new field cannot be referenced by any mapping yet
+    if created:
+        return
+    template_ids = FieldMapping.objects.filter(
+        Q(source_field=instance) | Q(destination_field=instance)
+    ).values_list('template_id', flat=True)
+    bump_template_versions(template_ids)
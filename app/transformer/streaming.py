@@ -0,0 +1,66 @@
+import json
+
+from . import json_codec
+
+
+def iter_ndjson(lines):
+    """
+    Decode newline-delimited JSON one line at a time.
+
+    Purpose:
+        Turns an iterable of raw lines (a file, an HTTP request stream, ...) into decoded records
+        without ever holding more than one line in memory. Blank lines are skipped.
+
+    Parameters:
+        - lines (iterable): Lines as bytes or str.
+
+    Yields:
+        - The decoded record, or a ValueError describing the problem for lines that are not valid JSON,
+          so one bad line does not abort the whole stream.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Line {line_number}: invalid JSON ({e})")
+
+
+def encode_result(output_data, error):
+    """
+    Encode one transform result as a compact {"data": ..., "error": ...} NDJSON line, without its newline.
+    Shared by the stream endpoint and transform_file, so both write byte-identical lines.
+    """
+    return json_codec.dumps({"data": output_data, "error": error})
+
+
+def encode_ndjson(results, chunk_size=64 * 1024):
+    """
+    Encode transform results as newline-delimited JSON, buffered into chunks.
+
+    Purpose:
+        Each (output_data, error) pair becomes one {"data": ..., "error": ...} line, the same shape
+        the batch endpoint uses per record. Lines are collected until roughly chunk_size bytes are
+        pending and then emitted together, which keeps the number of writes low without buffering
+        the whole output.
+
+    Parameters:
+        - results (iterable): (output_data, error) tuples as produced by Transformer.apply_plan_many.
+        - chunk_size (int): Approximate number of bytes to buffer before emitting a chunk.
+
+    Yields:
+        - bytes: Chunks of encoded NDJSON.
+    """
+    buffer = []
+    buffered = 0
+    for output_data, error in results:
+        line = encode_result(output_data, error) + b"\n"
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
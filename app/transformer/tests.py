@@ -1,3 +1,1046 @@
-from django.test import TestCase
+import copy
+import io
+import json
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from attribute_library.models import Field
+from data_template_engine.models import DataTemplate, FieldMapping
+from .benchmarks import bench_endpoints, build_plan, build_records, compare_reports, run_engine_suite
+from .coercion import INVALID, CoercionError, get_converter, to_integer
+from .columnar import transform_rows, transform_table
+from .files import transform_file
+from .jobs import JobLost, claim_job, process_job, run_worker
+from .models import TransformJob, TransformJobRecord, TransformJobResult
+from .result_cache import cached_apply_plan, clear_result_cache, get_result_cache_stats
+from .parallel import transform_parallel
+from .plan import (
+    CompiledMapping, CompiledTemplate, aget_compiled_template, clear_compiled_templates, compile_template,
+    compile_templates, get_compiled_template, get_projected_plan, parse_selection, project_plan,
+)
+from .streaming import encode_ndjson
+from .transformer import ENGINES, Transformer
+from .warmup import warm_compiled_templates
+
+
+class TemplateTestCase(TestCase):
+    """
+    Base test case providing a small candidate template and a helper to add mappings to it.
+    """
+    def setUp(self):
+        clear_compiled_templates()
+        self.template = DataTemplate.objects.create(name='Candidate Template')
+        self.add_mapping('candidate.first_name', 'Candidate Details.First Name')
+        self.add_mapping('candidate.last_name', 'Candidate Details.Last Name')
+        self.template.refresh_from_db()
+
+    def add_mapping(self, source, destination):
+        source_field = Field.objects.create(name=source, visible_name=source, data_type='String')
+        destination_field = Field.objects.create(name=destination, visible_name=destination, data_type='String')
+        return FieldMapping.objects.create(
+            template=self.template, source_field=source_field, destination_field=destination_field
+        )
+
+
+class TransformerTestCase(TemplateTestCase):
+    def test_transform(self):
+        output = Transformer().transform(
+            {'candidate': {'first_name': 'John', 'last_name': 'Doe'}}, self.template
+        )
+        self.assertEqual(output, {'Candidate Details': {'First Name': 'John', 'Last Name': 'Doe'}})
+
+    def test_missing_values_are_skipped(self):
+        output = Transformer().transform({'candidate': {'first_name': 'John'}}, self.template)
+        self.assertEqual(output, {'Candidate Details': {'First Name': 'John'}})
+
+
+class CompiledTemplateTestCase(TemplateTestCase):
+    def test_plan_holds_split_paths(self):
+        plan = get_compiled_template(self.template)
+        self.assertEqual(plan.mappings[0].source_path, ('candidate', 'first_name'))
+        self.assertEqual(plan.mappings[0].destination_path, ('Candidate Details', 'First Name'))
+
+    def test_warm_template_runs_without_queries(self):
+        transformer = Transformer()
+        transformer.transform({}, self.template)
+        with self.assertNumQueries(0):
+            transformer.transform({'candidate': {'first_name': 'John'}}, self.template)
+
+    def test_mapping_change_invalidates_plan(self):
+        get_compiled_template(self.template)
+        self.add_mapping('candidate.email', 'Contact.Email')
+        self.template.refresh_from_db()
+        plan = get_compiled_template(self.template)
+        self.assertEqual(len(plan.mappings), 3)
+
+    def test_field_change_invalidates_plan(self):
+        get_compiled_template(self.template)
+        field = Field.objects.get(name='candidate.first_name')
+        field.name = 'candidate.given_name'
+        field.save()
+        self.template.refresh_from_db()
+        plan = get_compiled_template(self.template)
+        self.assertEqual(plan.mappings[0].source_path, ('candidate', 'given_name'))
+
+    def test_stale_template_save_does_not_roll_back_version(self):
+        stale = DataTemplate.objects.get(pk=self.template.pk)
+        self.add_mapping('candidate.email', 'Contact.Email')
+        bumped_version = DataTemplate.objects.get(pk=self.template.pk).version
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertGreater(stale.version, bumped_version)
+        self.template.refresh_from_db()
+        self.assertEqual(len(get_compiled_template(self.template).mappings), 3)
+
+
+class QueryBudgetTestCase(TemplateTestCase):
+    """
+    Loading a template must cost the same number of queries however many mappings it has.
+    """
+    def assertColdTransformQueries(self, num):
+        clear_compiled_templates()
+        with self.assertNumQueries(num):
+            response = self.client.post(
+                f'/api/transform/{self.template.pk}/', {'candidate': {}}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_compile_is_a_single_query(self):
+        for i in range(50):
+            self.add_mapping(f'candidate.extra_{i}', f'Extra.Field {i}')
+        self.template.refresh_from_db()
+        with self.assertNumQueries(1):
+            plan = get_compiled_template(self.template)
+        self.assertEqual(len(plan.mappings), 52)
+
+    def test_adding_mappings_does_not_add_queries(self):
+        # One query for the template row, one for its compiled mappings
+        self.assertColdTransformQueries(2)
+        for i in range(200):
+            self.add_mapping(f'candidate.extra_{i}', f'Extra.Field {i}')
+        self.assertColdTransformQueries(2)
+
+
+class TransformBatchAPITestCase(TemplateTestCase):
+    def post_batch(self, records):
+        return self.client.post(
+            f'/api/transform/{self.template.pk}/batch/', records, content_type='application/json'
+        )
+
+    def test_results_keep_input_order_and_report_errors(self):
+        response = self.post_batch([
+            {'candidate': {'first_name': 'John'}},
+            'not a record',
+            {'candidate': {'first_name': 'Jane', 'last_name': 'Doe'}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'count': 3,
+            'error_count': 1,
+            'results': [
+                {'data': {'Candidate Details': {'First Name': 'John'}}, 'error': None},
+                {'data': None, 'error': 'Record must be a JSON object'},
+                {'data': {'Candidate Details': {'First Name': 'Jane', 'Last Name': 'Doe'}}, 'error': None},
+            ],
+        })
+
+    def test_template_is_loaded_once(self):
+        clear_compiled_templates()
+        with self.assertNumQueries(2):
+            self.post_batch([{'candidate': {'first_name': str(i)}} for i in range(100)])
+
+    @override_settings(TRANSFORMER_PARALLEL_WORKERS=2, TRANSFORMER_PARALLEL_CHUNK_SIZE=2)
+    def test_never_starts_worker_processes(self):
+        with mock.patch('transformer.parallel.ProcessPoolExecutor', side_effect=AssertionError('pool started')):
+            response = self.post_batch([{'candidate': {'first_name': str(i)}} for i in range(5)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 5)
+
+    @override_settings(TRANSFORMER_BATCH_MAX_SIZE=2)
+    def test_max_batch_size(self):
+        response = self.post_batch([{}, {}, {}])
+        self.assertEqual(response.status_code, 413)
+
+    def test_body_must_be_an_array(self):
+        response = self.post_batch({'candidate': {}})
+        self.assertEqual(response.status_code, 400)
+
+
+class TransformStreamTestCase(TemplateTestCase):
+    def test_ndjson_round_trip(self):
+        body = (
+            b'{"candidate": {"first_name": "John"}}\n'
+            b'\n'
+            b'{not json}\n'
+            b'{"candidate": {"last_name": "Doe"}}\n'
+        )
+        response = self.client.post(
+            f'/api/transform/{self.template.pk}/stream/', body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(lines[0], {'data': {'Candidate Details': {'First Name': 'John'}}, 'error': None})
+        self.assertIsNone(lines[1]['data'])
+        self.assertIn('Line 3', lines[1]['error'])
+        self.assertEqual(lines[2], {'data': {'Candidate Details': {'Last Name': 'Doe'}}, 'error': None})
+
+    def test_output_is_flushed_in_chunks(self):
+        results = (({'n': i}, None) for i in range(1000))
+        chunks = list(encode_ndjson(results, chunk_size=1024))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks).count(b'\n'), 1000)
+        # Compact, like the lines transform_file writes
+        self.assertTrue(chunks[0].startswith(b'{"data":{"n":0},"error":null}\n'))
+
+    def test_unknown_template(self):
+        response = self.client.post('/api/transform/0/stream/', b'{}\n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 404)
+
+
+class TransformFileTestCase(TemplateTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_input(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def read_output(self, path):
+        with open(path, 'rb') as f:
+            return [json.loads(line) for line in f.read().splitlines()]
+
+    def test_ndjson_and_array_files(self):
+        ndjson = self.write_input('in.ndjson', (
+            b'{"candidate": {"first_name": "John"}}\n'
+            b'\n'
+            b'{not json}\n'
+            b'{"candidate": {"last_name": "Doe"}}'
+        ))
+        array = self.write_input('in.json', (
+            b'[\n{"candidate": {"first_name": "John"}},\n{not json},\n{"candidate": {"last_name": "Doe"}}\n]\n'
+        ))
+        for path in (ndjson, array):
+            output = os.path.join(self.directory, 'out.ndjson')
+            out = io.StringIO()
+            call_command('transform_file', self.template.pk, path, output, workers=1, stdout=out, stderr=io.StringIO())
+            lines = self.read_output(output)
+            self.assertEqual(lines[0], {'data': {'Candidate Details': {'First Name': 'John'}}, 'error': None})
+            self.assertIsNone(lines[1]['data'])
+            self.assertIn('invalid JSON', lines[1]['error'])
+            self.assertEqual(lines[2], {'data': {'Candidate Details': {'Last Name': 'Doe'}}, 'error': None})
+            self.assertIn('3 records (1 errors)', out.getvalue())
+
+    def test_parallel_chunks_keep_input_order(self):
+        plan = build_plan(20, depth=3)
+        records = build_records(plan, 300, density=0.5)
+        path = self.write_input('in.ndjson', b''.join(json.dumps(record).encode() + b'\n' for record in records))
+        expected = [{'data': data, 'error': error} for data, error in Transformer().apply_plan_many(plan, records)]
+        reports = []
+        for workers in (1, 2):
+            output = os.path.join(self.directory, f'out-{workers}.ndjson')
+            report = transform_file(plan, path, output, workers=workers, chunk_bytes=4096, progress=reports.append)
+            self.assertEqual(self.read_output(output), expected)
+            self.assertEqual((report['records'], report['bytes_read']), (300, os.path.getsize(path)))
+        # One progress report per chunk
+        self.assertGreater(len(reports), 2)
+
+    def test_empty_file_and_unknown_template(self):
+        path = self.write_input('empty.ndjson', b'')
+        output = os.path.join(self.directory, 'out.ndjson')
+        call_command('transform_file', self.template.pk, path, output, stdout=io.StringIO())
+        self.assertEqual(self.read_output(output), [])
+        with self.assertRaises(CommandError):
+            call_command('transform_file', 0, path, output)
+
+
+class TransformJobTestCase(TemplateTestCase):
+    def create_job(self, count=5):
+        records = [{'candidate': {'first_name': f'Name {i}'}} for i in range(count)]
+        records[1] = 'not a record'
+        response = self.client.post(f'/api/transform/{self.template.pk}/jobs/', records,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 202, response.content)
+        return response
+
+    def expire_lease(self, job):
+        TransformJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timezone.timedelta(hours=1))
+
+    def test_job_lifecycle(self):
+        response = self.create_job()
+        self.assertEqual(response.json()['status'], 'pending')
+        self.assertEqual(self.client.get(response['Location']).json()['record_count'], 5)
+
+        with self.assertLogs('transformer.jobs', 'INFO') as logs:
+            self.assertEqual(run_worker(worker='test', chunk_size=2, once=True), 1)
+        self.assertIn('done: 5 records, 1 errors', logs.output[0])
+        job = self.client.get(response['Location']).json()
+        self.assertEqual((job['status'], job['processed_count'], job['error_count']), ('done', 5, 1))
+        self.assertFalse(TransformJobRecord.objects.exists())
+
+        url = f"/api/transform/jobs/{job['id']}/results/?limit=3"
+        results = []
+        while url:
+            page = self.client.get(url).json()
+            results.extend(page['results'])
+            url = page['next']
+        self.assertEqual([result['index'] for result in results], list(range(5)))
+        self.assertEqual(results[0], {'index': 0, 'data': {'Candidate Details': {'First Name': 'Name 0'}}, 'error': None})
+        self.assertEqual(results[1]['error'], 'Record must be a JSON object')
+
+    @override_settings(TRANSFORMER_PARALLEL_WORKERS=2)
+    def test_chunks_are_spread_over_one_pool(self):
+        self.create_job(count=7)
+        with mock.patch('transformer.parallel.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool, \
+                mock.patch.object(ProcessPoolExecutor, 'submit', autospec=True,
+                                  side_effect=ProcessPoolExecutor.submit) as submit:
+            # Three checkpoint chunks, each smaller than TRANSFORMER_PARALLEL_CHUNK_SIZE, all through one pool
+            job = process_job(claim_job('test'), 'test', chunk_size=3)
+        self.assertEqual(pool.call_count, 1)
+        # Two pieces for each of the chunks of three records; the last record is not worth a round trip
+        self.assertEqual(submit.call_count, 4)
+        self.assertEqual((job.status, job.processed_count, job.error_count), ('done', 7, 1))
+        results = list(job.results.order_by('index').values_list('data', flat=True))
+        self.assertEqual(results[6], {'Candidate Details': {'First Name': 'Name 6'}})
+        self.assertIsNone(results[1])
+
+    def test_workers_never_share_a_job(self):
+        self.create_job()
+        self.create_job()
+        first, second = claim_job('a'), claim_job('b')
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertIsNone(claim_job('c'))
+
+        # A worker whose lease expired loses the job, and whatever chunk it was writing
+        self.expire_lease(first)
+        with self.assertLogs('transformer.jobs', 'WARNING'):
+            taken_over = claim_job('c')
+        self.assertEqual((taken_over.pk, taken_over.worker), (first.pk, 'c'))
+        with self.assertRaises(JobLost):
+            process_job(first, 'a')
+        self.assertFalse(TransformJobResult.objects.filter(job=first).exists())
+        self.assertEqual(process_job(taken_over, 'c').status, 'done')
+
+    def test_crashed_worker_is_resumed_from_its_checkpoint(self):
+        self.create_job()
+        job = claim_job('a')
+        plan = get_compiled_template(self.template)
+        with mock.patch('transformer.jobs.get_compiled_template', side_effect=[plan, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                process_job(job, 'a', chunk_size=2)
+        self.assertEqual(TransformJob.objects.get(pk=job.pk).processed_count, 2)
+
+        self.assertIsNone(claim_job('b'))
+        self.expire_lease(job)
+        with self.assertLogs('transformer.jobs', 'WARNING') as logs:
+            job = process_job(claim_job('b'), 'b', chunk_size=2)
+        self.assertIn('resuming at record 2', logs.output[0])
+        self.assertEqual((job.status, job.processed_count), ('done', 5))
+        self.assertEqual(list(job.results.order_by('index').values_list('index', flat=True)), list(range(5)))
+
+    def test_failed_job(self):
+        self.create_job()
+        with mock.patch('transformer.jobs.get_compiled_template', side_effect=ValueError('Broken template')):
+            out = io.StringIO()
+            with self.assertLogs('transformer.jobs'):
+                call_command('transform_worker', once=True, worker_id='test', stdout=out)
+        self.assertIn('processed 1 jobs', out.getvalue())
+        job = TransformJob.objects.get()
+        self.assertEqual((job.status, job.error), ('failed', 'Broken template'))
+
+    def test_select_limits_the_results(self):
+        self.add_mapping('email', 'Contact.Email')
+        records = [{'candidate': {'first_name': 'John'}, 'email': 'john@example.com'}]
+        url = f'/api/transform/{self.template.pk}/jobs/?select=Contact, Contact.Email'
+        response = self.client.post(url, records, content_type='application/json')
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()['select'], 'Contact,Contact.Email')
+        job = process_job(claim_job('test'), 'test')
+        self.assertEqual(job.results.get().data, {'Contact': {'Email': 'john@example.com'}})
+
+        url = f'/api/transform/{self.template.pk}/jobs/?select=Contact.Phone'
+        response = self.client.post(url, records, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Contact.Phone', response.json()['data'])
+        self.assertEqual(TransformJob.objects.count(), 1)
+
+    def test_errors(self):
+        response = self.client.post('/api/transform/0/jobs/', [{}], content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(f'/api/transform/{self.template.pk}/jobs/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/transform/jobs/0/').status_code, 404)
+        self.assertEqual(self.client.get('/api/transform/jobs/0/results/').status_code, 404)
+
+
+@override_settings(TRANSFORMER_RESULT_CACHE=True)
+class ResultCacheTestCase(TemplateTestCase):
+    def setUp(self):
+        super().setUp()
+        clear_result_cache()
+        self.url = f'/api/transform/{self.template.pk}/'
+
+    def post(self, data, url=None):
+        response = self.client.post(url or self.url, data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_identical_inputs_are_transformed_once(self):
+        first = {'candidate': {'first_name': 'John', 'last_name': 'Doe'}}
+        reordered = {'candidate': {'last_name': 'Doe', 'first_name': 'John'}}
+        expected = self.post(first)
+        with mock.patch.object(Transformer, 'apply_plan', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.post(reordered), expected)
+            self.assertEqual(self.post(first, url=f'/api/transform/{self.template.pk}/raw/'), expected)
+        stats = self.client.get('/api/transform/cache/').json()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 1, 1))
+
+    def test_template_change_invalidates_results(self):
+        record = {'candidate': {'first_name': 'John'}, 'email': 'john@example.com'}
+        self.post(record)
+        self.add_mapping('email', 'Contact.Email')
+        self.assertEqual(self.post(record)['Contact'], {'Email': 'john@example.com'})
+        self.assertEqual(get_result_cache_stats()['misses'], 2)
+
+    @override_settings(TRANSFORMER_RESULT_CACHE_SIZE=2, TRANSFORMER_RESULT_CACHE_TTL=60)
+    def test_size_and_ttl_bounds(self):
+        plan = get_compiled_template(self.template)
+        transformer = Transformer()
+        for name in ('a', 'b', 'a', 'c'):
+            cached_apply_plan(transformer, plan, {'candidate': {'first_name': name}})
+        # 'b' was the least recently used when 'c' came in
+        cached_apply_plan(transformer, plan, {'candidate': {'first_name': 'a'}})
+        cached_apply_plan(transformer, plan, {'candidate': {'first_name': 'b'}})
+        stats = get_result_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 4, 2))
+
+        later = time.monotonic() + 61
+        with mock.patch('transformer.result_cache.time.monotonic', return_value=later):
+            cached_apply_plan(transformer, plan, {'candidate': {'first_name': 'b'}})
+        self.assertEqual(get_result_cache_stats()['misses'], 5)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'results': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'results'}},
+        TRANSFORMER_RESULT_CACHE_BACKEND='results',
+    )
+    def test_shared_tier(self):
+        record = {'candidate': {'first_name': 'John'}}
+        expected = self.post(record)
+        # Another process has an empty local cache but shares the Django cache
+        clear_result_cache()
+        self.assertEqual(self.post(record), expected)
+        stats = get_result_cache_stats()
+        self.assertEqual((stats['hits'], stats['shared_hits'], stats['misses']), (1, 1, 0))
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'results': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                            'LOCATION': 'transformer_results'}},
+        TRANSFORMER_RESULT_CACHE_BACKEND='results',
+    )
+    def test_async_view_uses_shared_tier(self):
+        call_command('createcachetable', 'transformer_results', verbosity=0)
+        url = f'/api/transform/{self.template.pk}/async/'
+        record = {'candidate': {'first_name': 'John'}}
+        # The database cache cannot be called synchronously from the event loop; nothing may be logged
+        with self.assertNoLogs('transformer.result_cache'):
+            expected = self.post(record, url=url)
+            clear_result_cache()
+            self.assertEqual(self.post(record, url=url), expected)
+        stats = get_result_cache_stats()
+        self.assertEqual((stats['hits'], stats['shared_hits'], stats['misses']), (1, 1, 0))
+
+    @override_settings(TRANSFORMER_RESULT_CACHE=False)
+    def test_disabled(self):
+        self.post({'candidate': {'first_name': 'John'}})
+        self.post({'candidate': {'first_name': 'John'}})
+        stats = self.client.get('/api/transform/cache/').json()
+        self.assertEqual((stats['enabled'], stats['hits'], stats['misses']), (False, 0, 0))
+
+
+class ParallelTransformTestCase(TestCase):
+    def test_parallel_matches_sequential_order(self):
+        plan = build_plan(20, depth=3)
+        records = build_records(plan, 50, density=0.5)
+        records[7] = 'not a record'
+        sequential = list(Transformer().apply_plan_many(plan, records))
+        self.assertEqual(transform_parallel(plan, records, workers=2, chunk_size=8), sequential)
+
+
+class AsyncTransformTestCase(TemplateTestCase):
+    def test_matches_sync_output(self):
+        body = {'candidate': {'first_name': 'John', 'last_name': 'Doe'}}
+        sync_response = self.client.post(f'/api/transform/{self.template.pk}/', body, content_type='application/json')
+        async_response = self.client.post(
+            f'/api/transform/{self.template.pk}/async/', body, content_type='application/json'
+        )
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_warm_template_costs_one_query(self):
+        get_compiled_template(self.template)
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                f'/api/transform/{self.template.pk}/async/', {'candidate': {}}, content_type='application/json'
+            )
+        self.assertEqual(response.json(), {})
+
+    async def test_cold_template_compiles_through_async_orm(self):
+        clear_compiled_templates()
+        plan = await aget_compiled_template(self.template)
+        self.assertEqual(plan, get_compiled_template(self.template))
+
+    def test_unknown_template(self):
+        response = self.client.post('/api/transform/0/async/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+class TracingTestCase(TemplateTestCase):
+    def test_trace_in_response(self):
+        response = self.client.post(
+            f'/api/transform/{self.template.pk}/?trace=1', {'candidate': {'first_name': 'John'}},
+            content_type='application/json'
+        )
+        body = response.json()
+        self.assertEqual(body['data'], {'Candidate Details': {'First Name': 'John'}})
+        self.assertEqual([entry['found'] for entry in body['trace']], [True, False])
+        self.assertEqual(body['trace'][0]['source'], 'candidate.first_name')
+        self.assertEqual(body['trace'][0]['destination'], 'Candidate Details.First Name')
+        self.assertEqual(body['trace'][0]['value'], 'John')
+
+    def test_trace_header_on_async_view(self):
+        response = self.client.post(
+            f'/api/transform/{self.template.pk}/async/', {'candidate': {}},
+            content_type='application/json', HTTP_X_TRANSFORM_TRACE='1'
+        )
+        self.assertEqual(len(response.json()['trace']), 2)
+
+    def test_trace_to_logger(self):
+        with self.assertLogs('transformer.trace', level='INFO'):
+            response = self.client.post(
+                f'/api/transform/{self.template.pk}/?trace=log', {'candidate': {'first_name': 'John'}},
+                content_type='application/json'
+            )
+        self.assertEqual(response.json(), {'Candidate Details': {'First Name': 'John'}})
+
+    def test_untraced_transform_prints_nothing(self):
+        with mock.patch('builtins.print') as mocked_print:
+            Transformer().transform({'candidate': {'first_name': 'John'}}, self.template)
+        mocked_print.assert_not_called()
+
+
+class RawTransformTestCase(TemplateTestCase):
+    def post(self, suffix, body, **extra):
+        return self.client.post(f'/api/transform/{self.template.pk}/{suffix}', body,
+                                content_type='application/json', **extra)
+
+    def test_same_responses_as_the_drf_endpoint(self):
+        bodies = [
+            json.dumps({'candidate': {'first_name': 'Jöhn', 'last_name': 'Doe'}}),
+            json.dumps({'candidate': {'first_name': 2 ** 70}}),
+            json.dumps([1, 2]),
+            '',
+        ]
+        for body in bodies:
+            drf = self.post('', body)
+            raw = self.post('raw/', body)
+            self.assertEqual((raw.status_code, raw.json()), (drf.status_code, drf.json()), body)
+            self.assertEqual(raw['Content-Type'], 'application/json')
+
+    def test_trace(self):
+        response = self.post('raw/?trace=1', {'candidate': {'first_name': 'John'}})
+        self.assertEqual([entry['found'] for entry in response.json()['trace']], [True, False])
+
+    def test_errors(self):
+        response = self.post('raw/', '{"candidate": ')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Something Went Wrong')
+        response = self.client.post('/api/transform/999999/raw/', {}, content_type='application/json')
+        self.assertEqual((response.status_code, response.json()), (404, {'error': 'Data template not found'}))
+
+    def test_endpoint_benchmark(self):
+        rows = bench_endpoints(self.template.pk, {'candidate': {'first_name': 'John'}}, iterations=5,
+                               client=self.client)
+        self.assertEqual([row['endpoint'] for row in rows], ['transform only', 'drf', 'raw'])
+        self.assertTrue(all(row['mean_us'] > 0 for row in rows))
+
+
+class BenchmarkSuiteTestCase(TestCase):
+    def test_engine_suite_report(self):
+        report = run_engine_suite(mapping_counts=[10], depths=[1, 3], densities=[1.0], records=5)
+        self.assertEqual(len(report['cases']), 2)
+        self.assertEqual(len(report['helpers']), 2)
+        json.dumps(report)
+        for key in ('ops_per_sec', 'p50_us', 'p90_us', 'p99_us', 'peak_memory_kb'):
+            self.assertIn(key, report['cases'][0])
+
+    def test_compare_reports_flags_regressions(self):
+        baseline = {'cases': [{'mappings': 10, 'depth': 1, 'density': 1.0, 'ops_per_sec': 1000}]}
+        current = {'cases': [{'mappings': 10, 'depth': 1, 'density': 1.0, 'ops_per_sec': 800}]}
+        self.assertEqual(len(compare_reports(baseline, current, max_regression=0.1)), 1)
+        self.assertEqual(compare_reports(baseline, current, max_regression=0.25), [])
+
+
+def make_plan(*pairs):
+    """
+    Build a CompiledTemplate from ('source.path', 'Destination.Path') pairs, without the database.
+    """
+    return CompiledTemplate(template_id=0, version=0, mappings=tuple(
+        CompiledMapping(source_path=tuple(source.split('.')), destination_path=tuple(destination.split('.')))
+        for source, destination in pairs
+    ))
+
+
+class EngineEquivalenceTestCase(TestCase):
+    """
+    Every engine must produce exactly what applying the path helpers mapping by mapping produces, key order included.
+    """
+    class Record:
+        # Attribute access is supported for non-dict inputs
+        def __init__(self, **attributes):
+            self.__dict__.update(attributes)
+
+    def reference_transform(self, plan, record):
+        helpers = Transformer(engine='interpreter')
+        output_data = {}
+        for mapping in plan.mappings:
+            value = helpers._get_value_by_path(record, mapping.source_path)
+            if value is not None:
+                helpers._set_value_by_path(output_data, mapping.destination_path, value)
+        return output_data
+
+    def assertEnginesAgree(self, plan, records):
+        for engine in ENGINES:
+            transformer = Transformer(engine=engine)
+            for record in records:
+                # Values written below a dict taken from the input end up in the input, so give every run its own copy
+                try:
+                    expected = self.reference_transform(plan, copy.deepcopy(record))
+                except Exception:
+                    # Writing below a value that is not a dict fails, and must fail in every engine
+                    with self.assertRaises(Exception, msg=f"{engine} engine, record {record!r}"):
+                        transformer.apply_plan(plan, copy.deepcopy(record))
+                    continue
+                actual = transformer.apply_plan(plan, copy.deepcopy(record))
+                self.assertEqual(actual, expected, f"{engine} engine, record {record!r}")
+                self.assertEqual(json.dumps(actual), json.dumps(expected), f"{engine} engine, record {record!r}")
+
+    def assertBatchesAgree(self, plan, records):
+        expected = list(Transformer(engine='interpreter').apply_plan_many(plan, copy.deepcopy(records)))
+        for engine in ENGINES:
+            actual = list(Transformer(engine=engine).apply_plan_many(plan, copy.deepcopy(records)))
+            self.assertEqual(actual, expected, f"{engine} engine")
+            self.assertEqual(json.dumps(actual), json.dumps(expected), f"{engine} engine")
+
+    def test_synthetic_templates(self):
+        for depth in (1, 2, 5):
+            plan = build_plan(30, depth=depth, sections=4)
+            for density in (1.0, 0.3):
+                self.assertEnginesAgree(plan, build_records(plan, 20, density=density))
+                self.assertBatchesAgree(plan, build_records(plan, 20, density=density))
+
+    def test_batches_with_invalid_and_failing_records(self):
+        plan = make_plan(('a', 'X'), ('b', 'X.Y'))
+        records = [{'a': {}, 'b': 1}, 'not an object', ValueError('Line 3: invalid JSON'), {'a': 1, 'b': 2}, {'b': 3}]
+        self.assertBatchesAgree(plan, records)
+        with mock.patch('transformer.columnar.COLUMNAR_BATCH_SIZE', 2):
+            self.assertBatchesAgree(plan, records)
+
+    def test_edge_cases(self):
+        plan = make_plan(
+            ('a.b', 'Out.B'),
+            ('c', 'Out.C.D'),
+            ('a.e', 'Flat'),
+            ('a.b', 'Out.C'),  # Overwrites the dict created for Out.C.D
+            ('f', 'Out.C.E'),  # Written below the value that replaced it when that value is a dict
+            ('obj.name', 'Object Name'),
+            ('a.b', 'Out.B'),
+        )
+        self.assertEnginesAgree(plan, [
+            {},
+            {'a': {'b': 1, 'e': 0}, 'c': False},
+            {'a': {'b': {'x': 1}}, 'c': 'd', 'f': 2},
+            {'a': None, 'c': [], 'obj': self.Record(name='John')},
+            {'a': 'not a dict', 'obj': {'name': None}},
+            {'a': {'b': None, 'e': ''}},
+        ])
+
+    def test_leaf_that_is_also_a_section(self):
+        top_level = make_plan(('a', 'X'), ('b', 'X.Y'), ('c', 'X'))
+        self.assertEnginesAgree(top_level, [{'a': {}, 'b': 1}, {'b': 1, 'c': {'k': 1}}, {'a': 1, 'c': 2}])
+        self.assertEqual(transform_rows(top_level, [{'a': {}, 'b': 1}, {'b': 1, 'c': {'k': 1}}]),
+                         [{'X': {'Y': 1}}, {'X': {'k': 1}}])
+
+        plan = make_plan(('a', 'X.Y'), ('b', 'X.Y.Z'), ('c', 'X.Y'), ('d', 'X.Y.W'))
+        self.assertEnginesAgree(plan, [
+            {'a': 1, 'c': {'k': 1}, 'd': 2},
+            {'b': 1, 'd': 2},
+            {'a': 1, 'b': 2},
+            {'a': {'k': 0}, 'b': 2, 'c': {'j': 1}, 'd': 3},
+        ])
+
+
+class CoercionTestCase(TestCase):
+    def typed_plan(self):
+        employments = CompiledTemplate(template_id=0, version=0, mappings=(
+            CompiledMapping(source_path=('start',), destination_path=('Start',), data_type='Date'),
+        ))
+        return CompiledTemplate(template_id=0, version=0, mappings=(
+            CompiledMapping(source_path=('age',), destination_path=('Candidate', 'Age'), data_type='Integer'),
+            CompiledMapping(source_path=('active',), destination_path=('Candidate', 'Active'), data_type='Boolean'),
+            CompiledMapping(source_path=('name',), destination_path=('Candidate', 'Name'), data_type='String'),
+            CompiledMapping(source_path=('tags',), destination_path=('Tags',), data_type='List'),
+            CompiledMapping(source_path=('jobs',), destination_path=('Jobs',), children=employments,
+                            data_type='String'),
+        ))
+
+    def test_converters(self):
+        cases = {
+            'Integer': [('42', 42), (' -7 ', -7), (3.0, 3), (3.5, INVALID), (True, INVALID), ('4x', INVALID)],
+            'float': [('1.5', 1.5), (2, 2.0), ('1e3', 1000.0), ('nan', INVALID), ([], INVALID)],
+            'Boolean': [('Yes', True), ('false', False), (1, True), (2, INVALID)],
+            'String': [('a', 'a'), (12, '12'), (False, 'false'), ({}, INVALID)],
+            'Date': [('2024-02-29', '2024-02-29'), ('2023-02-29', INVALID), ('2024-13-01', INVALID)],
+            'DateTime': [('2024-01-31T23:59:59Z', '2024-01-31T23:59:59Z'), ('2024-01-31 24:00', INVALID)],
+        }
+        for data_type, pairs in cases.items():
+            converter = get_converter(data_type)
+            for value, expected in pairs:
+                if expected is INVALID:
+                    self.assertIs(converter(value), INVALID, f"{data_type} {value!r}")
+                else:
+                    self.assertEqual(converter(value), expected, f"{data_type} {value!r}")
+        self.assertIsNone(get_converter('Object'))
+        self.assertIsNone(get_converter(None))
+
+    def test_converters_are_bound_at_compile_time(self):
+        plan = self.typed_plan()
+        self.assertEqual(plan.converters[:4], (to_integer, get_converter('Boolean'), get_converter('String'), None))
+        # The value of a nested mapping is built from its children, not converted
+        self.assertIsNone(plan.converters[4])
+
+    def test_engines_agree(self):
+        plan = self.typed_plan()
+        record = {'age': '42', 'active': 'no', 'name': 7, 'tags': ['a'], 'jobs': [{'start': '2020-01-01'}, {}]}
+        expected = {'Candidate': {'Age': 42, 'Active': False, 'Name': '7'}, 'Tags': ['a'],
+                    'Jobs': [{'Start': '2020-01-01'}, {}]}
+        bad = {'age': 'old', 'name': 'Jane', 'jobs': {'start': 'yesterday'}}
+        for engine in ENGINES:
+            transformer = Transformer(engine=engine, coerce=True)
+            self.assertEqual(transformer.apply_plan(plan, copy.deepcopy(record)), expected, engine)
+            with self.assertRaises(CoercionError, msg=engine) as raised:
+                transformer.apply_plan(plan, bad)
+            self.assertEqual([value for _, value in raised.exception.failures], ['old', 'yesterday'])
+            # Without coercion values are passed through as they are
+            self.assertEqual(Transformer(engine=engine, coerce=False).apply_plan(plan, {'age': '42'}),
+                             {'Candidate': {'Age': '42'}})
+
+    def test_batches_collect_failures_per_record(self):
+        plan = self.typed_plan()
+        records = [
+            {'age': 1, 'active': 'maybe', 'jobs': [{'start': '2020-02-30'}]},
+            {'age': '2'},
+            'not an object',
+            {'jobs': [{'start': '2020-01-01'}, {'start': 5}]},
+        ]
+        expected = [
+            (None, "Invalid value for 'Candidate.Active': expected Boolean, got 'maybe'; "
+                   "Invalid value for 'Start': expected Date, got '2020-02-30'"),
+            ({'Candidate': {'Age': 2}}, None),
+            (None, "Record must be a JSON object"),
+            (None, "Invalid value for 'Start': expected Date, got 5"),
+        ]
+        for engine in ENGINES:
+            results = list(Transformer(engine=engine, coerce=True).apply_plan_many(plan, copy.deepcopy(records)))
+            self.assertEqual(results, expected, engine)
+
+    @override_settings(TRANSFORMER_COERCE_TYPES=True)
+    def test_transform_endpoint_uses_field_types(self):
+        template = DataTemplate.objects.create(name='Typed')
+        source = Field.objects.create(name='candidate.age', visible_name='', data_type='String')
+        destination = Field.objects.create(name='', visible_name='Candidate.Age', data_type='Integer')
+        FieldMapping.objects.create(template=template, source_field=source, destination_field=destination)
+        clear_compiled_templates()
+        url = f'/api/transform/{template.pk}/'
+        response = self.client.post(url, {'candidate': {'age': '31'}}, content_type='application/json')
+        self.assertEqual(response.json(), {'Candidate': {'Age': 31}})
+        response = self.client.post(url, {'candidate': {'age': 'old'}}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("expected Integer, got 'old'", response.json()['data'])
+
+
+class SourceTrieTestCase(TestCase):
+    class CountingDict(dict):
+        lookups = 0
+
+        def get(self, *args):
+            type(self).lookups += 1
+            return super().get(*args)
+
+    def setUp(self):
+        self.CountingDict.lookups = 0
+
+    def test_shared_prefixes_are_read_once(self):
+        plan = make_plan(*[(f'candidate.address.line_{i}', f'Address.Line {i}') for i in range(20)])
+        self.assertEqual(len(plan.source_nodes), 1 + 2 + 20)
+        record = self.CountingDict(candidate=self.CountingDict(address=self.CountingDict(
+            {f'line_{i}': i for i in range(20)}
+        )))
+        output = Transformer(engine='interpreter').apply_plan(plan, record)
+        self.assertEqual(len(output['Address']), 20)
+        self.assertEqual(self.CountingDict.lookups, 22)
+
+    def test_missing_subtrees_are_pruned(self):
+        plan = make_plan(*[(f'candidate.address.line_{i}', f'Address.Line {i}') for i in range(20)])
+        record = self.CountingDict(candidate=self.CountingDict())
+        self.assertEqual(Transformer(engine='interpreter').apply_plan(plan, record), {})
+        self.assertEqual(self.CountingDict.lookups, 2)
+
+
+class CodegenEngineTestCase(TemplateTestCase):
+    def test_generated_function_is_cached_with_the_plan(self):
+        plan = get_compiled_template(self.template)
+        self.assertIs(plan.transform_function, get_compiled_template(self.template).transform_function)
+
+    def test_plan_still_pickles_after_generation(self):
+        plan = get_compiled_template(self.template)
+        plan.transform_function
+        restored = pickle.loads(pickle.dumps(plan))
+        self.assertEqual(restored, plan)
+        self.assertEqual(restored.transform_function({'candidate': {'first_name': 'John'}}),
+                         {'Candidate Details': {'First Name': 'John'}})
+
+    @override_settings(TRANSFORMER_ENGINE='codegen')
+    def test_endpoint_uses_configured_engine(self):
+        response = self.client.post(
+            f'/api/transform/{self.template.pk}/', {'candidate': {'last_name': 'Doe'}}, content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'Candidate Details': {'Last Name': 'Doe'}})
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            Transformer(engine='jit')
+
+
+class NestedTemplateTestCase(TestCase):
+    """
+    Base test case building a template with nested mappings through the API.
+    """
+    def setUp(self):
+        clear_compiled_templates()
+        self.fields = {}
+
+    def field(self, name):
+        if name not in self.fields:
+            self.fields[name] = Field.objects.create(name=name, visible_name=name, data_type='String').pk
+        return self.fields[name]
+
+    def mapping(self, source, destination, *children):
+        data = {'source_field': self.field(source), 'destination_field': self.field(destination)}
+        if children:
+            data['mappings'] = list(children)
+        return data
+
+    def create_template(self):
+        response = self.client.post('/api/templates/', {
+            'name': 'Candidate Employments',
+            'mappings': [
+                self.mapping('candidate.name', 'Candidate.Name'),
+                self.mapping(
+                    'candidate.employments', 'Candidate.Employments',
+                    self.mapping('company', 'Company'),
+                    self.mapping('period.start', 'Period.Start'),
+                    self.mapping('projects', 'Projects', self.mapping('title', 'Title')),
+                ),
+            ],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+
+class NestedMappingTestCase(NestedTemplateTestCase):
+    def test_nested_mappings_round_trip_through_the_api(self):
+        created = self.create_template()
+        self.assertEqual(len(created['mappings']), 2)
+        self.assertNotIn('mappings', created['mappings'][0])
+        self.assertEqual(len(created['mappings'][1]['mappings']), 3)
+        self.assertEqual(FieldMapping.objects.filter(parent_mapping__isnull=False).count(), 4)
+
+        detail = self.client.get(f"/api/templates/{created['id']}/").json()
+        self.assertEqual(detail, created)
+
+    def test_lists_are_mapped_element_by_element(self):
+        template = DataTemplate.objects.get(pk=self.create_template()['id'])
+        record = {'candidate': {
+            'name': 'John',
+            'employments': [
+                {'company': 'Acme', 'period': {'start': 2019}, 'projects': [{'title': 'X'}, {'title': 'Y'}]},
+                {'company': 'Globex'},
+                'not an object',
+            ],
+        }}
+        expected = {'Candidate': {
+            'Name': 'John',
+            'Employments': [
+                {'Company': 'Acme', 'Period': {'Start': 2019}, 'Projects': [{'Title': 'X'}, {'Title': 'Y'}]},
+                {'Company': 'Globex'},
+                {},
+            ],
+        }}
+        for engine in ENGINES:
+            self.assertEqual(Transformer(engine=engine).transform(record, template), expected, engine)
+        trace = []
+        self.assertEqual(Transformer().transform(record, template, trace), expected)
+
+        single = {'candidate': {'employments': {'company': 'Acme'}}}
+        for engine in ENGINES:
+            self.assertEqual(Transformer(engine=engine).transform(single, template),
+                             {'Candidate': {'Employments': {'Company': 'Acme'}}})
+
+    def test_columnar_batches_of_nested_records(self):
+        template = DataTemplate.objects.get(pk=self.create_template()['id'])
+        records = [
+            {'candidate': {'name': 'John', 'employments': [
+                {'company': 'Acme', 'projects': [{'title': 'X'}]}, {'company': 'Globex'}, None,
+            ]}},
+            {'candidate': {'employments': {'company': 'Initech', 'period': {'start': 2020}}}},
+            {'candidate': {'employments': []}},
+            {},
+        ]
+        expected = [Transformer(engine='interpreter').transform(record, template) for record in records]
+        plan = get_compiled_template(template)
+        self.assertEqual(transform_rows(plan, records), expected)
+        self.assertEqual([output for output, _ in Transformer(engine='columnar').transform_many(records, template)],
+                         expected)
+
+    def test_columnar_table_output(self):
+        template = DataTemplate.objects.get(pk=self.create_template()['id'])
+        table = transform_table(get_compiled_template(template), [
+            {'candidate': {'name': 'John', 'employments': [{'company': 'Acme'}]}},
+            {'candidate': {'name': 'Jane'}},
+        ])
+        self.assertEqual(table, {
+            'columns': ['Candidate.Name', 'Candidate.Employments'],
+            'rows': [['John', [{'Company': 'Acme'}]], ['Jane', None]],
+        })
+
+    def test_mapping_tree_compiles_in_one_query(self):
+        template = DataTemplate.objects.get(pk=self.create_template()['id'])
+        with self.assertNumQueries(1):
+            plan = compile_template(template)
+        employments = plan.mappings[1]
+        self.assertEqual(employments.source_path, ('candidate', 'employments'))
+        self.assertEqual([m.source_path for m in employments.children.mappings],
+                         [('company',), ('period', 'start'), ('projects',)])
+        self.assertEqual(employments.children.mappings[2].children.mappings[0].destination_path, ('Title',))
+
+
+class ProjectionTestCase(NestedTemplateTestCase):
+    record = {'candidate': {
+        'name': 'John',
+        'employments': [{'company': 'Acme', 'period': {'start': 2019}, 'projects': [{'title': 'X'}]}],
+    }}
+
+    def setUp(self):
+        super().setUp()
+        self.template = DataTemplate.objects.get(pk=self.create_template()['id'])
+
+    def transform(self, select, path=''):
+        return self.client.post(f'/api/transform/{self.template.pk}/{path}?select={select}', self.record,
+                                content_type='application/json')
+
+    def test_only_selected_paths_are_computed(self):
+        for path in ('', 'raw/', 'async/'):
+            self.assertEqual(self.transform('Candidate.Name', path).json(), {'Candidate': {'Name': 'John'}}, path)
+            response = self.transform('Candidate.Employments.Company, Candidate.Employments.Projects', path)
+            self.assertEqual(response.json(), {
+                'Candidate': {'Employments': [{'Company': 'Acme', 'Projects': [{'Title': 'X'}]}]},
+            })
+        response = self.client.post(f'/api/transform/{self.template.pk}/batch/?select=Candidate.Name',
+                                    [self.record, {}], content_type='application/json')
+        self.assertEqual([result['data'] for result in response.json()['results']],
+                         [{'Candidate': {'Name': 'John'}}, {}])
+
+        plan = get_compiled_template(self.template)
+        projected = project_plan(plan, parse_selection('Candidate.Employments.Period.Start'))
+        self.assertEqual([mapping.destination_path for mapping in projected.mappings],
+                         [('Candidate', 'Employments')])
+        self.assertEqual([mapping.source_path for mapping in projected.mappings[0].children.mappings],
+                         [('period', 'start')])
+        self.assertLess(len(projected.source_nodes), len(plan.source_nodes))
+
+    def test_projected_plans_are_cached_per_projection(self):
+        plan = get_compiled_template(self.template)
+        projected = get_projected_plan(plan, parse_selection('Candidate.Name,Candidate.Employments'))
+        self.assertIs(get_projected_plan(plan, parse_selection('Candidate.Employments, Candidate.Name')), projected)
+        self.assertEqual(len(projected.mappings), 2)
+
+        field = Field.objects.get(pk=self.field('Candidate.Name'))
+        field.visible_name = 'Candidate.Full Name'
+        field.save()
+        self.template.refresh_from_db()
+        self.assertEqual(self.transform('Candidate.Full Name').json(), {'Candidate': {'Full Name': 'John'}})
+        self.assertEqual(self.transform('Candidate.Name').status_code, 400)
+
+    def test_values_written_above_a_selected_path(self):
+        plan = make_plan(('a', 'X'), ('b', 'X.Y'), ('c', 'Z'), ('d', 'X.W'))
+        projected = project_plan(plan, parse_selection('X.Y'))
+        self.assertEqual(len(projected.mappings), 2)
+        for engine in ENGINES:
+            transformer = Transformer(engine=engine)
+            self.assertEqual(transformer.apply_plan(projected, {'a': {}, 'b': 1, 'c': 2, 'd': 3}), {'X': {'Y': 1}})
+            self.assertEqual(transformer.apply_plan(projected, {'a': 'whole', 'c': 2}), {'X': 'whole'})
+
+    def test_unknown_path(self):
+        response = self.transform('Candidate.Nmae')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown destination path "Candidate.Nmae"', response.json()['data'])
+
+
+class WarmStartTestCase(NestedTemplateTestCase):
+    def test_bulk_compile_matches_compile_template(self):
+        templates = [DataTemplate.objects.get(pk=self.create_template()['id']) for _ in range(3)]
+        templates.append(DataTemplate.objects.create(name='Empty'))
+        with self.assertNumQueries(1):
+            plans = compile_templates(templates)
+        self.assertEqual(plans, [compile_template(template) for template in templates])
+
+    def test_warm_start_fills_the_cache(self):
+        template = DataTemplate.objects.get(pk=self.create_template()['id'])
+        clear_compiled_templates()
+        report = warm_compiled_templates(engine='codegen')
+        self.assertEqual((report['templates'], report['mappings']), (1, 6))
+        self.assertGreater(report['memory_kb'], 0)
+        with self.assertNumQueries(0):
+            plan = get_compiled_template(template)
+        self.assertIn('transform_function', plan.__dict__)
+
+    def test_warm_start_limit_keeps_recent_templates(self):
+        older = DataTemplate.objects.create(name='Older')
+        newer = DataTemplate.objects.create(name='Newer')
+        clear_compiled_templates()
+        warm_compiled_templates(limit=1)
+        with self.assertNumQueries(1):
+            get_compiled_template(older)
+        with self.assertNumQueries(0):
+            get_compiled_template(newer)
+
+    def test_management_command(self):
+        self.create_template()
+        out = io.StringIO()
+        call_command('warm_transformer', stdout=out)
+        self.assertIn('Compiled 1 templates (6 mappings)', out.getvalue())
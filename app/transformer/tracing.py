@@ -0,0 +1,45 @@
+import logging
+
+logger = logging.getLogger('transformer.trace')
+
+TRACE_HEADER = 'X-Transform-Trace'
+
+
+def get_trace_mode(request):
+    """
+    Work out whether a transform request asked to be traced, and where the trace should go.
+
+    Purpose:
+        Tracing is opt-in per request, with the 'trace' query parameter or the X-Transform-Trace header:
+            - ?trace=1 (or true/response): the per-mapping trace is returned in the response.
+            - ?trace=log: the trace is sent to the 'transformer.trace' logger and the response is unchanged.
+
+    Parameters:
+        - request (HttpRequest or rest_framework Request): The incoming request.
+
+    Returns:
+        - 'response', 'log' or None when tracing is off.
+    """
+    value = request.GET.get('trace') or request.headers.get(TRACE_HEADER)
+    if not value:
+        return None
+    value = value.lower()
+    if value == 'log':
+        return 'log'
+    if value in ('1', 'true', 'response'):
+        return 'response'
+    return None
+
+
+def finish_trace(mode, template_id, output_data, trace):
+    """
+    Deliver a collected trace according to the trace mode.
+
+    Returns:
+        - The body the view should send: output_data itself, or {"data": output_data, "trace": trace}
+          when the trace was requested in the response.
+    """
+    if mode == 'response':
+        return {"data": output_data, "trace": trace}
+    logger.info("Transform trace for template %s: %s", template_id, trace)
+    return output_data
@@ -1,88 +1,406 @@
-from attribute_library.models import Field
+import time
+from itertools import repeat
+
+from django.conf import settings
+from django.db import models
+from .coercion import INVALID, CoercionError, format_failures
+from .plan import get_compiled_template
+
+ENGINES = ('interpreter', 'codegen', 'columnar')
+
+# Stands in for plan.converters when coercion is off
+_NO_CONVERTERS = repeat(None)
+
+
+def _record_error(record):
+    # Why a record of a batch cannot be transformed at all, or None when it can
+    if isinstance(record, Exception):
+        # Records that could not even be decoded are passed through as their error
+        return str(record)
+    if not isinstance(record, dict):
+        return "Record must be a JSON object"
+    return None
+
+
+def get_value_by_path(data, path):
+    """
+    Extract a value from the input data by navigating a specific path.
+
+    Purpose:
+        This function takes a path (e.g., ['candidate', 'first_name']) and follows it step by step in the input data
+        to retrieve the final value.
+
+    Parameters:
+        - data (dict or Django model): The input data or a Django model instance that needs to be traversed.
+        - path (tuple or list): The path to the value in the data.
+                       Example: ('candidate', 'first_name')
+
+    Returns:
+        - value: The extracted value at the specified path, or None if the path doesn't exist in the data.
+    """
+    for part in path:
+        # Check if data is a dictionary (common for JSON-like structures)
+        if isinstance(data, dict):
+            data = data.get(part)  # Move to the next level in the dictionary
+        # Check if data is a Django model instance (e.g., if part is a field in a model)
+        elif hasattr(data, part):
+            data = getattr(data, part)  # Get the attribute value from the model
+            # Handle related fields like ForeignKey or ManyToMany
+            if isinstance(data, models.Manager) or isinstance(data, models.QuerySet):
+                data = data.all()  # For many-to-many relationships
+            elif isinstance(data, models.Model):
+                data = data  # For foreign key relationships
+        else:
+            data = None  # If the part does not exist, set data to None and break
+
+        # If at any point data becomes None, stop the loop
+        if data is None:
+            break
+    return data
+
 
 class Transformer:
-    def transform(self, input_data, template):
+    """
+    Applies DataTemplates to input data.
+
+    Parameters:
+        - engine (str, optional): How compiled templates are executed. Defaults to the TRANSFORMER_ENGINE setting.
+            - 'interpreter': walks the compiled paths generically for every record.
+            - 'codegen': runs a Python function generated for the template (see transformer.codegen),
+                         which produces the same output with far less per-record overhead.
+            - 'columnar': pivots batches of records into per-path columns and applies every mapping to a whole
+                          column at once (see transformer.columnar). Made for large batches of flat or shallow
+                          records through apply_plan_many; single records are treated as a batch of one.
+        - coerce (bool, optional): Convert every value to the data_type of its destination field with the converter
+                                   bound to the mapping at compile time (see transformer.coercion). Values that
+                                   cannot be converted fail the record. Defaults to the TRANSFORMER_COERCE_TYPES setting.
+    """
+
+    def __init__(self, engine=None, coerce=None):
+        engine = engine or getattr(settings, 'TRANSFORMER_ENGINE', 'interpreter')
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown transformer engine '{engine}', expected one of {', '.join(ENGINES)}")
+        self.engine = engine
+        self.coerce = getattr(settings, 'TRANSFORMER_COERCE_TYPES', False) if coerce is None else coerce
+
+    def transform(self, input_data, template, trace=None):
         """
         Main method to transform input_data based on a template.
         
         Purpose:
             This method reads the input data and transforms it based on the mappings defined in the template.
             For each mapping, it takes a value from a source field in the input data and places it in the destination
-            field in the output data.
+            field in the output data. The template is applied through its compiled plan, so a template that has
+            already been compiled in this process is applied without any database queries.
 
         Parameters:
             - input_data (dict): The original data that needs to be transformed. 
                                  Example: {'candidate': {'first_name': 'John', 'last_name': 'Doe'}}
             - template (DataTemplate): The template that defines the mapping rules between source fields and destination fields.
+            - trace (list, optional): When given, one entry per mapping is appended to it, see apply_plan.
         
         Returns:
             - output_data (dict): The transformed data after applying the mappings from the template.
                                   Example: {'Candidate Details': {'First Name': 'John'}}
         """
+        return self.apply_plan(get_compiled_template(template), input_data, trace)
+
+    def transform_many(self, records, template):
+        """
+        Transform a sequence of records with the same template.
+
+        Purpose:
+            The template is compiled (or fetched from the plan cache) once, before the first record is read,
+            and then applied to every record. A record that cannot be transformed does not stop the others;
+            its error is reported in its place.
+
+        Parameters:
+            - records (iterable): The input records. Each one is expected to be a dict.
+            - template (DataTemplate): The template to apply to every record.
+
+        Returns:
+            - iterator: (output_data, error) tuples in input order, see apply_plan_many.
+        """
+        return self.apply_plan_many(get_compiled_template(template), records)
+
+    def apply_plan_many(self, plan, records):
+        """
+        Lazily apply an already compiled template to a sequence of records.
+
+        Parameters:
+            - plan (CompiledTemplate): The compiled template to apply.
+            - records (iterable): The input records. Consumed one at a time, so it may be a generator.
+
+        Yields:
+            - (output_data, error) tuples in input order. error is None for records that were transformed,
+              output_data is None for records that failed. With coercion, the failures of a record are collected
+              and reported together as its error, without raising CoercionError.
+        """
+        if self.engine == 'columnar':
+            yield from self._apply_plan_many_columnar(plan, records)
+            return
+        if self.coerce:
+            yield from self._apply_plan_many_coerced(plan, records)
+            return
+        for record in records:
+            error = _record_error(record)
+            if error is not None:
+                yield None, error
+                continue
+            try:
+                yield self.apply_plan(plan, record), None
+            except Exception as e:
+                yield None, str(e)
+
+    def _apply_plan_many_coerced(self, plan, records):
+        """
+        apply_plan_many with coercion: the failures of every record are collected in a list instead of raised.
+        """
+        for record in records:
+            error = _record_error(record)
+            if error is not None:
+                yield None, error
+                continue
+            failures = []
+            try:
+                output_data = self.apply_plan(plan, record, failures=failures)
+            except Exception as e:
+                yield None, str(e)
+                continue
+            yield (None, format_failures(failures)) if failures else (output_data, None)
+
+    def apply_plan(self, plan, input_data, trace=None, failures=None):
+        """
+        Apply an already compiled template to a single input record.
+
+        Parameters:
+            - plan (CompiledTemplate): The compiled template to apply.
+            - input_data (dict): The original data that needs to be transformed.
+            - trace (list, optional): Tracing is off unless a list is passed. When it is, one entry per mapping
+                                      is appended to it:
+                                      {"source": "candidate.first_name", "destination": "Candidate Details.First Name",
+                                       "found": True, "value": "John", "duration_us": 1.4}
+                                      Traced transforms always run on the interpreter engine.
+            - failures (list, optional): With coercion, the list the (mapping, value) failures are appended to.
+                                         Values that cannot be converted are then left out of the output.
+
+        Returns:
+            - output_data (dict): The transformed data.
+
+        Raises:
+            - CoercionError: With coercion, when no failures list is passed and a value cannot be converted.
+        """
+        if not self.coerce:
+            failures = None
+        elif failures is None:
+            failures = []
+            output_data = self.apply_plan(plan, input_data, trace, failures)
+            if failures:
+                raise CoercionError(failures)
+            return output_data
+
+        if trace is not None:
+            return self._apply_plan_traced(plan, input_data, trace, failures)
+        if self.engine == 'codegen':
+            if failures is not None:
+                return plan.coercing_transform_function(input_data, failures)
+            return plan.transform_function(input_data)
+        if self.engine == 'columnar':
+            from .columnar import transform_rows
+            return transform_rows(plan, [input_data], None if failures is None else [failures])[0]
+
+        values = self._extract_values(plan.source_nodes, input_data)
+
         output_data = {}  # Initialize an empty dictionary for storing the transformed output
-        
-        print("Starting transformation...")
-        print(f"Input Data: {input_data}")  # Debugging statement to show input data
-        print(f"Template Mappings: {template.mappings.all()}")  # Debugging to show mappings in the template
-        
-        # Loop through each mapping in the template to transform the data
-        for mapping in template.mappings.all():
-            # Fetch the source and destination fields using their IDs and get the field names
-            source_field = Field.objects.get(pk=mapping.source_field.id).name  # Example: 'candidate.first_name'
-            destination_field = Field.objects.get(pk=mapping.destination_field.id).visible_name  # Example: 'Candidate Details.First Name'
-            
-            print(f"Processing mapping: {source_field} -> {destination_field}")  # Debugging statement to show current mapping
-            
-            # Extract value from input_data using the source field path (e.g., 'candidate.first_name')
-            value = self._get_value_by_path(input_data, source_field.split('.'))
-            print(f"Extracted value: {value} from {source_field}")  # Debugging to show the extracted value
-            
-            # If a value was successfully extracted, set it in the output data at the destination path
+        # Intermediate output dicts of this record, indexed like plan.destination_nodes and created on first use
+        containers = [None] * len(plan.destination_nodes)
+        containers[0] = output_data
+        converters = _NO_CONVERTERS if failures is None else plan.converters
+        # Loop through each compiled mapping in the template to transform the data
+        for mapping, leaf, (parent, key, stale_nodes), converter in zip(
+                plan.mappings, plan.source_leaves, plan.destination_slots, converters):
+            value = values[leaf]
+            # If a value was successfully extracted, write it straight into its parent dict
             if value is not None:
-                print(f"Setting value at {destination_field}")
-                self._set_value_by_path(output_data, destination_field.split('.'), value)
-                print(f"Set value: {value} at {destination_field}")
-            else:
-                print(f"Value for {source_field} not found in input data.")  # Debugging if value is not found
-        
-        print(f"Transformed Output: {output_data}")  # Debugging to show the final transformed output
+                if mapping.children is not None:
+                    value = self._apply_children(mapping.children, value, failures)
+                elif converter is not None:
+                    value = converter(value)
+                    if value is INVALID:
+                        failures.append((mapping, values[leaf]))
+                        continue
+                container = containers[parent]
+                if container is None:
+                    container = self._get_container(plan.destination_nodes, containers, parent)
+                container[key] = value
+                for node in stale_nodes:
+                    containers[node] = None
         return output_data
 
-    def _get_value_by_path(self, data, path):
+    def _apply_plan_many_columnar(self, plan, records):
         """
-        Helper method to extract a value from the input data by navigating a specific path.
+        apply_plan_many for the columnar engine.
 
         Purpose:
-            This method takes a path (e.g., ['candidate', 'first_name']) and follows it step by step in the input data
-            to retrieve the final value.
+            Records are collected into batches of COLUMNAR_BATCH_SIZE and the valid ones transformed column by column.
+            Records that are not objects keep their error in place. Should a batch fail, it is transformed again
+            record by record so only the failing records report an error, as on the other engines.
+            With coercion, the failures of the whole batch are collected column by column, one list per record.
+        """
+        from .columnar import COLUMNAR_BATCH_SIZE, transform_rows
+
+        # Per-record results of the pending batch; None marks a slot filled by the batch transform
+        pending = []
+        batch = []
+
+        def flush():
+            try:
+                if self.coerce:
+                    failures = [[] for _ in batch]
+                    outputs = iter([
+                        (None, format_failures(found)) if found else (output_data, None)
+                        for output_data, found in zip(transform_rows(plan, batch, failures), failures)
+                    ])
+                else:
+                    outputs = ((output_data, None) for output_data in transform_rows(plan, batch))
+                results = [next(outputs) if result is None else result for result in pending]
+            except Exception:
+                interpreter = Transformer(engine='interpreter', coerce=self.coerce)
+                outputs = iter(list(interpreter.apply_plan_many(plan, batch)))
+                results = [next(outputs) if result is None else result for result in pending]
+            pending.clear()
+            batch.clear()
+            return results
+
+        for record in records:
+            error = _record_error(record)
+            if error is not None:
+                pending.append((None, error))
+            else:
+                pending.append(None)
+                batch.append(record)
+            if len(pending) >= COLUMNAR_BATCH_SIZE:
+                yield from flush()
+        if pending:
+            yield from flush()
+
+    def _apply_children(self, plan, value, failures=None):
+        """
+        Helper method to apply the nested mappings of a mapping to the value found at its source path.
 
         Parameters:
-            - data (dict or Django model): The input data or a Django model instance that needs to be traversed.
-            - path (list): A list of strings representing the path to the value in the data. 
-                           Example: ['candidate', 'first_name']
-        
+            - plan (CompiledTemplate): The plan of the child mappings.
+            - value: The value at the parent mapping's source path.
+            - failures (list, optional): Where the coercion failures of the elements are collected, see apply_plan.
+
+        Returns:
+            - list: One transformed element per element when value is a list, e.g.
+                    [{'company': 'Acme'}, {'company': 'Globex'}] -> [{'Company': 'Acme'}, {'Company': 'Globex'}]
+            - dict: The transformed value itself otherwise.
+        """
+        if isinstance(value, (list, tuple)):
+            return [self.apply_plan(plan, element, failures=failures) for element in value]
+        return self.apply_plan(plan, value, failures=failures)
+
+    def _extract_values(self, nodes, input_data):
+        """
+        Helper method to read every source path of a template from the input data in one pass.
+
+        Purpose:
+            Walks the plan's source trie (see plan.build_source_trie) so each distinct path prefix is looked up
+            once per record. When a prefix is missing, its whole subtree is skipped.
+
+        Parameters:
+            - nodes (tuple): The plan's source_nodes.
+            - input_data (dict or Django model): The input record.
+
         Returns:
-            - value: The extracted value at the specified path, or None if the path doesn't exist in the data.
+            - list: The value of every trie node, indexed like nodes, None where the path does not exist.
         """
-        for part in path:
-            # Check if data is a dictionary (common for JSON-like structures)
+        values = [None] * len(nodes)
+        values[0] = input_data
+        get_value_by_path = self._get_value_by_path
+        node = 1
+        end = len(nodes)
+        while node < end:
+            parent, key, subtree_end = nodes[node]
+            data = values[parent]
+            if data is None:
+                # Nothing below a missing value can exist either
+                node = subtree_end
+                continue
             if isinstance(data, dict):
-                data = data.get(part)  # Move to the next level in the dictionary
-            # Check if data is a Django model instance (e.g., if part is a field in a model)
-            elif hasattr(data, part):
-                data = getattr(data, part)  # Get the attribute value from the model
-                # Handle related fields like ForeignKey or ManyToMany
-                if isinstance(data, models.Manager) or isinstance(data, models.QuerySet):
-                    data = data.all()  # For many-to-many relationships
-                elif isinstance(data, models.Model):
-                    data = data  # For foreign key relationships
+                values[node] = data.get(key)
             else:
-                data = None  # If the part does not exist, set data to None and break
-            
-            # If at any point data becomes None, stop the loop
-            if data is None:
-                break
-        return data
+                values[node] = get_value_by_path(data, (key,))
+            node += 1
+        return values
+
+    def _get_container(self, nodes, containers, node):
+        """
+        Helper method to find or create the intermediate output dict of a destination trie node.
+
+        Purpose:
+            Walks up from the node to the closest ancestor that already exists for this record, then creates
+            the missing dicts on the way back down, exactly like _set_value_by_path would.
+
+        Parameters:
+            - nodes (tuple): The plan's destination_nodes.
+            - containers (list): The dicts already created for this record, indexed like nodes.
+            - node (int): The node whose dict is needed.
+
+        Returns:
+            - dict: The output dict of the node.
+        """
+        missing = []
+        while containers[node] is None:
+            missing.append(node)
+            node = nodes[node][0]
+        container = containers[node]
+        for node in reversed(missing):
+            key = nodes[node][1]
+            if key not in container:
+                container[key] = {}
+            container = containers[node] = container[key]
+        return container
+
+    def _apply_plan_traced(self, plan, input_data, trace, failures=None):
+        """
+        Same as apply_plan, but records what happened to every mapping in trace.
+        Kept separate so the untraced path does not pay for any of the bookkeeping.
+        A value that fails coercion is traced as not found, with the reason in an "error" key.
+        """
+        output_data = {}
+        converters = _NO_CONVERTERS if failures is None else plan.converters
+        for mapping, converter in zip(plan.mappings, converters):
+            start = time.perf_counter_ns()
+            value = self._get_value_by_path(input_data, mapping.source_path)
+            error = None
+            if value is not None:
+                if mapping.children is not None:
+                    value = self._apply_children(mapping.children, value, failures)
+                elif converter is not None:
+                    converted = converter(value)
+                    if converted is INVALID:
+                        failures.append((mapping, value))
+                        error = format_failures([(mapping, value)])
+                    value = None if converted is INVALID else converted
+                if value is not None:
+                    self._set_value_by_path(output_data, mapping.destination_path, value)
+            entry = {
+                "source": '.'.join(mapping.source_path),
+                "destination": '.'.join(mapping.destination_path),
+                "found": value is not None,
+                "value": value,
+                "duration_us": (time.perf_counter_ns() - start) / 1000,
+            }
+            if error is not None:
+                entry["error"] = error
+            trace.append(entry)
+        return output_data
+
+    # Shared with the codegen and columnar engines, which fall back to it for anything that is not a plain dict
+    _get_value_by_path = staticmethod(get_value_by_path)
 
     def _set_value_by_path(self, data, path, value):
         """
@@ -94,15 +412,13 @@ class Transformer:
 
         Parameters:
             - data (dict): The output data where the value will be inserted.
-            - path (list): A list of strings representing the path where the value should be set. 
-                           Example: ['Candidate Details', 'First Name']
+            - path (tuple or list): The path where the value should be set.
+                           Example: ('Candidate Details', 'First Name')
             - value: The value to be set at the specified path.
         
         Returns:
             None
         """
-        print(f"Setting value {value} at path {path}")  # Debugging to show the value and path being processed
-        
         # If we are at the last element of the path, set the value
         if len(path) == 1:
             data[path[0]] = value
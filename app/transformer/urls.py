@@ -1,7 +1,31 @@
 from django.urls import path
-from .views import TransformAPIView
+from .views import (
+    AsyncTransformView, RawTransformView, TransformAPIView, TransformBatchAPIView, TransformJobCreateAPIView,
+    TransformJobResultListAPIView, TransformJobRetrieveAPIView, TransformResultCacheAPIView, TransformStreamView,
+)
 
 urlpatterns = [
     # API to transform input data using a specific data template
     path('transform/<int:template_id>/', TransformAPIView.as_view(), name='transform'),
+
+    # Lean variant of the transform API without DRF parsing and rendering
+    path('transform/<int:template_id>/raw/', RawTransformView.as_view(), name='transform-raw'),
+
+    # Async variant of the transform API for ASGI deployments
+    path('transform/<int:template_id>/async/', AsyncTransformView.as_view(), name='transform-async'),
+
+    # API to transform a JSON array of input records with a single template load
+    path('transform/<int:template_id>/batch/', TransformBatchAPIView.as_view(), name='transform-batch'),
+
+    # API to stream newline-delimited JSON records through a template
+    path('transform/<int:template_id>/stream/', TransformStreamView.as_view(), name='transform-stream'),
+
+    # APIs to queue a background transform job, poll its status and page through its results
+    path('transform/<int:template_id>/jobs/', TransformJobCreateAPIView.as_view(), name='transform-jobs'),
+    path('transform/jobs/<int:job_id>/', TransformJobRetrieveAPIView.as_view(), name='transform-job'),
+    path('transform/jobs/<int:job_id>/results/', TransformJobResultListAPIView.as_view(),
+         name='transform-job-results'),
+
+    # API to read the hit and miss counters of the transform result cache
+    path('transform/cache/', TransformResultCacheAPIView.as_view(), name='transform-cache'),
 ]
@@ -1,14 +1,45 @@
+import json
 
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from config.api import KeysetPagination
 from data_template_engine.models import DataTemplate  # Assuming this is your model
+from . import json_codec
+from .jobs import create_job
+from .models import TransformJob, TransformJobResult
+from .plan import aget_compiled_template, get_compiled_template, get_projected_plan, parse_selection
+from .result_cache import acached_apply_plan, cached_apply_plan, get_result_cache_stats
+from .serializers import TransformJobResultSerializer, TransformJobSerializer
+from .streaming import encode_ndjson, iter_ndjson
+from .tracing import finish_trace, get_trace_mode
 from .transformer import Transformer  # Your Transformer class
 from rest_framework import status
 
 
+def _selected_plan(request, plan):
+    # ?select=Candidate Details.First Name,Address prunes the plan to the mappings feeding those destination paths
+    selection = parse_selection(request.GET.get('select'))
+    return plan if selection is None else get_projected_plan(plan, selection)
+
+
 class TransformAPIView(APIView):
     """
+    API View to transform a single input record with a Data Template.
 
+    *** POST Method ***
+    Transforms the request body with the template identified by template_id.
+    Add ?trace=1 (or the X-Transform-Trace: 1 header) to get a per-mapping trace back as
+    {"data": <output>, "trace": [...]}, or ?trace=log to send the trace to the 'transformer.trace' logger.
+    With TRANSFORMER_RESULT_CACHE enabled, untraced results are served from the result cache when the same
+    input was transformed before with the same version of the template (see transformer.result_cache).
+    Add ?select=<destination paths, comma separated> (e.g. ?select=Candidate Details.First Name,Address) to only
+    compute and return those parts of the output; the other mappings are not evaluated at all.
     """
 
     def post(self, request, template_id):
@@ -25,7 +56,13 @@ class TransformAPIView(APIView):
 
             # Initialize the transformer and transform the data
             transformer = Transformer()
-            output_data = transformer.transform(input_data, data_template)
+            plan = _selected_plan(request, get_compiled_template(data_template))
+            trace_mode = get_trace_mode(request)
+            if trace_mode:
+                trace = []
+                output_data = transformer.apply_plan(plan, input_data, trace)
+                return Response(finish_trace(trace_mode, template_id, output_data, trace))
+            output_data = cached_apply_plan(transformer, plan, input_data)
             # Return the transformed data
             return Response(output_data)
         except Exception as e:
@@ -33,3 +70,386 @@ class TransformAPIView(APIView):
                              "message": "Something Went Wrong",
                              },
                             status=status.HTTP_400_BAD_REQUEST)
+
+
+class TransformBatchAPIView(APIView):
+    """
+    API View to transform many input records with the same Data Template in one request.
+
+    *** POST Method ***
+    Accepts a JSON array of input records, loads and compiles the template once and returns
+    the transformed records in input order. A record that fails to transform is reported with
+    its own error instead of failing the whole batch. Supports ?select= like TransformAPIView.
+    """
+
+    def post(self, request, template_id):
+        """
+        HTTP Method: POST
+
+        Purpose:
+            Transform every record of the request body using the template identified by template_id.
+            The number of records is limited by the TRANSFORMER_BATCH_MAX_SIZE setting. The batch is transformed
+            in the serving process; larger inputs go to background jobs, which can use worker processes
+            (see transformer.parallel).
+
+        Request Body:
+            [
+                {"candidate": {"first_name": "John", "last_name": "Doe"}},
+                {"candidate": {"first_name": "Jane"}}
+            ]
+
+        Returns:
+            - 200 OK: A JSON response with one result per input record, in input order.
+            - 400 Bad Request: If the request body is not a JSON array.
+            - 404 Not Found: If the data template does not exist.
+            - 413 Request Entity Too Large: If the batch has more records than allowed.
+
+        Example Response:
+            {
+                "count": 2,
+                "error_count": 1,
+                "results": [
+                    {"data": {"Candidate Details": {"First Name": "John", "Last Name": "Doe"}}, "error": null},
+                    {"data": null, "error": "Record must be a JSON object"}
+                ]
+            }
+        """
+        try:
+            records = request.data
+            if not isinstance(records, list):
+                return Response({"data": None, "message": "Request body must be a JSON array"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            max_size = getattr(settings, 'TRANSFORMER_BATCH_MAX_SIZE', 1000)
+            if len(records) > max_size:
+                return Response({"data": None,
+                                 "message": f"Batch exceeds the maximum size of {max_size} records",
+                                 },
+                                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            try:
+                data_template = DataTemplate.objects.get(id=template_id)
+            except DataTemplate.DoesNotExist:
+                return Response({"error": "Data template not found"}, status=404)
+
+            plan = _selected_plan(request, get_compiled_template(data_template))
+            results = [
+                {"data": output_data, "error": error}
+                for output_data, error in Transformer().apply_plan_many(plan, records)
+            ]
+            return Response({"count": len(results),
+                             "error_count": sum(1 for result in results if result["error"] is not None),
+                             "results": results,
+                             })
+        except Exception as e:
+            return Response ({"data": str(e),
+                             "message": "Something Went Wrong",
+                             },
+                            status=status.HTTP_400_BAD_REQUEST)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TransformStreamView(View):
+    """
+    View to transform a newline-delimited JSON upload into a newline-delimited JSON response.
+
+    *** POST Method ***
+    Reads the request body line by line, transforms each record as soon as it is read and
+    streams the results back while the upload is still being consumed. Neither the input nor
+    the output is ever held in memory as a whole, so memory use does not grow with upload size.
+    Supports ?select= like TransformAPIView.
+
+    This is a plain Django view on purpose: DRF would parse the entire body into request.data.
+    """
+
+    def post(self, request, template_id):
+        """
+        HTTP Method: POST
+
+        Request Body (application/x-ndjson):
+            {"candidate": {"first_name": "John", "last_name": "Doe"}}
+            {"candidate": {"first_name": "Jane"}}
+
+        Returns:
+            - 200 OK: A streamed application/x-ndjson response with one line per input record, in input order.
+            - 404 Not Found: If the data template does not exist.
+
+        Example Response:
+            {"data": {"Candidate Details": {"First Name": "John", "Last Name": "Doe"}}, "error": null}
+            {"data": {"Candidate Details": {"First Name": "Jane"}}, "error": null}
+        """
+        try:
+            data_template = DataTemplate.objects.get(id=template_id)
+        except DataTemplate.DoesNotExist:
+            return JsonResponse({"error": "Data template not found"}, status=404)
+
+        # The plan is compiled here, before streaming starts, so the generator below never touches the DB
+        try:
+            plan = _selected_plan(request, get_compiled_template(data_template))
+        except ValueError as e:
+            return JsonResponse({"data": str(e), "message": "Something Went Wrong"}, status=400)
+        results = Transformer().apply_plan_many(plan, iter_ndjson(request))
+        chunk_size = getattr(settings, 'TRANSFORMER_STREAM_CHUNK_SIZE', 64 * 1024)
+        return StreamingHttpResponse(encode_ndjson(results, chunk_size), content_type='application/x-ndjson')
+
+
+def _json_response(data, status=200):
+    return HttpResponse(json_codec.dumps(data), content_type='application/json', status=status)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RawTransformView(View):
+    """
+    Lean variant of TransformAPIView for small payloads at high request rates.
+
+    *** POST Method ***
+    Same input, output, tracing, projection and errors as TransformAPIView, without DRF: no content negotiation,
+    no parser or renderer selection and no Response rendering. The raw request body is decoded with
+    transformer.json_codec (orjson when installed) and the encoded output is written straight into an
+    HttpResponse. `manage.py benchmark_transformer endpoints` measures the overhead this saves.
+    """
+
+    def post(self, request, template_id):
+        """
+        HTTP Method: POST
+
+        Request Body:
+            {"candidate": {"first_name": "John", "last_name": "Doe"}}
+
+        Returns:
+            - 200 OK: A JSON response with the transformed data.
+            - 400 Bad Request: If the request body is not valid JSON or something goes wrong.
+            - 404 Not Found: If the data template does not exist.
+
+        Example Response:
+            {"Candidate Details": {"First Name": "John", "Last Name": "Doe"}}
+        """
+        try:
+            # An empty body transforms like an empty object, as it does through DRF
+            body = request.body
+            input_data = json_codec.loads(body) if body else {}
+            try:
+                data_template = DataTemplate.objects.get(id=template_id)
+            except DataTemplate.DoesNotExist:
+                return _json_response({"error": "Data template not found"}, status=404)
+
+            plan = _selected_plan(request, get_compiled_template(data_template))
+            trace_mode = get_trace_mode(request)
+            if trace_mode:
+                trace = []
+                output_data = Transformer().apply_plan(plan, input_data, trace)
+                return _json_response(finish_trace(trace_mode, template_id, output_data, trace))
+            return _json_response(cached_apply_plan(Transformer(), plan, input_data))
+        except Exception as e:
+            return _json_response({"data": str(e),
+                                   "message": "Something Went Wrong",
+                                   },
+                                  status=status.HTTP_400_BAD_REQUEST)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncTransformView(View):
+    """
+    Native async variant of TransformAPIView.
+
+    *** POST Method ***
+    Loads the template through Django's async ORM and takes its compiled plan from the
+    per-process cache, so a warm template costs a single awaited query. Served by an ASGI
+    server (config/asgi.py), one worker can hold many concurrent transform requests
+    without dedicating a thread to each of them. The output, including tracing and projection, is the same as
+    TransformAPIView's.
+    """
+
+    async def post(self, request, template_id):
+        """
+        HTTP Method: POST
+
+        Request Body:
+            {"candidate": {"first_name": "John", "last_name": "Doe"}}
+
+        Returns:
+            - 200 OK: A JSON response with the transformed data.
+            - 400 Bad Request: If the request body is not valid JSON or something goes wrong.
+            - 404 Not Found: If the data template does not exist.
+
+        Example Response:
+            {"Candidate Details": {"First Name": "John", "Last Name": "Doe"}}
+        """
+        try:
+            # An empty body transforms like an empty object, as it does through DRF
+            input_data = json.loads(request.body) if request.body else {}
+            try:
+                data_template = await DataTemplate.objects.aget(id=template_id)
+            except DataTemplate.DoesNotExist:
+                return JsonResponse({"error": "Data template not found"}, status=404)
+
+            plan = _selected_plan(request, await aget_compiled_template(data_template))
+            trace_mode = get_trace_mode(request)
+            if trace_mode:
+                trace = []
+                output_data = Transformer().apply_plan(plan, input_data, trace)
+                return JsonResponse(finish_trace(trace_mode, template_id, output_data, trace), safe=False)
+            output_data = await acached_apply_plan(Transformer(), plan, input_data)
+            return JsonResponse(output_data, safe=False)
+        except Exception as e:
+            return JsonResponse({"data": str(e),
+                                 "message": "Something Went Wrong",
+                                 },
+                                status=status.HTTP_400_BAD_REQUEST)
+
+
+class TransformJobCreateAPIView(APIView):
+    """
+    API View to queue a background transform of many records.
+
+    *** POST Method ***
+    Stores the records and returns at once with the id of the job. The records are transformed by
+    `manage.py transform_worker` processes; the job's status and results are read from
+    TransformJobRetrieveAPIView and TransformJobResultListAPIView.
+    """
+
+    def post(self, request, template_id):
+        """
+        HTTP Method: POST
+
+        Purpose:
+            Queue a transform of every record of the request body with the template identified by template_id.
+            The number of records is limited by the TRANSFORMER_JOB_MAX_SIZE setting. ?select= is checked
+            against the template now and stored with the job, whose results are then limited to those paths.
+
+        Request Body:
+            [
+                {"candidate": {"first_name": "John", "last_name": "Doe"}},
+                {"candidate": {"first_name": "Jane"}}
+            ]
+
+        Returns:
+            - 202 Accepted: The queued job, with a Location header pointing at its status.
+            - 400 Bad Request: If the request body is not a JSON array or ?select= names an unknown path.
+            - 404 Not Found: If the data template does not exist.
+            - 413 Request Entity Too Large: If the job has more records than allowed.
+
+        Example Response:
+            {
+                "id": 7,
+                "template": 1,
+                "select": "",
+                "status": "pending",
+                "record_count": 2,
+                "processed_count": 0,
+                "error_count": 0,
+                "error": "",
+                "created_at": "2024-10-04T10:15:00Z",
+                "started_at": null,
+                "finished_at": null
+            }
+        """
+        try:
+            records = request.data
+            if not isinstance(records, list):
+                return Response({"data": None, "message": "Request body must be a JSON array"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            max_size = getattr(settings, 'TRANSFORMER_JOB_MAX_SIZE', 100000)
+            if len(records) > max_size:
+                return Response({"data": None,
+                                 "message": f"Job exceeds the maximum size of {max_size} records",
+                                 },
+                                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            try:
+                data_template = DataTemplate.objects.get(id=template_id)
+            except DataTemplate.DoesNotExist:
+                return Response({"error": "Data template not found"}, status=404)
+
+            plan = _selected_plan(request, get_compiled_template(data_template))
+            job = create_job(data_template, records, plan.projection)
+            return Response(TransformJobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                            headers={'Location': reverse('transform-job', args=[job.pk])})
+        except Exception as e:
+            return Response ({"data": str(e),
+                             "message": "Something Went Wrong",
+                             },
+                            status=status.HTTP_400_BAD_REQUEST)
+
+
+class TransformJobRetrieveAPIView(APIView):
+    """
+    API View to poll the status of a background transform job.
+
+    *** GET Method ***
+    Returns the job, including how many records are processed so far.
+    """
+
+    def get(self, request, job_id):
+        """
+        HTTP Method: GET
+
+        Returns:
+            - 200 OK: The job, see TransformJobCreateAPIView. status is one of pending, running, done and failed.
+            - 404 Not Found: If the job does not exist.
+        """
+        try:
+            job = TransformJob.objects.get(id=job_id)
+        except TransformJob.DoesNotExist:
+            return Response({"error": "Transform job not found"}, status=404)
+        return Response(TransformJobSerializer(job).data)
+
+
+class TransformJobResultPagination(KeysetPagination):
+    ordering = 'index'
+
+
+class TransformJobResultListAPIView(APIView):
+    """
+    API View to read the results of a background transform job.
+
+    *** GET Method ***
+    Returns the results stored so far, one page at a time and in input order. Results are available as soon
+    as their chunk is processed, so clients can start reading before the job is done.
+    """
+
+    def get(self, request, job_id):
+        """
+        HTTP Method: GET
+
+        Query Parameters:
+            - limit (int, optional): Number of results per page (default 100, at most 1000).
+            - cursor (str, optional): Position of the page, taken from the 'next' or 'previous' link.
+
+        Returns:
+            - 200 OK: A page of results.
+            - 404 Not Found: If the job does not exist.
+
+        Return Data on Success:
+            {
+                "next": "http://localhost:8000/api/transform/jobs/7/results/?cursor=cD0x",
+                "previous": null,
+                "results": [
+                    {"index": 0, "data": {"Candidate Details": {"First Name": "John"}}, "error": null},
+                    {"index": 1, "data": null, "error": "Record must be a JSON object"}
+                ]
+            }
+        """
+        if not TransformJob.objects.filter(id=job_id).exists():
+            return Response({"error": "Transform job not found"}, status=404)
+        paginator = TransformJobResultPagination()
+        page = paginator.paginate_queryset(TransformJobResult.objects.filter(job_id=job_id), request, view=self)
+        return paginator.get_paginated_response(TransformJobResultSerializer(page, many=True).data)
+
+
+class TransformResultCacheAPIView(APIView):
+    """
+    API View to inspect the transform result cache of the process serving the request.
+
+    *** GET Method ***
+    Returns the hit and miss counters of the cache, see transformer.result_cache.get_result_cache_stats.
+    Every server process has its own counters.
+
+    Example Response:
+        {"enabled": true, "hits": 120, "shared_hits": 20, "misses": 30, "hit_rate": 0.8,
+         "evictions": 0, "size": 30, "max_size": 10000, "ttl": 300}
+    """
+
+    def get(self, request):
+        return Response(get_result_cache_stats())